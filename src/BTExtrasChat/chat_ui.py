@@ -12,7 +12,8 @@ import os
 import socket
 import sys
 from common.app_constants import CHAT_COMMAND_PORT
-from common.db_handler import DatabaseHandler, get_new_db_connection
+from common.db_handler import DatabaseHandler
+from common.db_pool import get_new_db_connection
 
 
 class ChatWindow:
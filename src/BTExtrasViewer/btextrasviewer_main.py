@@ -4,6 +4,7 @@ import io
 import os
 import logging
 import configparser
+import pymysql
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk, simpledialog, scrolledtext
 from datetime import datetime, date
@@ -19,10 +20,10 @@ import json
 import base64
 import argparse
 import time
+import multiprocessing
 
 from BTExtrasViewer.file_processing import (
-    extract_iban_from_mt940, threaded_import_worker, 
-    threaded_export_worker, threaded_export_to_memory_worker
+    threaded_import_worker, threaded_export_worker, threaded_export_to_memory_worker
 )
 from BTExtrasViewer.email_handler import send_email_with_memory_attachment
 
@@ -40,21 +41,30 @@ from common.app_constants import (
 )
 # Înlocuiți "from common import config_management" cu aceste linii
 from common.config_management import (
-    save_app_config, save_db_credentials, read_db_config_from_parser, CONFIG_FILE, APP_DATA_DIR
+    save_app_config, save_db_credentials, read_db_config_from_parser, read_performance_config_from_parser,
+    CONFIG_FILE, APP_DATA_DIR
 )
 from common.db_handler import DatabaseHandler, MariaDBConfigDialog
+from common.db_pool import configure_query_timing, query_stats
 from common import auth_handler
 
 # Importurile din pachetul local BTExtrasViewer (folosind importuri absolute)
 from BTExtrasViewer.ui_reports import CashFlowReportDialog, BalanceEvolutionReportDialog, TransactionAnalysisReportDialog
 from BTExtrasViewer import file_processing
-from BTExtrasViewer.file_processing import extract_iban_from_mt940, threaded_import_worker, threaded_export_worker
+from BTExtrasViewer.file_processing import (
+    threaded_import_worker, threaded_parallel_import_worker, threaded_import_preview_worker, threaded_export_worker
+)
+from BTExtrasViewer.import_engine import (
+    IMPORT_MAX_PARALLEL_BATCHES, extract_iban_from_mt940, format_import_stats,
+    load_import_checkpoints, interrupted_import_batches
+)
+from BTExtrasViewer.parse_cache import default_parse_cache
 from BTExtrasViewer import ui_utils
 from BTExtrasViewer.ui_dialogs import (
     AccountManagerDialog, AccountEditDialog, TransactionTypeManagerDialog, 
     SMTPConfigDialog, BalanceReportConfigDialog, LoginDialog, 
     UserManagerDialog, RoleManagerDialog, SwiftCodeManagerDialog, CurrencyManagerDialog,
-    ForcePasswordChangeDialog, ChangePasswordDialog
+    ForcePasswordChangeDialog, ChangePasswordDialog, ImportPreviewDialog, QueryPerformanceDialog
 )
 # --- SFÂRȘIT BLOC DE IMPORTURI REVIZUIT ---
 
@@ -136,9 +146,10 @@ class BTViewerApp:
 
         # 5. Starea proceselor de fundal (import/export)
         self.import_batch_queue = []
-        self.current_batch_info_for_message = None
+        self.current_import_batches = []
+        self.import_started_at = None
+        self.import_preview_batches = []
         self.file_paths_for_import_ref = []
-        self.last_imported_account_id = None
         self.queue = Queue()
         self.import_thread = None
         self.export_thread = None
@@ -166,6 +177,7 @@ class BTViewerApp:
         self.reset_button = None
         self.export_button = None
         self.import_button = None
+        self.import_preview_button = None
         self.chat_button = None
         self.action_buttons = []
         self.nav_tree = None
@@ -202,6 +214,10 @@ class BTViewerApp:
         about_dialog = AboutDialog(self.master)
         about_dialog.wait_window()
 
+    def _show_query_performance(self):
+        """Deschide clasamentul interogărilor SQL după timpul total (vezi db_pool.QueryStats)."""
+        QueryPerformanceDialog(self.master, query_stats)
+
     def _refresh_application_data(self, refresh_accounts=False, refresh_transactions=True):
         """
         Funcție centralizată pentru a reîmprospăta datele aplicației din baza de date.
@@ -359,7 +375,7 @@ class BTViewerApp:
         # MODIFICARE: Citim setările din dicționarul încărcat la pornire
         visibility_settings = self.user_settings.get('transaction_type_visibility', {})
         
-        all_types = self.db_handler.fetch_all_dict("SELECT cod FROM tipuri_tranzactii")
+        all_types = self.db_handler.fetch_all_dict("SELECT cod FROM tipuri_tranzactii", cached=True)
         if not all_types:
             self.visible_tx_codes = []
             return
@@ -434,7 +450,7 @@ class BTViewerApp:
                     if current_day == 0: _, num_days = calendar.monthrange(current_year, current_month); start_date, end_date = date(current_year, current_month, 1), date(current_year, current_month, num_days)
                     else: start_date = end_date = date(current_year, current_month, current_day)
         if not start_date or not end_date:
-            row = self.db_handler.fetch_one_dict("SELECT MIN(data) as min_d, MAX(data) as max_d FROM tranzactii WHERE id_cont_fk = %s", (self.active_account_id,))
+            row = self.db_handler.fetch_one_dict("SELECT MIN(data) as min_d, MAX(data) as max_d FROM tranzactii WHERE id_cont_fk = %s", (self.active_account_id,), cached=True)
             if row: start_date, end_date = row.get('min_d') or date.today(), row.get('max_d') or date.today()
             else: start_date = end_date = date.today()
         initial_context = {'active_account_id': self.active_account_id, 'start_date': start_date, 'end_date': end_date, 'visible_tx_codes': self.visible_tx_codes, 'tranzactie_acces': self.current_user.get('tranzactie_acces', 'toate')}
@@ -575,6 +591,9 @@ class BTViewerApp:
         self.import_button = tk.Button(action_buttons_frame, text="Import extrase", command=self.import_mt940, font=(default_font_family, default_font_size), relief=tk.RAISED, borderwidth=2)
         self.import_button.pack(side=tk.LEFT, padx=5)
 
+        self.import_preview_button = tk.Button(action_buttons_frame, text="Previzualizare import", command=self.preview_import_mt940, font=(default_font_family, default_font_size), relief=tk.RAISED, borderwidth=2)
+        self.import_preview_button.pack(side=tk.LEFT, padx=5)
+
         self.chat_button = tk.Button(action_buttons_frame, text="Chat", command=self._launch_or_show_chat, font=(default_font_family, default_font_size, 'bold'), relief=tk.RAISED, borderwidth=2, background="#E8DAEF", activebackground="#D2B4DE")
         self.chat_button.pack(side=tk.LEFT, padx=5)
 
@@ -641,10 +660,10 @@ class BTViewerApp:
         if self.has_permission('view_import_history'):
             history_tab = ttk.Frame(main_content_notebook)
             main_content_notebook.add(history_tab, text=" Istoric Importuri ")
-            history_cols = ("fisier", "data", "utilizator", "noi", "ignorate", "cont")
+            history_cols = ("fisier", "data", "utilizator", "noi", "ignorate", "cont", "durata", "viteza")
             self.history_tree = ttk.Treeview(history_tab, columns=history_cols, show="headings")
-            self.history_tree.heading("fisier", text="Nume Fișier"); self.history_tree.heading("data", text="Data Import"); self.history_tree.heading("utilizator", text="Utilizator"); self.history_tree.heading("noi", text="Tranzacții Noi"); self.history_tree.heading("ignorate", text="Tranzacții Ignorate"); self.history_tree.heading("cont", text="Importat în Contul")
-            self.history_tree.column("fisier", width=250); self.history_tree.column("data", width=150); self.history_tree.column("utilizator", width=120, anchor='w'); self.history_tree.column("noi", width=120, anchor='center'); self.history_tree.column("ignorate", width=130, anchor='center'); self.history_tree.column("cont", width=200)
+            self.history_tree.heading("fisier", text="Nume Fișier"); self.history_tree.heading("data", text="Data Import"); self.history_tree.heading("utilizator", text="Utilizator"); self.history_tree.heading("noi", text="Tranzacții Noi"); self.history_tree.heading("ignorate", text="Tranzacții Ignorate"); self.history_tree.heading("cont", text="Importat în Contul"); self.history_tree.heading("durata", text="Durată (s)"); self.history_tree.heading("viteza", text="Rânduri/s")
+            self.history_tree.column("fisier", width=250); self.history_tree.column("data", width=150); self.history_tree.column("utilizator", width=120, anchor='w'); self.history_tree.column("noi", width=120, anchor='center'); self.history_tree.column("ignorate", width=130, anchor='center'); self.history_tree.column("cont", width=200); self.history_tree.column("durata", width=90, anchor='e'); self.history_tree.column("viteza", width=90, anchor='e')
             history_scrollbar = ttk.Scrollbar(history_tab, orient="vertical", command=self.history_tree.yview)
             self.history_tree.configure(yscrollcommand=history_scrollbar.set)
             self.history_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
@@ -679,7 +698,7 @@ class BTViewerApp:
         self.sold_label = ttk.Label(totals_frame, text="0.00 RON", font=(default_font_family, default_font_size, 'bold'))
         self.sold_label.grid(row=0, column=5, sticky="w", padx=5)
         
-        self.action_buttons = [self.export_button, self.email_export_button, self.import_button, self.reset_button]
+        self.action_buttons = [self.export_button, self.email_export_button, self.import_button, self.import_preview_button, self.reset_button]
         self._toggle_action_buttons('disabled')
         self._on_search_column_changed()
 
@@ -770,6 +789,7 @@ class BTViewerApp:
                 'search_column': self.search_column_var.get()
             }
             
+            # Din acest thread, fetch_all_dict folosește o conexiune din pool, nu conexiunea UI
             user_roles_raw = self.db_handler.fetch_all_dict("SELECT r.nume_rol FROM roluri r JOIN utilizatori_roluri ur ON r.id = ur.id_rol WHERE ur.id_utilizator = %s", (self.current_user['id'],))
             user_info = self.current_user.copy()
             user_info['roles_list'] = [role['nume_rol'] for role in user_roles_raw] if user_roles_raw else ['N/A']
@@ -890,6 +910,8 @@ class BTViewerApp:
         menubar.add_cascade(label="Fișier", menu=file_menu)
 
         file_menu.add_command(label="Schimbă Parola...", command=self._show_change_password_dialog)
+        if self.has_permission('import_files'):
+            file_menu.add_command(label="Reia Importurile Întrerupte...", command=self.resume_interrupted_imports)
         file_menu.add_separator()
 
         file_menu.add_command(label="Ieșire", command=lambda: ui_utils.handle_app_exit(self, self.master))
@@ -948,6 +970,7 @@ class BTViewerApp:
         help_menu = tk.Menu(menubar, tearoff=0, font=(default_font_family, default_font_size))
         menubar.add_cascade(label="Ajutor", menu=help_menu)
         help_menu.add_command(label="Ghid de Utilizare...", command=self._show_help_browser)
+        help_menu.add_command(label="Performanță Interogări...", command=self._show_query_performance)
         help_menu.add_separator()
         help_menu.add_command(label="Despre BTExtras Suite...", command=self._show_about_dialog)
 
@@ -1193,6 +1216,23 @@ class BTViewerApp:
         return result_id
 
     def import_mt940(self):
+        """Importă extrasele selectate, grupate pe conturi după IBAN (loturile mai multor conturi rulează în paralel)."""
+        batches = self._select_import_batches()
+        if batches:
+            self.import_batch_queue = batches
+            self._start_import()
+
+    def preview_import_mt940(self):
+        """Previzualizează importul (tranzacții noi / duplicate / coduri necunoscute) fără a scrie în baza de date."""
+        batches = self._select_import_batches("Selectează extrasele pentru previzualizarea importului")
+        if batches:
+            self._start_import_preview(batches)
+
+    def _select_import_batches(self, title="Selectează unul sau mai multe fișiere MT940"):
+        """
+        Cere fișierele și le asociază conturilor după IBAN (cu crearea/selecția contului la nevoie).
+        Returnează loturile [{'target_id', 'files'}] sau None dacă nu a fost programat niciun fișier.
+        """
         if not (self.db_handler and self.db_handler.is_connected()):
             if self.master.winfo_exists():
                 messagebox.showwarning("Fără Conexiune", "Vă rugăm configurați și stabiliți o conexiune la baza de date.", parent=self.master)
@@ -1200,8 +1240,8 @@ class BTViewerApp:
 
         selected_file_paths = filedialog.askopenfilenames(
             master=self.master,
-            title="Selectează unul sau mai multe fișiere MT940",
-            filetypes=[("Fișiere MT940", "*.sta *.STA *.txt"), ("Toate fișierele", "*.*")]
+            title=title,
+            filetypes=[("Extrase MT940 / CAMT.053", "*.sta *.STA *.txt *.xml *.XML"), ("Toate fișierele", "*.*")]
         )
         if not selected_file_paths:
             return
@@ -1211,10 +1251,11 @@ class BTViewerApp:
         # Pasul 1: Pregătirea datelor FĂRĂ a modifica starea aplicației
         temp_account_to_files_map = {}
         accounts_snapshot = self.db_handler.get_all_accounts() or []
+        parse_cache = default_parse_cache()
 
         for file_path in selected_file_paths:
             target_account_id = None
-            iban_from_file_raw = extract_iban_from_mt940(file_path)
+            iban_from_file_raw = extract_iban_from_mt940(file_path, parse_cache)
             iban_from_file = iban_from_file_raw.replace(" ", "").upper() if iban_from_file_raw else None
 
             if iban_from_file:
@@ -1254,82 +1295,175 @@ class BTViewerApp:
                     temp_account_to_files_map[target_account_id] = []
                 temp_account_to_files_map[target_account_id].append(file_path)
 
-        # Pasul 2: Crearea cozii de import
-        self.import_batch_queue = []
-        for acc_id, files_list in temp_account_to_files_map.items():
-            if files_list:
-                self.import_batch_queue.append({'target_id': acc_id, 'files': list(files_list)})
-        
-        # Pasul 3: Pornirea procesării
-        if not self.import_batch_queue:
+        # Pasul 2: Crearea loturilor (câte unul per cont)
+        batches = [{'target_id': acc_id, 'files': list(files_list)}
+                   for acc_id, files_list in temp_account_to_files_map.items() if files_list]
+        if not batches:
             messagebox.showinfo("Import Anulat", "Niciun fișier nu a fost programat pentru import.", parent=self.master)
-            return
-
-        self._process_next_import_batch()
+            return None
+        return batches
         # --- SFÂRȘIT VERSIUNE FINALĂ ---
 
-    def _process_next_import_batch(self):
-        """Procesează următorul lot din coada de import."""
-        if not self.import_batch_queue:
-            # S-au terminat toate loturile de import
-            if self.master.winfo_exists():
-                messagebox.showinfo("Importuri Finalizate", "Toate loturile de fișiere selectate au fost procesate.", parent=self.master)
-            self._toggle_action_buttons('normal')
+    def _start_import_preview(self, batches):
+        """Pornește previzualizarea în fundal, cu fereastra de progres obișnuită."""
+        self._toggle_action_buttons('disabled')
+        total_files = sum(len(batch['files']) for batch in batches)
+        self.current_progress_win, self.current_progress_bar, self.current_progress_status_label_widget = \
+            file_processing.create_progress_window(self.master, "Previzualizare Import", f"Se analizează {total_files} fișier(e)...")
+        self.current_progress_bar['maximum'] = total_files
+        self.import_preview_batches = batches
+        self.import_thread = threading.Thread(
+            target=threaded_import_preview_worker, args=(batches, self.queue, self.db_handler.db_credentials)
+        )
+        self.import_thread.daemon = True
+        self.import_thread.start()
+        if self.master.winfo_exists():
+            self.master.after(100, self._check_import_preview_progress)
 
-            # Verificăm dacă am avut un cont importat recent
-            if self.last_imported_account_id is not None:
-                # Setăm noul cont activ
-                self.active_account_id = self.last_imported_account_id
-                # Salvăm preferința în baza de date
-                save_app_config(self)
-                # Resetăm variabila de stare
-                self.last_imported_account_id = None
-
-            # Reîmprospătăm complet interfața, în ordinea corectă:
-            # 1. Actualizăm lista de conturi și selecția vizuală
-            self._populate_account_selector()
-            # 2. Actualizăm tranzacțiile pentru noul cont activ
-            self.refresh_ui_for_account_change()
+    def _check_import_preview_progress(self):
+        try:
+            while True:
+                msg = self.queue.get_nowait()
+                if msg[0] == "progress":
+                    if self.current_progress_win and self.current_progress_win.winfo_exists():
+                        self.current_progress_bar['value'] = msg[1] + 1
+                        self.current_progress_status_label_widget.config(text=msg[2])
+                elif msg[0] == "done" and msg[1] == "import_preview":
+                    self._close_import_preview_progress()
+                    self._show_import_preview(msg[2])
+                    return
+                elif msg[0] == "error":
+                    self._finalize_background_task(msg[2], success=False, operation_type="import")
+                    return
+        except Empty:
+            pass
+        except Exception as e:
+            logging.error(f"Eroare în _check_import_preview_progress: {type(e).__name__}: {e}", exc_info=True)
+
+        if self.import_thread and self.import_thread.is_alive():
+            if self.master.winfo_exists(): self.master.after(100, self._check_import_preview_progress)
+        else:
+            self._close_import_preview_progress()
+
+    def _close_import_preview_progress(self):
+        if self.current_progress_win and self.current_progress_win.winfo_exists():
+            self.current_progress_win.destroy()
+        self.current_progress_win, self.current_progress_bar, self.current_progress_status_label_widget = None, None, None
+        self.import_thread = None
+        self._toggle_action_buttons('normal')
+
+    def _show_import_preview(self, results):
+        """Afișează rezultatul previzualizării; la confirmare, pornește importul acelorași loturi."""
+        account_names = {acc['id_cont']: acc['nume_cont'] for acc in self.accounts_list}
+        dialog = ImportPreviewDialog(self.master, results, account_names, can_import=self.has_permission('import_files'))
+        if dialog.result:
+            self.import_batch_queue = self.import_preview_batches
+            self._start_import()
+
+    def resume_interrupted_imports(self):
+        """
+        Reia importurile întrerupte (ex. conexiune pierdută): fișierele cu punct de reluare în
+        'importuri_in_curs' sunt importate din nou, începând după ultimul lot confirmat.
+        """
+        if not (self.db_handler and self.db_handler.is_connected()):
+            messagebox.showerror("Eroare DB", "Nu există conexiune la baza de date.", parent=self.master)
+            return
+        if self.import_thread and self.import_thread.is_alive():
+            messagebox.showwarning("Import în curs", "Așteptați finalizarea importului curent.", parent=self.master)
+            return
+        try:
+            checkpoints = self.db_handler.run_with_cursor(load_import_checkpoints)
+        except Exception as e:
+            logging.error(f"Eroare la citirea importurilor întrerupte: {e}", exc_info=True)
+            messagebox.showerror("Eroare DB", f"Importurile întrerupte nu au putut fi citite:\n{e}", parent=self.master)
+            return
+        account_names = {acc['id_cont']: acc['nume_cont'] for acc in self.accounts_list}
+        # Doar conturile accesibile utilizatorului
+        checkpoints = [point for point in checkpoints if point['account_id'] in account_names]
+        if not checkpoints:
+            messagebox.showinfo("Reluare Import", "Nu există importuri întrerupte.", parent=self.master)
             return
 
-        # Procesăm următorul lot din coadă
-        current_batch = self.import_batch_queue.pop(0)
-        target_id, files_for_this_batch = current_batch['target_id'], current_batch['files']
+        batches, missing = interrupted_import_batches(checkpoints)
+        lines = [f"• {account_names[point['account_id']]}: {point['file']} ({point['records']} înregistrări deja importate)"
+                 for point in checkpoints if point not in missing]
+        message = "Importurile următoare vor fi continuate de unde au rămas:\n\n" + "\n".join(lines) if lines else ""
+        if missing:
+            message += ("\n\nFișierele următoare nu mai există la calea salvată; selectați-le din nou la import "
+                        "(importul lor va fi continuat automat):\n" + "\n".join(f"• {point['path']}" for point in missing))
+        if not batches:
+            messagebox.showwarning("Reluare Import", message.strip(), parent=self.master)
+            return
+        if messagebox.askyesno("Reluare Import", message + "\n\nContinuați?", parent=self.master):
+            self.import_batch_queue = batches
+            self._start_import()
 
-        # Memorăm ID-ul contului curent ca fiind "ultimul importat"
-        self.last_imported_account_id = target_id
+    def _start_import(self):
+        """
+        Pornește importul loturilor din coadă: un singur cont este importat direct în worker-ul
+        obișnuit (threaded_import_worker), iar mai multe conturi în paralel (_start_parallel_import).
+        """
+        if len(self.import_batch_queue) == 1:
+            self._start_single_import()
+        else:
+            self._start_parallel_import()
 
-        self.current_batch_info_for_message = {'target_id': target_id, 'num_files': len(files_for_this_batch)}
-        self.current_batch_files_for_history = files_for_this_batch
+    def _set_current_import_batches(self, batches):
+        batch_names = [next((acc['nume_cont'] for acc in self.accounts_list if acc['id_cont'] == batch['target_id']),
+                            f"ID Cont {batch['target_id']}") for batch in batches]
+        self.current_import_batches = [dict(batch, name=name, files_done=0) for batch, name in zip(batches, batch_names)]
+        self.import_started_at = time.perf_counter()
+        return batch_names
 
-        acc_obj_batch = next((acc for acc in self.accounts_list if acc['id_cont'] == target_id), None)
-        target_name_batch = acc_obj_batch['nume_cont'] if acc_obj_batch else f"ID Cont {target_id}"
+    def _start_single_import(self):
+        """Importă lotul unui singur cont, cu fereastra de progres simplă (fișier curent și telemetrie)."""
+        batches, self.import_batch_queue = self.import_batch_queue, []
+        batch = batches[0]
+        target_name = self._set_current_import_batches(batches)[0]
 
         self._toggle_action_buttons('disabled')
-
         self.current_progress_win, self.current_progress_bar, self.current_progress_status_label_widget = \
-            file_processing.create_progress_window(self.master, f"Import Lot Cont: {target_name_batch}", f"Se procesează {len(files_for_this_batch)} fișier(e)...")
+            file_processing.create_progress_window(self.master, f"Import Lot Cont: {target_name}",
+                                                   f"Se procesează {len(batch['files'])} fișier(e)...", show_stats=True)
+        self.current_progress_bar['maximum'] = len(batch['files'])
 
-        if self.current_progress_bar and self.current_progress_bar.winfo_exists():
-            self.current_progress_bar['maximum'] = len(files_for_this_batch)
-
-        # === AICI ESTE BLOCUL DE COD CORECTAT ===
-        
-        # 1. Obținem credențialele pentru baza de date
-        db_creds = self.db_handler.db_credentials
-        
-        # 2. Creăm thread-ul, eliminând linia duplicată și argumentul 'self'
         self.import_thread = threading.Thread(
-            target=threaded_import_worker, 
-            args=(self, files_for_this_batch, self.queue, target_id, db_creds)
+            target=threaded_import_worker,
+            args=(self, batch['files'], self.queue, batch['target_id'], self.db_handler.db_credentials),
+            kwargs={'user_id': self.current_user['id']}
         )
-        
-        # === SFÂRȘIT BLOC DE COD CORECTAT ===
+        self.import_thread.daemon = True
+        self.import_thread.start()
+        if self.master.winfo_exists():
+            self.master.after(100, self._check_single_import_progress)
+
+    def _start_parallel_import(self):
+        """
+        Pornește importul tuturor loturilor din coadă (câte unul per cont) în paralel, fiecare
+        cu propria conexiune; o singură fereastră de progres arată starea fiecărui lot.
+        """
+        batches, self.import_batch_queue = self.import_batch_queue, []
+        batch_names = self._set_current_import_batches(batches)
+
+        self._toggle_action_buttons('disabled')
+        progress_win = file_processing.create_batch_progress_window(
+            self.master, "Import Extrase", [(name, len(batch['files'])) for batch, name in zip(batches, batch_names)]
+        )
+        self.current_progress_win = progress_win
+        self.current_progress_bar = progress_win.overall_bar
+        self.current_progress_status_label_widget = progress_win.status_label
+        progress_win.status_label.config(text=f"Se importă {len(batches)} lot(uri), câte cel mult "
+                                              f"{IMPORT_MAX_PARALLEL_BATCHES} simultan...")
 
+        self.import_thread = threading.Thread(
+            target=threaded_parallel_import_worker,
+            args=(batches, self.queue, self.db_handler.db_credentials),
+            kwargs={'user_id': self.current_user['id']}
+        )
         self.import_thread.daemon = True
         self.import_thread.start()
         if self.master.winfo_exists():
-            self.master.after(100, self._check_batch_import_progress)
+            self.master.after(100, self._check_parallel_import_progress)
 
     def _finalize_background_task(self, message, success, operation_type):
         if hasattr(self, 'current_progress_win') and self.current_progress_win and self.current_progress_win.winfo_exists():
@@ -1350,94 +1484,126 @@ class BTViewerApp:
             if success: messagebox.showinfo("Operațiune Finalizată", message, parent=self.master)
             else: messagebox.showerror("Eroare Operațiune", message, parent=self.master)
 
-    def _check_batch_import_progress(self):
+    def _check_parallel_import_progress(self):
+        """Consumă toate mesajele sosite de la loturile în curs și actualizează fereastra de progres."""
         try:
-            msg = self.queue.get_nowait()
-            msg_type = msg[0]
-            
-            if msg_type == "done":
-                operation_type, results = msg[1], msg[2]
-                inserted, ignored = results[0], results[1]
-                
-                batch_info = self.current_batch_info_for_message or {}
-                num_files_in_batch = batch_info.get('num_files', 'N/A')
-                processed_target_id = batch_info.get('target_id')
-                processed_target_name = next((acc['nume_cont'] for acc in self.accounts_list if acc['id_cont'] == processed_target_id), f"ID {processed_target_id}")
-                
-                # --- BLOC FINAL PENTRU SALVARE ISTORIC ---
-                if self.db_handler and inserted > 0: # Salvăm doar dacă s-a importat ceva nou
-                    try:
-                        # Concatenăm numele fișierelor din lot
-                        filenames_str = ", ".join([os.path.basename(f) for f in self.current_batch_files_for_history])
-                        
-                        sql_insert_history = """
-                            INSERT INTO istoric_importuri 
-                            (nume_fisier, tranzactii_procesate, tranzactii_ignorate, id_cont_fk, id_utilizator_fk) 
-                            VALUES (%s, %s, %s, %s, %s)
-                        """
-                        params_history = (filenames_str, inserted, ignored, processed_target_id, self.current_user['id'])
-                        self.db_handler.execute_commit(sql_insert_history, params_history)
-                    except Exception as e_hist:
-                        logging.error(f"Nu s-a putut salva istoricul de import: {e_hist}")
-                # --- SFÂRȘIT BLOC FINAL ---
-
-                if self.db_handler:
-                    log_details = (f"Import în contul '{processed_target_name}'. Fișiere procesate: {num_files_in_batch}. "
-                                   f"Tranzacții noi: {inserted}, Ignorate (duplicate): {ignored}.")
-                    self.db_handler.log_action(self.current_user['id'], self.current_user['username'], "Import fișiere MT940", log_details)
-
-                final_batch_message = (f"Lot pentru contul '{processed_target_name}' finalizat.\n\n"
-                                       f"Fișiere procesate: {num_files_in_batch}\n"
-                                       f"Tranzacții noi importate: {inserted}\n"
-                                       f"Tranzacții ignorate (duplicate): {ignored}")
-                
-                self._finalize_background_task(final_batch_message, success=True, operation_type=operation_type)
-
-                if processed_target_id is not None:
-                    # Dacă lotul procesat a fost pentru un alt cont decât cel activ,
-                    # comutăm pe contul nou importat pentru a vedea direct rezultatele.
-                    if self.active_account_id != processed_target_id:
-                        target_acc_obj = next((acc for acc in self.accounts_list if acc['id_cont'] == processed_target_id), None)
-                        if target_acc_obj:
-                            self._prevent_on_account_selected_trigger = True
-                            self.active_account_id = processed_target_id
-                            self.account_combo_var.set(target_acc_obj['nume_cont'])
-                            config_management.save_app_config(self)
-                            self._prevent_on_account_selected_trigger = False
-                    
-                    # Reîmprospătăm TOATĂ interfața pentru a reflecta noile date
-                    self.refresh_ui_for_account_change()
+            while True:
+                msg = self.queue.get_nowait()
+                if msg[0] == "batch":
+                    self._update_import_batch_row(*msg[1:])
+                elif msg[0] == "done" and msg[1] == "import_parallel":
+                    self._finish_import(msg[2])
+                    return
+                elif msg[0] == "error":
+                    self._finalize_background_task(msg[2], success=False, operation_type="import")
+                    return
+        except Empty:
+            pass
+        except Exception as e:
+            logging.error(f"Eroare CRITICĂ în _check_parallel_import_progress: {type(e).__name__}: {e}", exc_info=True)
 
-                    self._populate_history_tab() # Reîmprospătăm istoricul
-                
-                if self.master.winfo_exists():
-                    self.master.after(100, self._process_next_import_batch)
-            
-            elif msg_type == "progress":
-                if hasattr(self, 'current_progress_win') and self.current_progress_win.winfo_exists():
-                    if hasattr(self, 'current_progress_bar') and self.current_progress_bar.winfo_exists():
+        if self.import_thread and self.import_thread.is_alive():
+            if self.master.winfo_exists(): self.master.after(100, self._check_parallel_import_progress)
+        else:
+            self._toggle_action_buttons('normal')
+
+    def _check_single_import_progress(self):
+        """Consumă mesajele worker-ului de import pentru un singur cont (progres, telemetrie, final)."""
+        try:
+            while True:
+                msg = self.queue.get_nowait()
+                if msg[0] == "progress":
+                    if self.current_progress_win and self.current_progress_win.winfo_exists():
                         self.current_progress_bar['value'] = msg[1] + 1
-                    if hasattr(self, 'current_progress_status_label_widget') and self.current_progress_status_label_widget.winfo_exists():
                         self.current_progress_status_label_widget.config(text=msg[2])
-                if self.master.winfo_exists():
-                    self.master.after(100, self._check_batch_import_progress)
-            
-            elif msg_type == "error":
-                operation_type, error_message = msg[1], msg[2]
-                self._finalize_background_task(error_message, success=False, operation_type=operation_type)
-                if operation_type == 'import_batch': self.import_batch_queue = []
-        
+                elif msg[0] == "stats":
+                    # Telemetria fișierului curent: rânduri/s și timpii pe etape (citire, parsare, DB)
+                    progress_win = self.current_progress_win
+                    if progress_win and progress_win.winfo_exists() and getattr(progress_win, 'stats_label', None):
+                        progress_win.stats_label.config(text=f"{os.path.basename(msg[1]['file'])}: {format_import_stats(msg[1])}")
+                elif msg[0] == "done" and msg[1] == "import_batch":
+                    inserted, ignored, skipped_files, timings = msg[2]
+                    batch = self.current_import_batches[0]
+                    stats = {'inserted': inserted, 'ignored': ignored, 'skipped_files': skipped_files, 'timings': timings}
+                    self._finish_import([dict(batch, stats=stats, error=None)])
+                    return
+                elif msg[0] == "error":
+                    self._finalize_background_task(msg[2], success=False, operation_type="import")
+                    return
         except Empty:
-            if hasattr(self, 'import_thread') and self.import_thread and self.import_thread.is_alive():
-                if self.master.winfo_exists(): self.master.after(100, self._check_batch_import_progress)
-            else:
-                if self.import_batch_queue:
-                    if self.master.winfo_exists(): self.master.after(100, self._process_next_import_batch)
-                else: self._toggle_action_buttons('normal')
-        
+            pass
         except Exception as e:
-            logging.error(f"Eroare CRITICĂ în _check_batch_import_progress: {type(e).__name__}: {e}", exc_info=True)
-    
+            logging.error(f"Eroare CRITICĂ în _check_single_import_progress: {type(e).__name__}: {e}", exc_info=True)
+
+        if self.import_thread and self.import_thread.is_alive():
+            if self.master.winfo_exists(): self.master.after(100, self._check_single_import_progress)
+        else:
+            self._toggle_action_buttons('normal')
+
+    def _update_import_batch_row(self, kind, index, payload):
+        """Actualizează rândul lotului `index` din fereastra de progres, după un eveniment al importului."""
+        progress_win = self.current_progress_win
+        if not (progress_win and progress_win.winfo_exists()):
+            return
+        batch, tree, iid = self.current_import_batches[index], progress_win.tree, str(index)
+        if kind == "start":
+            tree.set(iid, "stare", "În curs...")
+        elif kind == "progress":
+            batch['files_done'] = payload[0]
+            tree.set(iid, "stare", f"[{payload[0] + 1}/{len(batch['files'])}] {payload[1]}")
+        elif kind == "stats":
+            tree.set(iid, "viteza", f"{payload['rows_per_second']:,.0f}".replace(",", "."))
+        elif kind == "done":
+            batch['files_done'] = len(batch['files'])
+            tree.set(iid, "stare", "Finalizat")
+            tree.set(iid, "noi", payload['inserted'])
+            tree.set(iid, "ignorate", payload['ignored'])
+            tree.set(iid, "viteza", f"{payload['timings']['rows_per_second']:,.0f}".replace(",", "."))
+        elif kind == "error":
+            batch['files_done'] = len(batch['files'])
+            tree.set(iid, "stare", f"Eroare: {payload}")
+
+        progress_win.overall_bar['value'] = sum(b['files_done'] for b in self.current_import_batches)
+        finished = sum(1 for b in self.current_import_batches if b['files_done'] == len(b['files']))
+        progress_win.status_label.config(text=f"Loturi finalizate: {finished}/{len(self.current_import_batches)}")
+
+    def _finish_import(self, results):
+        """Jurnalizează loturile, afișează rezumatul și reîmprospătează interfața pentru ultimul cont importat."""
+        summary_lines, failed, last_imported_account_id = [], 0, None
+        for result, batch in zip(results, self.current_import_batches):
+            stats = result['stats']
+            if stats is None:
+                failed += 1
+                summary_lines.append(f"• {batch['name']}: EROARE - {result['error']}")
+                continue
+            last_imported_account_id = result['target_id']
+            skipped_files = stats['skipped_files']
+            if self.db_handler:
+                log_details = (f"Import în contul '{batch['name']}'. Fișiere procesate: {len(result['files'])}. "
+                               f"Tranzacții noi: {stats['inserted']}, Ignorate (duplicate): {stats['ignored']}, "
+                               f"Fișiere deja importate (omise): {len(skipped_files)}.")
+                self.db_handler.log_action(self.current_user['id'], self.current_user['username'], "Import fișiere MT940", log_details)
+            line = f"• {batch['name']}: {stats['inserted']} noi, {stats['ignored']} ignorate"
+            if skipped_files:
+                line += f", {len(skipped_files)} fișier(e) deja importate"
+            summary_lines.append(line)
+
+        elapsed = time.perf_counter() - self.import_started_at
+        message = (f"Import finalizat pentru {len(results)} cont(uri) în {elapsed:.1f} s.\n\n" + "\n".join(summary_lines))
+        if failed:
+            message += (f"\n\n{failed} lot(uri) nu au putut fi importate; celelalte au fost salvate. Loturile confirmate "
+                        "ale fișierelor întrerupte sunt păstrate: importul poate fi continuat din "
+                        "Fișier > Reia Importurile Întrerupte.")
+        self._finalize_background_task(message, success=not failed, operation_type="import")
+
+        if last_imported_account_id is not None:
+            # Comutăm pe ultimul cont importat, pentru a vedea direct rezultatele
+            self.active_account_id = last_imported_account_id
+            save_app_config(self)
+        self._populate_account_selector()
+        self.refresh_ui_for_account_change()
+        self._populate_history_tab()
+
     def _populate_history_tab(self):
         """Populează tab-ul 'Istoric Importuri' cu date din baza de date."""
         if not hasattr(self, 'history_tree') or not self.history_tree.winfo_exists():
@@ -1457,7 +1623,9 @@ class BTViewerApp:
                 h.tranzactii_procesate, 
                 h.tranzactii_ignorate, 
                 c.nume_cont,
-                u.username 
+                u.username,
+                h.durata_ms,
+                h.randuri_pe_secunda
             FROM istoric_importuri h
             JOIN conturi_bancare c ON h.id_cont_fk = c.id_cont
             LEFT JOIN utilizatori u ON h.id_utilizator_fk = u.id
@@ -1477,7 +1645,9 @@ class BTViewerApp:
                     entry.get('username', 'Utilizator Șters'), # Afișăm un text generic dacă utilizatorul a fost șters
                     entry.get('tranzactii_procesate', 0),
                     entry.get('tranzactii_ignorate', 0),
-                    entry.get('nume_cont', 'N/A')
+                    entry.get('nume_cont', 'N/A'),
+                    f"{entry['durata_ms'] / 1000:.2f}" if entry.get('durata_ms') is not None else '',
+                    f"{entry['randuri_pe_secunda']:.0f}" if entry.get('randuri_pe_secunda') is not None else ''
                 )
                 self.history_tree.insert("", "end", values=values)
 
@@ -1581,10 +1751,10 @@ class BTViewerApp:
         sort_dir = 'ASC' if self.sort_direction == 'ASC' else 'DESC'
         query += f" ORDER BY {sort_col_db} {sort_dir}, id ASC"
 
-        all_rows = self.db_handler.fetch_all_dict(query, tuple(params))
-
-        if all_rows:
-            for row_dict in all_rows:
+        # Rândurile sunt citite în flux și inserate pe măsură ce sosesc (conturile cu mulți ani de
+        # tranzacții nu mai sunt aduse integral în memorie înaintea afișării)
+        try:
+            for row_dict in self.db_handler.iter_rows(query, tuple(params)):
                 values = []
                 for col_name in self.treeview_display_columns: 
                     val = row_dict.get(col_name)
@@ -1603,6 +1773,8 @@ class BTViewerApp:
                 if self.tree.winfo_exists():
                     # Presupunand ca 'id' din DB este unic si poate fi folosit ca IID
                     self.tree.insert('', 'end', values=tuple(values), tags=tags_to_apply, iid=row_dict['id'])
+        except pymysql.Error as e:
+            logging.error(f"Eroare SQL la încărcarea tranzacțiilor în tabel: {e}")
         
         self.update_sort_indicator()
         self._update_status_label()
@@ -1846,7 +2018,7 @@ class BTViewerApp:
         query_years = f"SELECT DISTINCT YEAR(data) as an FROM tranzactii WHERE data IS NOT NULL AND id_cont_fk = %s {filter_sql} ORDER BY an DESC"
         params_years = [self.active_account_id] + access_params + visibility_params
         
-        years_data_dicts = self.db_handler.fetch_all_dict(query_years, tuple(params_years))
+        years_data_dicts = self.db_handler.fetch_all_dict(query_years, tuple(params_years), cached=True)
 
         if not years_data_dicts:
             if self.nav_tree.winfo_exists(): self.nav_tree.insert("", "end", text="Nicio tranzacție vizibilă", iid="no_data_root"); return
@@ -1859,7 +2031,7 @@ class BTViewerApp:
             query_count = f"SELECT COUNT(*) FROM tranzactii WHERE YEAR(data) = %s AND id_cont_fk = %s {filter_sql}"
             params_count = [year_val, self.active_account_id] + access_params + visibility_params
             
-            year_tx_count = self.db_handler.fetch_scalar(query_count, tuple(params_count)) or 0
+            year_tx_count = self.db_handler.fetch_scalar(query_count, tuple(params_count), cached=True) or 0
 
             if year_tx_count > 0:
                 year_display_text = f"Anul {year_val} ({year_tx_count} tranzacții)"
@@ -1886,7 +2058,7 @@ class BTViewerApp:
         query_years = f"SELECT DISTINCT YEAR(data) as an FROM tranzactii WHERE data IS NOT NULL AND id_cont_fk = %s {filter_sql} ORDER BY an DESC"
         params_years = [self.active_account_id] + access_params + visibility_params
         
-        years_data_dicts = self.db_handler.fetch_all_dict(query_years, tuple(params_years))
+        years_data_dicts = self.db_handler.fetch_all_dict(query_years, tuple(params_years), cached=True)
 
         if not years_data_dicts:
             if self.nav_tree.winfo_exists(): self.nav_tree.insert("", "end", text="Nicio tranzacție vizibilă", iid="no_data_root"); return
@@ -1898,7 +2070,7 @@ class BTViewerApp:
             query_count = f"SELECT COUNT(*) FROM tranzactii WHERE YEAR(data) = %s AND id_cont_fk = %s {filter_sql}"
             params_count = [year_val, self.active_account_id] + access_params + visibility_params
             
-            year_tx_count = self.db_handler.fetch_scalar(query_count, tuple(params_count)) or 0
+            year_tx_count = self.db_handler.fetch_scalar(query_count, tuple(params_count), cached=True) or 0
 
             if year_tx_count > 0:
                 year_display_text = f"Anul {year_val} ({year_tx_count} tranzacții)"
@@ -1927,12 +2099,12 @@ class BTViewerApp:
                 self.nav_tree.delete(placeholder_iid)
                 query = f"SELECT DISTINCT MONTH(data) as luna FROM tranzactii WHERE YEAR(data) = %s AND id_cont_fk = %s {filter_sql} ORDER BY luna ASC"
                 params = [year_val, self.active_account_id] + access_params + visibility_params
-                months_dicts = self.db_handler.fetch_all_dict(query, tuple(params))
+                months_dicts = self.db_handler.fetch_all_dict(query, tuple(params), cached=True)
                 for month_dict in months_dicts:
                     month_idx = month_dict['luna']
                     query_count = f"SELECT COUNT(*) FROM tranzactii WHERE YEAR(data) = %s AND MONTH(data) = %s AND id_cont_fk = %s {filter_sql}"
                     params_count = [year_val, month_idx, self.active_account_id] + access_params + visibility_params
-                    month_tx_count = self.db_handler.fetch_scalar(query_count, tuple(params_count)) or 0
+                    month_tx_count = self.db_handler.fetch_scalar(query_count, tuple(params_count), cached=True) or 0
                     if month_tx_count > 0:
                         month_name = self.reverse_month_map_for_nav.get(month_idx, f"Luna {month_idx}")
                         month_iid = f"{item_id}_month_{month_idx:02d}"
@@ -1946,12 +2118,12 @@ class BTViewerApp:
                 self.nav_tree.delete(placeholder_iid)
                 query = f"SELECT DISTINCT DAY(data) as zi FROM tranzactii WHERE YEAR(data) = %s AND MONTH(data) = %s AND id_cont_fk = %s {filter_sql} ORDER BY zi ASC"
                 params = [year_val, month_idx, self.active_account_id] + access_params + visibility_params
-                days_dicts = self.db_handler.fetch_all_dict(query, tuple(params))
+                days_dicts = self.db_handler.fetch_all_dict(query, tuple(params), cached=True)
                 for day_dict in days_dicts:
                     day_val = day_dict['zi']
                     query_count_day = f"SELECT COUNT(*) FROM tranzactii WHERE YEAR(data) = %s AND MONTH(data) = %s AND DAY(data) = %s AND id_cont_fk = %s {filter_sql}"
                     params_count_day = [year_val, month_idx, day_val, self.active_account_id] + access_params + visibility_params
-                    day_tx_count = self.db_handler.fetch_scalar(query_count_day, tuple(params_count_day)) or 0
+                    day_tx_count = self.db_handler.fetch_scalar(query_count_day, tuple(params_count_day), cached=True) or 0
                     if day_tx_count > 0:
                         day_display_text = f"    {day_val:02d} ({day_tx_count} tranzacții)"
                         day_iid = f"{item_id}_day_{day_val:02d}"
@@ -2119,7 +2291,7 @@ class BTViewerApp:
                 query += f" AND cod_tranzactie_fk IN ({placeholders})"
                 params.extend(self.visible_tx_codes)
             
-            self.total_transaction_count = self.db_handler.fetch_scalar(query, tuple(params)) or 0
+            self.total_transaction_count = self.db_handler.fetch_scalar(query, tuple(params), cached=True) or 0
         else:
             self.total_transaction_count = 0
         self._update_status_label()
@@ -2130,7 +2302,7 @@ class BTViewerApp:
         min_date_db, max_date_db = None, None
         if self.db_handler and self.db_handler.is_connected() and self.active_account_id:
             query_bounds = "SELECT MIN(data) as min_d, MAX(data) as max_d FROM tranzactii WHERE id_cont_fk = %s"
-            row = self.db_handler.fetch_one_dict(query_bounds, (self.active_account_id,))
+            row = self.db_handler.fetch_one_dict(query_bounds, (self.active_account_id,), cached=True)
             if row: min_date_db, max_date_db = row.get('min_d'), row.get('max_d')
         
         final_start, final_end = (min_date_db or date.today()), (max_date_db or date.today())
@@ -2291,7 +2463,8 @@ class BTViewerApp:
         button_permissions = {
             self.export_button: 'export_data',
             self.email_export_button: 'export_data', # Folosește aceeași permisiune ca exportul standard
-            self.import_button: 'import_files'
+            self.import_button: 'import_files',
+            self.import_preview_button: 'import_files'
         }
 
         for btn, perm_key in button_permissions.items():
@@ -2498,6 +2671,8 @@ class BTViewerApp:
             print(f"EROARE CRITICĂ: Serverul de comenzi al Viewer-ului NU a putut porni: {e}")
 
 if __name__ == "__main__":
+    # Necesar pentru ProcessPoolExecutor (parsarea paralelă a extraselor) în executabilul compilat
+    multiprocessing.freeze_support()
     try:
         lock_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         lock_socket.bind(("127.0.0.1", VIEWER_LOCK_PORT))
@@ -2524,6 +2699,7 @@ if __name__ == "__main__":
             
             # Abia apoi încercăm să extragem datele
                 db_credentials_main = read_db_config_from_parser(config)
+            configure_query_timing(read_performance_config_from_parser(config))
             
             db_handler_main = DatabaseHandler(db_credentials=db_credentials_main, app_master_ref=temp_root_main)
 
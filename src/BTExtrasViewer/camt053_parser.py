@@ -0,0 +1,283 @@
+# src/BTExtrasViewer/camt053_parser.py
+"""
+Parsarea extraselor CAMT.053 (ISO 20022, BankToCustomerStatement) în flux.
+
+Documentul este citit incremental cu ElementTree.iterparse: fiecare <Ntry> este transformat
+în aceeași structură de tranzacție ca la MT940 (vezi mt940_parser.parse_tx_record), apoi
+este golit și scos din arbore, deci memoria rămâne constantă și pentru fișiere de sute de MB.
+Tranzacțiile trec apoi prin aceleași etape de deduplicare și inserare ca extrasele MT940.
+
+Soldurile (<Bal> OPBD/PRCD și CLBD) preced intrările în schema CAMT.053, astfel încât soldul
+de după fiecare tranzacție este calculat pe loc, fără a păstra extrasul în memorie.
+Sunt acceptate versiunile camt.053.001.02 - .08 (tag-urile sunt comparate fără namespace).
+"""
+import os
+import time
+import xml.etree.ElementTree as ET
+from datetime import date
+
+from BTExtrasViewer.mt940_parser import (
+    READ_BLOCK_SIZE, _add_timing, _new_statement_context, extract_description_fields, summarize_statement
+)
+
+# Sold de deschidere (OPBD, sau PRCD - soldul final al extrasului anterior) și de închidere (CLBD)
+OPENING_BALANCE_CODES = ("OPBD", "PRCD")
+CLOSING_BALANCE_CODES = ("CLBD",)
+
+# Codurile ISO (familie / subfamilie din <BkTxCd><Domn>) -> codul de tranzacție SWIFT (4 caractere)
+# folosit în tipuri_tranzactii; codul proprietar al băncii (<Prtry><Cd>) are prioritate când are 4 litere.
+BANK_TX_SUBFAMILY_CODES = {
+    "CHRG": "NCHG", "COMM": "NCOM", "FEES": "NCOM", "INTR": "NINT", "CWDL": "NCSH", "CDPT": "NCSH",
+    "POSD": "NCAR", "POSC": "NCAR", "SALA": "NSAL", "TAXS": "NTAX",
+}
+BANK_TX_FAMILY_CODES = {
+    "RCDT": "NTRF", "ICDT": "NTRF", "RDDT": "NDDT", "IDDT": "NDDT", "CCRD": "NCAR", "RCHQ": "NCHK",
+    "ICHQ": "NCHK", "CNTR": "NCSH", "CASH": "NCSH", "MCOP": "NMSC",
+}
+DEFAULT_TX_CODE = "NMSC"
+
+
+class _TimedReader:
+    """Fișier citit pe blocuri, cu timpul citirilor adăugat la etapa 'read' (ca la MT940)."""
+
+    def __init__(self, f, timings):
+        self.f = f
+        self.timings = timings
+
+    def read(self, size=READ_BLOCK_SIZE):
+        started = time.perf_counter()
+        data = self.f.read(size if size and size > 0 else READ_BLOCK_SIZE)
+        _add_timing(self.timings, "read", time.perf_counter() - started)
+        return data
+
+
+def is_camt053_file(file_path, sniff_bytes=1024):
+    """True dacă fișierul este un document XML CAMT.053 (după primii octeți, nu după extensie)."""
+    try:
+        with open(file_path, "rb") as f:
+            head = f.read(sniff_bytes)
+    except OSError:
+        return False
+    head = head.lstrip(b"\xef\xbb\xbf \t\r\n")
+    return head.startswith(b"<") and (b"camt.053" in head or b"BkToCstmrStmt" in head)
+
+
+def _text(elem, path):
+    child = elem.find(path)
+    return child.text.strip() if child is not None and child.text else None
+
+
+def _parse_iso_date(value):
+    # "2025-01-31" sau "2025-01-31T23:59:59+02:00" (<Dt> / <DtTm>)
+    return date(int(value[0:4]), int(value[5:7]), int(value[8:10])) if value else None
+
+
+def _amount_to_cents(amount_str):
+    units, _, fraction = amount_str.strip().partition('.')
+    return int(units or 0) * 100 + int((fraction + "00")[:2])
+
+
+def _element_date(elem):
+    return _parse_iso_date(_text(elem, "Dt") or _text(elem, "DtTm"))
+
+
+def parse_balance_element(bal):
+    """Un element <Bal> -> (cod tip, {'date', 'currency', 'cents'}) cu suma cu semn (debit negativ)."""
+    code = _text(bal, "Tp/CdOrPrtry/Cd") or _text(bal, "Tp/CdOrPrtry/Prtry")
+    amount = bal.find("Amt")
+    if amount is None or not amount.text:
+        return code, None
+    cents = _amount_to_cents(amount.text)
+    if _text(bal, "CdtDbtInd") == "DBIT":
+        cents = -cents
+    dt = bal.find("Dt")
+    return code, {"date": _element_date(dt) if dt is not None else None, "currency": amount.get("Ccy"), "cents": cents}
+
+
+def bank_transaction_code(ntry):
+    """Codul de tranzacție (4 caractere) al unei intrări, din <BkTxCd>."""
+    proprietary = _text(ntry, "BkTxCd/Prtry/Cd")
+    if proprietary and len(proprietary) == 4 and proprietary.isalpha():
+        return proprietary.upper()
+    family = ntry.find("BkTxCd/Domn/Fmly")
+    if family is not None:
+        return (BANK_TX_SUBFAMILY_CODES.get(_text(family, "SubFmlyCd"))
+                or BANK_TX_FAMILY_CODES.get(_text(family, "Cd")) or DEFAULT_TX_CODE)
+    return DEFAULT_TX_CODE
+
+
+def parse_entry(ntry):
+    """
+    Transformă un element <Ntry> într-un dicționar cu valorile coloanelor din 'tranzactii' (aceleași chei
+    ca mt940_parser.parse_tx_record). Returnează None pentru intrările neînregistrate (PDNG/INFO) sau fără sumă.
+    """
+    status = _text(ntry, "Sts/Cd") or _text(ntry, "Sts")
+    if status and status != "BOOK":
+        return None
+    amount = _text(ntry, "Amt")
+    booking = ntry.find("BookgDt")
+    if booking is None:
+        booking = ntry.find("ValDt")
+    if not amount or booking is None:
+        return None
+
+    credit = _text(ntry, "CdtDbtInd") == "CRDT"
+    details = ntry.find("NtryDtls/TxDtls")
+    # Descrierea este compusă ca textul unui :86: (informații adiționale, remitere, contrapartidă),
+    # ca extragerea câmpurilor cu etichetă (CIF, factură, TID, RRN etc.) să funcționeze la fel.
+    parts = [_text(ntry, "AddtlNtryInf")]
+    counterparty = None
+    if details is not None:
+        parts.extend(line.text.strip() for line in details.iterfind("RmtInf/Ustrd") if line.text)
+        counterparty = _text(details, "RltdPties/Dbtr/Nm" if credit else "RltdPties/Cdtr/Nm") \
+            or _text(details, "RltdPties/Dbtr/Pty/Nm" if credit else "RltdPties/Cdtr/Pty/Nm")
+        parts.extend((counterparty, _text(details, "AddtlTxInf")))
+    description = " ".join(dict.fromkeys(part for part in parts if part))
+
+    tx = {
+        "data": _element_date(booking),
+        "suma": _amount_to_cents(amount) / 100,
+        "tip": "credit" if credit else "debit",
+        "cod_tranzactie": bank_transaction_code(ntry),
+        "descriere": description,
+    }
+    tx.update(extract_description_fields(description))
+    if counterparty:
+        tx["beneficiar"] = counterparty[:255]
+    return tx
+
+
+def _iterparse_checked(source, file_path):
+    """ET.iterparse cu ParseError transformat în ValueError, cu numele fișierului în mesaj."""
+    events = ET.iterparse(source, events=("start", "end"))
+    while True:
+        try:
+            item = next(events)
+        except StopIteration:
+            return
+        except ET.ParseError as e:
+            raise ValueError(f"Fișier CAMT.053 invalid ({os.path.basename(file_path)}): {e}") from e
+        yield item
+
+
+def _iter_statement_events(file_path, timings=None):
+    """
+    Parcurge documentul și returnează evenimente ('statement', context), ('balance', (cod, sold)),
+    ('entry', element <Ntry> complet) și ('end', context). După fiecare eveniment 'entry'
+    elementul este golit și scos din <Stmt>, iar <Stmt> este scos din document la final.
+    Un document XML malformat (ex. trunchiat) ridică ValueError, ca orice extras invalid.
+    """
+    with open(file_path, "rb") as raw:
+        source = _TimedReader(raw, timings) if timings is not None else raw
+        ancestors, context = [], None
+        for event, elem in _iterparse_checked(source, file_path):
+            if event == "start":
+                elem.tag = elem.tag.rpartition("}")[2]  # fără namespace (camt.053.001.xx)
+                ancestors.append(elem)
+                if elem.tag == "Stmt":
+                    context = _new_statement_context()
+                    yield "statement", context
+                continue
+
+            ancestors.pop()
+            tag, parent = elem.tag, (ancestors[-1] if ancestors else None)
+            if parent is not None and parent.tag == "Stmt":
+                if tag == "Ntry":
+                    yield "entry", elem
+                    elem.clear()
+                    parent.remove(elem)
+                elif tag == "Bal":
+                    yield "balance", parse_balance_element(elem)
+                elif tag == "Id":
+                    context["reference"] = (elem.text or "").strip() or None
+                elif tag in ("ElctrncSeqNb", "LglSeqNb") and not context["statement_no"]:
+                    context["statement_no"] = (elem.text or "").strip() or None
+                elif tag == "Acct":
+                    context["account"] = _text(elem, "Id/IBAN") or _text(elem, "Id/Othr/Id")
+            elif tag == "Stmt":
+                yield "end", context
+                elem.clear()
+                if parent is not None:
+                    parent.remove(elem)
+
+
+def iter_parsed_transactions(file_path, timings=None, statements=None):
+    """
+    Generator cu tranzacțiile parsate dintr-un fișier CAMT.053, cu aceeași interfață ca
+    mt940_parser.iter_parsed_transactions: soldurile sunt completate pe fiecare tranzacție,
+    `statements` primește rezumatul fiecărui <Stmt>, iar `timings` etapele 'read',
+    'tokenize' (parsarea XML) și 'extract' (conversia intrărilor și calculul soldurilor).
+    """
+    clock = time.perf_counter
+    read_before = timings.get("read", 0.0) if timings is not None else 0.0
+    events = _iter_statement_events(file_path, timings)
+    parse_and_read, extract = 0.0, 0.0
+    opening = closing = running = None
+    count = 0
+    try:
+        while True:
+            started = clock()
+            item = next(events, None)
+            parsed = clock()
+            parse_and_read += parsed - started
+            if item is None:
+                break
+            kind, payload = item
+            if kind == "statement":
+                opening = closing = running = None
+                count = 0
+            elif kind == "balance":
+                code, balance = payload
+                if code in OPENING_BALANCE_CODES and opening is None:
+                    opening = balance
+                    running = balance["cents"] if balance else None
+                elif code in CLOSING_BALANCE_CODES:
+                    closing = balance
+            elif kind == "entry":
+                tx = parse_entry(payload)
+                if tx is not None:
+                    count += 1
+                    if running is not None:
+                        running += round(tx["suma"] * 100) if tx["tip"] == "credit" else -round(tx["suma"] * 100)
+                    tx["sold_initial"] = opening["cents"] / 100 if opening else None
+                    tx["sold_final"] = closing["cents"] / 100 if closing else None
+                    tx["sold_dupa_tranzactie"] = running / 100 if running is not None else None
+                extract += clock() - parsed
+                if tx is not None:
+                    yield tx
+            elif kind == "end":
+                if statements is not None and count:
+                    statements.append(summarize_statement(payload, opening, closing, running, count))
+                extract += clock() - parsed
+    finally:
+        if timings is not None:
+            _add_timing(timings, "extract", extract)
+            _add_timing(timings, "tokenize", parse_and_read - extract - (timings.get("read", 0.0) - read_before))
+
+
+def parse_statement_file_with_info(file_path):
+    """Ca mt940_parser.parse_statement_file_with_info, pentru CAMT.053 (punct de intrare pentru procesele din pool)."""
+    info = {"timings": {}, "statements": []}
+    transactions = list(iter_parsed_transactions(file_path, info["timings"], info["statements"]))
+    return transactions, info
+
+
+def read_statement_header(file_path):
+    """
+    Contextul primului extras (referință, număr, cont) citind doar până la prima intrare <Ntry>.
+    Returnează None dacă documentul nu conține niciun <Stmt>.
+    """
+    context = None
+    for kind, payload in _iter_statement_events(file_path):
+        if kind == "statement":
+            context = payload
+        elif kind in ("entry", "end"):
+            break
+    return context
+
+
+def read_statement_reference(file_path):
+    """Referința extrasului, ca la MT940: "<Id>/<ElctrncSeqNb>" (sau None)."""
+    context = read_statement_header(file_path) or {}
+    parts = [part for part in (context.get("reference"), context.get("statement_no")) if part]
+    return "/".join(parts) if parts else None
@@ -1,93 +1,34 @@
 # file_processing.py
 import os
 import logging
-import re
 import tkinter as tk # Necesare pentru create_progress_window
 from tkinter import ttk # Necesare pentru create_progress_window
 # Nu este nevoie de messagebox aici, este folosit în main app
 import pandas as pd
 from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
 from openpyxl.utils import get_column_letter
-import threading
-from queue import Queue, Empty # Queue este folosit, Empty nu neapărat direct de utilizator
-from datetime import datetime
 import pymysql
-from sqlalchemy import create_engine
 import io
 
+from BTExtrasViewer.import_engine import (
+    IMPORT_CHUNK_SIZE, IMPORT_MAX_PARSE_WORKERS, IMPORT_MAX_PARALLEL_BATCHES, connect_import_database,
+    run_import_batch, run_parallel_import_batches, preview_import_batch
+)
+from BTExtrasViewer.parse_cache import default_parse_cache
+from pymysql.cursors import SSCursor
+from common.db_pool import STREAM_BATCH_SIZE, get_connection_pool, streaming_cursor
 
-# Expresii regulate
-RE_IBAN_EXTRACT = re.compile(r"([A-Z]{2}[0-9]{2}[A-Z0-9]{11,30})")
-RE_CIF = re.compile(r"C\.I\.F\.?:\s?(\d+)")
-RE_FACTURA = re.compile(r"(?:FACT(?:URA)?(?: NR)?(?:\.|:)?\s*|F\.\s*)(\w+)")
-RE_BENEFICIAR = re.compile(r"\b([A-Z][A-Z\s.\-0-9&]{5,})\b")
-RE_TID = re.compile(r"TID:?\s?(\S+)")
-RE_RRN = re.compile(r"RRN:?\s?(\S+)")
-RE_PAN = re.compile(r"PAN:?\s?(\S+)")
-RE_MID = re.compile(r"MID\s*(\d+)")  # Merchant ID pentru tranzacții POS grupate (BT feb 2026)
-
-def extract_iban_from_mt940(file_path):
+def create_progress_window(master_ref, title, message, show_stats=False):
     """
-    Extrage IBAN-ul din câmpul :25: dintr-un fișier MT940.
-    Funcția este acum mai robustă și citește linie cu linie.
-    Returnează IBAN-ul ca string (litere mari) sau None.
+    Fereastra modală de progres. Cu `show_stats=True` are și o etichetă pentru telemetria
+    importului (rânduri/s, timpi pe etape), disponibilă ca `progress_win.stats_label`.
     """
-    logging.debug(f"DEBUG_EXTRACT_IBAN: Se procesează fișierul (versiune îmbunătățită): {file_path}")
-    iban_candidate_line_content = None
-    try:
-        with open(file_path, "r", encoding="utf-8", errors="replace") as f:
-            for line_num, line_text in enumerate(f):
-                stripped_line = line_text.strip()
-                if stripped_line.startswith(":25:"):
-                    iban_candidate_line_content = stripped_line[4:].strip() # Preluăm conținutul de după :25:
-                    logging.debug(f"DEBUG_EXTRACT_IBAN: Linia :25: găsită (linia {line_num + 1}): '{iban_candidate_line_content}'")
-                    break # Am găsit primul tag :25:, ne oprim
-            else: # Se execută dacă bucla for s-a terminat fără 'break'
-                logging.debug(f"DEBUG_EXTRACT_IBAN: Tag-ul :25: nu a fost găsit în fișierul {os.path.basename(file_path)}")
-                return None
-
-        if iban_candidate_line_content:
-            potential_iban_part = iban_candidate_line_content
-            # Eliminăm orice prefix de tipul "COD BANCA/" sau similar, dacă există
-            if '/' in potential_iban_part:
-                potential_iban_part = potential_iban_part.split('/')[-1].strip()
-                logging.debug(f"DEBUG_EXTRACT_IBAN: Parte după '/' selectată: '{potential_iban_part}'")
-            
-            # Eliminăm orice caractere non-alfanumerice, cu excepția literelor și cifrelor
-            # (IBAN-urile standard conțin doar litere și cifre)
-            cleaned_potential_iban = re.sub(r'[^A-Z0-9]', '', potential_iban_part.upper())
-            logging.debug(f"DEBUG_EXTRACT_IBAN: IBAN curățat și uppercase: '{cleaned_potential_iban}'")
-
-            # Aplicăm regex-ul pentru a valida și extrage formatul IBAN
-            iban_match = RE_IBAN_EXTRACT.fullmatch(cleaned_potential_iban) # Folosim fullmatch pentru a valida întregul string curățat
-            if iban_match:
-                extracted_iban = iban_match.group(1) # grupul 1 este întregul IBAN potrivit
-                logging.debug(f"DEBUG_EXTRACT_IBAN: IBAN extras și validat prin fullmatch: {extracted_iban}")
-                return extracted_iban
-            else:
-                logging.debug(f"DEBUG_EXTRACT_IBAN: IBAN-ul curățat '{cleaned_potential_iban}' nu corespunde formatului așteptat de RE_IBAN_EXTRACT.")
-                # Ca o ultimă încercare, dacă regex-ul e prea strict, dar stringul arată a IBAN
-                if 15 <= len(cleaned_potential_iban) <= 34 and cleaned_potential_iban[:2].isalpha() and cleaned_potential_iban[2:4].isdigit():
-                    logging.debug(f"DEBUG_EXTRACT_IBAN: IBAN-ul curățat trece validarea de bază. Se returnează: {cleaned_potential_iban}")
-                    return cleaned_potential_iban
-
-            logging.debug(f"DEBUG_EXTRACT_IBAN: Nu s-a găsit un IBAN valid în conținutul liniei :25: ('{iban_candidate_line_content}')")
-            return None
-        else:
-            # Acest caz este acoperit de for-else de mai sus, dar lăsăm pentru claritate
-            logging.debug(f"DEBUG_EXTRACT_IBAN: Conținutul liniei :25: este gol după extragere (improbabil dacă tag-ul a fost găsit).")
-            return None
-
-    except Exception as e:
-        logging.debug(f"DEBUG_EXTRACT_IBAN: Eroare la extragerea IBAN-ului din {os.path.basename(file_path)}: {e}")
-        return None
-
-def create_progress_window(master_ref, title, message):
+    win_w, win_h = (400, 170) if show_stats else (400, 120)
     progress_win = tk.Toplevel(master_ref)
     progress_win.title(title)
     progress_win.transient(master_ref)
     progress_win.grab_set()
-    progress_win.geometry("400x120")
+    progress_win.geometry(f"{win_w}x{win_h}")
     progress_win.resizable(False, False)
 
     ttk.Label(progress_win, text=message, wraplength=380).pack(pady=10)
@@ -95,111 +36,90 @@ def create_progress_window(master_ref, title, message):
     progress_status_label_widget.pack(pady=(0, 5), fill=tk.X, padx=10)
     progress_bar_widget = ttk.Progressbar(progress_win, orient='horizontal', length=380, mode='determinate')
     progress_bar_widget.pack(pady=5)
+    progress_win.stats_label = None
+    if show_stats:
+        progress_win.stats_label = ttk.Label(progress_win, text="", foreground="gray30", justify=tk.LEFT, wraplength=380)
+        progress_win.stats_label.pack(pady=(0, 5), fill=tk.X, padx=10)
     
     master_x = master_ref.winfo_x()
     master_y = master_ref.winfo_y()
     master_w = master_ref.winfo_width()
     master_h = master_ref.winfo_height()
-    win_w, win_h = 400, 120
     x = master_x + (master_w - win_w) // 2
     y = master_y + (master_h - win_h) // 2
     progress_win.geometry(f"+{x}+{y}")
 
     return progress_win, progress_bar_widget, progress_status_label_widget
 
-def threaded_import_worker(app_instance, file_paths, q_ref, active_account_id_for_import, db_credentials):
+
+BATCH_PROGRESS_COLUMNS = (
+    ("cont", "Cont", 170), ("fisiere", "Fișiere", 70), ("stare", "Stare", 190),
+    ("noi", "Noi", 70), ("ignorate", "Ignorate", 70), ("viteza", "Rânduri/s", 80),
+)
+
+def create_batch_progress_window(master_ref, title, batch_rows):
+    """
+    Fereastra de progres comună pentru loturile importate în paralel: câte un rând per cont
+    (iid = indexul lotului) în `progress_win.tree`, plus bara totală pe fișiere (`progress_win.overall_bar`)
+    și o etichetă de stare generală (`progress_win.status_label`).
+    `batch_rows` este o listă de tupluri (nume cont, număr de fișiere), în ordinea loturilor.
+    """
+    win_w, win_h = 700, min(160 + 24 * len(batch_rows), 520)
+    progress_win = tk.Toplevel(master_ref)
+    progress_win.title(title)
+    progress_win.transient(master_ref)
+    progress_win.grab_set()
+    progress_win.geometry(f"{win_w}x{win_h}")
+
+    tree_frame = ttk.Frame(progress_win)
+    tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 5))
+    tree = ttk.Treeview(tree_frame, columns=[col for col, _, _ in BATCH_PROGRESS_COLUMNS], show='headings',
+                        height=min(len(batch_rows), 14))
+    for col, heading, width in BATCH_PROGRESS_COLUMNS:
+        tree.heading(col, text=heading)
+        tree.column(col, width=width, anchor=tk.W if col in ("cont", "stare") else tk.E)
+    scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=tree.yview)
+    tree.configure(yscrollcommand=scrollbar.set)
+    tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    for index, (account_name, file_count) in enumerate(batch_rows):
+        tree.insert('', tk.END, iid=str(index), values=(account_name, file_count, "În așteptare", "", "", ""))
+
+    progress_win.status_label = ttk.Label(progress_win, text="Inițializare...")
+    progress_win.status_label.pack(fill=tk.X, padx=10)
+    progress_win.overall_bar = ttk.Progressbar(progress_win, orient='horizontal', mode='determinate',
+                                               maximum=max(1, sum(count for _, count in batch_rows)))
+    progress_win.overall_bar.pack(fill=tk.X, padx=10, pady=(5, 10))
+    progress_win.tree = tree
+
+    x = master_ref.winfo_x() + (master_ref.winfo_width() - win_w) // 2
+    y = master_ref.winfo_y() + (master_ref.winfo_height() - win_h) // 2
+    progress_win.geometry(f"+{x}+{y}")
+    return progress_win
+
+
+def threaded_import_worker(app_instance, file_paths, q_ref, active_account_id_for_import, db_credentials,
+                           chunk_size=IMPORT_CHUNK_SIZE, max_parse_workers=IMPORT_MAX_PARSE_WORKERS, user_id=None):
     logging.debug(f"DEBUG_THREAD: Pornit threaded_import_worker. Cont țintă ID: {active_account_id_for_import}")
-    inserted, ignored = 0, 0
     thread_conn_local = None
     try:
-        # === AICI ESTE SINGURA MODIFICARE LOGICĂ ===
-        # Am eliminat dependența de `app_instance` și folosim direct `db_credentials`.
+        # Worker-ul folosește direct `db_credentials` (nu `app_instance`), iar logica de import
+        # este cea comună cu importul din linia de comandă (import_engine.run_import_batch).
         if not db_credentials:
             raise ConnectionError("Credentialele DB nu au fost furnizate worker-ului de import.")
 
         if active_account_id_for_import is None:
             raise ValueError("ID-ul contului activ nu a fost furnizat pentru import.")
 
-        # Construim parametrii de conexiune din dicționarul primit
-        conn_params = db_credentials.copy()
-        conn_params['db'] = conn_params.pop('database', None)
-        conn_params['passwd'] = conn_params.pop('password', None)
-        conn_params['charset'] = 'utf8mb4'
-        
-        # Ne conectăm folosind parametrii locali
-        thread_conn_local = pymysql.connect(**conn_params)
-        cursor = thread_conn_local.cursor()
-        # === SFÂRȘITUL MODIFICĂRII LOGICE. RESTUL CODULUI ESTE IDENTIC CU ORIGINALUL. ===
-
-        for i, file_path in enumerate(file_paths):
-            q_ref.put(("progress", i, f"Procesare: {os.path.basename(file_path)}"))
-            
-            with open(file_path, "r", encoding="utf-8", errors="replace") as f:
-                content = f.read()
-
-            cursor.execute("SELECT cod FROM tipuri_tranzactii")
-            known_tx_types = {row[0] for row in cursor.fetchall()}
-            
-            potential_new_tx_codes = set(re.findall(r":61:\d+[CD][\d,]+([A-Z]{4})", content))
-            new_codes_to_add = potential_new_tx_codes - known_tx_types
-            
-            if new_codes_to_add:
-                cursor.execute("SELECT cod_swift, descriere_standard FROM swift_code_descriptions")
-                swift_descriptions = {row[0]: row[1] for row in cursor.fetchall()}
-
-                for new_code in new_codes_to_add:
-                    description = swift_descriptions.get(new_code, f"Tip nou, cod: {new_code}")
-                    cursor.execute("INSERT INTO tipuri_tranzactii (cod, descriere_tip) VALUES (%s, %s)", (new_code, description))
-                
-                thread_conn_local.commit()
-
-            transactions = re.findall(r"(:61:.*?)(?=(:61:|$))", content, re.DOTALL)
-            
-            for tx_block, _ in transactions:
-                match61 = re.search(r":61:(\d{6})(?:\d{4})?([CD])([\d,]+)([A-Z]{4})", tx_block)
-                if not match61: continue
-
-                date_str, type_char, amount_str, tx_code_full = match61.groups()
-                amount = float(amount_str.replace(',', '.'))
-                tx_type = "credit" if type_char == 'C' else "debit"
-                date_obj = datetime.strptime(date_str, '%y%m%d').date()
-                
-                match86 = re.search(r":86:(.*?)$", tx_block, re.DOTALL)
-                full_descr = match86.group(1).strip().replace('\n', ' ') if match86 else ""
-
-                cif_match = RE_CIF.search(full_descr)
-                beneficiar_match = RE_BENEFICIAR.search(full_descr)
-                factura_match = RE_FACTURA.search(full_descr)
-                tid_match = RE_TID.search(full_descr)
-                rrn_match = RE_RRN.search(full_descr)
-                pan_match = RE_PAN.search(full_descr)
-                mid_match = RE_MID.search(full_descr)
-
-                cif_val = cif_match.group(1).strip() if cif_match else None
-                beneficiar_val = beneficiar_match.group(1).strip() if beneficiar_match else None
-                factura_val = factura_match.group(1).strip() if factura_match else None
-                tid_val = tid_match.group(1).strip() if tid_match else None
-                rrn_val = rrn_match.group(1).strip() if rrn_match else None
-                pan_val = pan_match.group(1).strip() if pan_match else None
-                mid_val = mid_match.group(1).strip() if mid_match else None
-
-                cursor.execute("SELECT 1 FROM tranzactii WHERE data=%s AND suma=%s AND tip=%s AND descriere=%s AND id_cont_fk=%s",
-                               (date_obj.strftime('%Y-%m-%d'), amount, tx_type, full_descr, active_account_id_for_import))
-                if not cursor.fetchone():
-                    sql_insert = ("INSERT INTO tranzactii (id_cont_fk, data, descriere, suma, tip, cod_tranzactie_fk, cif, beneficiar, factura, tid, rrn, pan, mid) "
-                                  "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)")
-                    values = (active_account_id_for_import, date_obj.strftime('%Y-%m-%d'), full_descr, amount,
-                              tx_type, tx_code_full, cif_val, beneficiar_val, factura_val, tid_val, rrn_val, pan_val, mid_val)
-                    cursor.execute(sql_insert, values)
-                    inserted += 1
-                else:
-                    ignored += 1
-
-        if inserted > 0:
-            thread_conn_local.commit()
-        
-        cursor.close()
-        q_ref.put(("done", "import_batch", (inserted, ignored)))
+        thread_conn_local = connect_import_database(db_credentials)
+        stats = run_import_batch(
+            thread_conn_local, file_paths, active_account_id_for_import, chunk_size=chunk_size,
+            max_parse_workers=max_parse_workers, user_id=user_id,
+            progress=lambda index, text: q_ref.put(("progress", index, text)),
+            on_stats=lambda file_stats: q_ref.put(("stats", file_stats)),
+            parse_cache=default_parse_cache()
+        )
+        q_ref.put(("done", "import_batch", (stats['inserted'], stats['ignored'], stats['skipped_files'], stats['timings'])))
 
     except pymysql.Error as e:
         error_message = f"O eroare DB a apărut în timpul importului:\n{type(e).__name__}: {e}"
@@ -216,26 +136,86 @@ def threaded_import_worker(app_instance, file_paths, q_ref, active_account_id_fo
             except: pass
         q_ref.put(("error", "import_batch", error_message))
     finally:
-        if thread_conn_local and thread_conn_local.open:
-            thread_conn_local.close()
+        if thread_conn_local:
+            thread_conn_local.close()  # returnează conexiunea în pool
+
+
+def threaded_parallel_import_worker(batches, q_ref, db_credentials, max_parallel=IMPORT_MAX_PARALLEL_BATCHES, user_id=None):
+    """
+    Importă loturile pe conturi ({'target_id', 'files'}) în paralel (vezi import_engine.run_parallel_import_batches).
+    Evenimentele fiecărui lot ajung în coadă ca ("batch", tip, index lot, date), iar la final
+    ("done", "import_parallel", rezultate) sau ("error", "import_parallel", mesaj).
+    """
+    try:
+        if not db_credentials:
+            raise ConnectionError("Credentialele DB nu au fost furnizate worker-ului de import.")
+        results = run_parallel_import_batches(
+            db_credentials, batches, max_parallel=max_parallel, user_id=user_id, parse_cache=default_parse_cache(),
+            on_event=lambda kind, index, payload: q_ref.put(("batch", kind, index, payload))
+        )
+        q_ref.put(("done", "import_parallel", results))
+    except Exception as e:
+        logging.error(f"EROARE CRITICĂ ÎN THREAD-UL DE IMPORT PARALEL: {e}", exc_info=True)
+        q_ref.put(("error", "import_parallel", f"O eroare generală a apărut în timpul importului:\n{type(e).__name__}: {e}"))
+
+
+def threaded_import_preview_worker(batches, q_ref, db_credentials):
+    """
+    Previzualizarea importului (fără scrieri în baza de date) pentru loturile pe conturi ({'target_id', 'files'}).
+    Trimite ("progress", index fișier, text) și la final ("done", "import_preview", rezultate), unde
+    rezultatele sunt, în ordinea loturilor, cele ale import_engine.preview_import_batch.
+    """
+    connection = None
+    try:
+        connection = connect_import_database(db_credentials)
+        parse_cache = default_parse_cache()
+        results, files_before = [], 0
+        for batch in batches:
+            results.append(preview_import_batch(
+                connection, batch['files'], batch['target_id'], parse_cache=parse_cache,
+                progress=lambda index, text, offset=files_before: q_ref.put(("progress", offset + index, text))
+            ))
+            files_before += len(batch['files'])
+        q_ref.put(("done", "import_preview", results))
+    except Exception as e:
+        logging.error(f"EROARE ÎN THREAD-UL DE PREVIZUALIZARE IMPORT: {e}", exc_info=True)
+        q_ref.put(("error", "import_preview", f"Previzualizarea importului a eșuat:\n{type(e).__name__}: {e}"))
+    finally:
+        if connection:
+            connection.close()
+
+
+def read_query_dataframe(db_credentials, query_str, query_params, batch_size=STREAM_BATCH_SIZE):
+    """
+    Rezultatul interogării ca DataFrame, pe o conexiune împrumutată din pool-ul comun
+    (fără o conexiune și un handshake noi pentru fiecare export).
+    Rândurile sunt citite în flux (SSCursor) și convertite câte `batch_size`, deci lista completă
+    de tupluri nu mai este ținută în memorie alături de DataFrame.
+    Valorile Decimal sunt convertite în float, ca la pd.read_sql_query.
+    """
+    frames = []
+    with get_connection_pool(db_credentials).connection() as conn, streaming_cursor(conn, SSCursor) as cursor:
+        cursor.execute(query_str, query_params or ())
+        columns = [column[0] for column in cursor.description]
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            frames.append(pd.DataFrame.from_records(rows, columns=columns, coerce_float=True))
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
 
 def threaded_export_worker(app_instance, query_str, query_params, file_path_export, q_ref):
     """
     Funcția executată în thread pentru exportul în Excel.
     Versiune finală cu formatare profesională și corecție pentru NameError.
     """
-    engine = None
     try:
         db_creds = app_instance.db_handler.db_credentials
-        
-        db_uri = (
-            f"mysql+pymysql://{db_creds['user']}:{db_creds['password']}"
-            f"@{db_creds['host']}:{db_creds['port']}/{db_creds['database']}?charset=utf8mb4"
-        )
-        engine = create_engine(db_uri)
 
         q_ref.put(("status", "Se preiau datele din baza de date..."))
-        df = pd.read_sql_query(query_str, engine, params=query_params)
+        df = read_query_dataframe(db_creds, query_str, query_params)
         df.fillna('', inplace=True)
 
         if 'data' in df.columns:
@@ -322,24 +302,14 @@ def threaded_export_worker(app_instance, query_str, query_params, file_path_expo
     except Exception as e_export:
         logging.error(f"EROARE EXPORT EXCEL: {e_export}", exc_info=True)
         q_ref.put(("error", "export", f"Eroare la exportul în Excel:\n{e_export}"))
-    finally:
-        if engine:
-            engine.dispose()
 
 def threaded_export_to_memory_worker(db_credentials, query_str, query_params):
     """
     Funcție nouă, adaptată. Generează un fișier Excel în memorie.
     Returnează un tuplu: (success: bool, result: BytesIO sau str).
     """
-    engine = None
     try:
-        db_uri = (
-            f"mysql+pymysql://{db_credentials['user']}:{db_credentials['password']}"
-            f"@{db_credentials['host']}:{db_credentials['port']}/{db_credentials['database']}?charset=utf8mb4"
-        )
-        engine = create_engine(db_uri)
-
-        df = pd.read_sql_query(query_str, engine, params=query_params)
+        df = read_query_dataframe(db_credentials, query_str, query_params)
         df.fillna('', inplace=True)
 
         if 'data' in df.columns:
@@ -406,6 +376,4 @@ def threaded_export_to_memory_worker(db_credentials, query_str, query_params):
 
     except Exception as e:
         logging.error(f"EROARE la generarea Excel în memorie: {e}", exc_info=True)
-        return False, f"Eroare la generarea fișierului Excel:\n{e}"
-    finally:
-        if engine: engine.dispose()
\ No newline at end of file
+        return False, f"Eroare la generarea fișierului Excel:\n{e}"
\ No newline at end of file
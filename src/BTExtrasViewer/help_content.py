@@ -512,11 +512,15 @@ HELP_SECTIONS = {
 <h2>Procedură de import</h2>
 
 <bullet>Accesați <b>Fișier → Import MT940...</b> sau apăsați butonul <b>Import</b></bullet>
-<bullet>Selectați unul sau mai multe fișiere MT940 (.sta, .mt940, .txt)</bullet>
+<bullet>Selectați unul sau mai multe fișiere MT940 (.sta, .mt940, .txt) sau CAMT.053 (.xml)</bullet>
 <bullet>Aplicația va procesa fișierele și va importa tranzacțiile</bullet>
 
 <h2>Import în lot (batch)</h2>
-<p>Puteți selecta mai multe fișiere simultan. Aplicația le va procesa pe rând, afișând progresul.</p>
+<p>Puteți selecta mai multe fișiere simultan. Fișierele sunt grupate pe conturi, iar loturile conturilor diferite sunt importate în paralel (câte cel mult 4 odată). Fereastra de progres arată, pentru fiecare cont, starea, tranzacțiile noi și ignorate și viteza importului.</p>
+<p>Butonul <b>Previzualizare import</b> analizează aceleași fișiere fără a scrie nimic în baza de date: pentru fiecare fișier afișează câte tranzacții sunt noi, câte sunt deja existente (duplicate), codurile de tranzacție necunoscute și dacă fișierul a mai fost importat; la selectarea unui fișier sunt afișate câteva dintre tranzacțiile lui noi. Din fereastra de previzualizare importul poate fi pornit direct, fără o nouă parsare a fișierelor.</p>
+
+<h2>Reluarea unui import întrerupt</h2>
+<p>Tranzacțiile sunt confirmate în baza de date pe loturi de câte 1000; după fiecare lot se salvează și punctul în care a ajuns importul fișierului. Dacă importul se întrerupe (ex. conexiunea la NAS sau VPN se pierde), loturile deja confirmate rămân în baza de date. Din <b>Fișier → Reia Importurile Întrerupte...</b> importul continuă exact după ultimul lot confirmat, fără a reciti sau reverifica loturile anterioare. Reselectarea acelorași fișiere la import are același efect.</p>
 
 <h2>Ce se întâmplă la import</h2>
 <bullet>Se citește IBAN-ul din fișier</bullet>
@@ -573,6 +577,10 @@ HELP_SECTIONS = {
 <bullet>Numărul total de tranzacții din fișier</bullet>
 <bullet>Numărul de tranzacții importate cu succes</bullet>
 <bullet>Numărul de tranzacții ignorate (duplicate)</bullet>
+<bullet>Durata și viteza importului (rânduri/s), afișate și în timpul importului, în fereastra de progres</bullet>
+
+<h2>Fișiere deja importate</h2>
+<p>Pentru fiecare fișier importat se reține o amprentă a conținutului (hash). Dacă același fișier este selectat din nou pentru același cont, este recunoscut imediat și omis, fără a mai fi procesat. Fișierele omise apar în raportul de la final ca <b>deja importate</b>.</p>
 
 <tip>Puteți importa același fișier de mai multe ori fără teama de a crea duplicate. Aplicația va importa doar tranzacțiile noi.</tip>
 """,
@@ -593,6 +601,10 @@ HELP_SECTIONS = {
 <bullet>Contul bancar asociat</bullet>
 <bullet>Numărul de tranzacții importate</bullet>
 <bullet>Utilizatorul care a efectuat importul</bullet>
+<bullet>Amprenta conținutului, dimensiunea și referința extrasului (:20:/:28C:)</bullet>
+<bullet>Durata importului și viteza (rânduri/s), plus timpul pe etape: citirea fișierului, parsarea (tokenizare, extragere), deduplicarea, inserarea și confirmarea în baza de date</bullet>
+
+<tip>Dacă un import este lent, comparați timpul de citire cu cel de parsare și de inserare: un timp de citire mare indică o problemă de acces la fișiere (ex. NAS), iar unul de inserare mare indică o conexiune lentă la baza de date.</tip>
 
 <h2>Accesare istoric</h2>
 <p>Istoricul importurilor poate fi consultat de administratori pentru audit și verificare.</p>
@@ -1161,6 +1173,7 @@ HELP_SECTIONS = {
 <h2>Informații utile la contactare</h2>
 <p>Pentru a primi ajutor rapid, pregătiți următoarele informații:</p>
 <bullet>Versiunea aplicației (Ajutor → Despre)</bullet>
+<bullet>Pentru lentoare: interogările cele mai costisitoare (Ajutor → Performanță Interogări) și fișierul slow_queries.log din directorul aplicației</bullet>
 <bullet>Mesajul de eroare exact (screenshot dacă e posibil)</bullet>
 <bullet>Pașii pentru reproducerea problemei</bullet>
 <bullet>Sistemul de operare folosit</bullet>
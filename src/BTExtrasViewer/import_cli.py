@@ -0,0 +1,178 @@
+# src/BTExtrasViewer/import_cli.py
+"""
+Import MT940 din linia de comandă, fără interfață Tk (ex. pe serverul de lângă NAS).
+
+Exemplu (din directorul src/):
+    python -m BTExtrasViewer.import_cli --account-iban RO49BTRL01301202N12345XX extrase/*.sta
+    python -m BTExtrasViewer.import_cli --account-iban RO49BTRL01301202N12345XX --resume
+
+Credențialele DB sunt citite din config.ini (secțiunea [Database], vezi config_management).
+Rezultatul este afișat ca JSON pe stdout; jurnalul merge pe stderr.
+
+Coduri de ieșire:
+    0 - import reușit;
+    1 - eroare în timpul importului (DB, fișier, parsare);
+    2 - argumente sau configurație invalide (cont inexistent, credențiale lipsă);
+    3 - import reușit, dar unele fișiere au fost respinse (IBAN diferit de cel al contului).
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import configparser
+
+import pymysql
+
+from common.config_management import CONFIG_FILE, read_db_config_from_parser
+from BTExtrasViewer.parse_cache import default_parse_cache
+from BTExtrasViewer.import_engine import (
+    IMPORT_CHUNK_SIZE, IMPORT_MAX_PARSE_WORKERS, connect_import_database, extract_iban_from_mt940, run_import_batch,
+    load_import_checkpoints, interrupted_import_batches
+)
+
+EXIT_OK = 0
+EXIT_IMPORT_ERROR = 1
+EXIT_USAGE_ERROR = 2
+EXIT_FILES_REJECTED = 3
+
+
+def _normalize_iban(iban):
+    return iban.replace(" ", "").upper() if iban else None
+
+
+def load_db_credentials(config_path=CONFIG_FILE):
+    """Citește credențialele DB din fișierul de configurare. Returnează None dacă lipsesc."""
+    config = configparser.ConfigParser()
+    if os.path.exists(config_path):
+        config.read(config_path, encoding='utf-8')
+    return read_db_config_from_parser(config)
+
+
+def resolve_account(connection, account_iban=None, account_id=None):
+    """Returnează (id_cont, iban) pentru contul indicat prin IBAN sau ID, ori None dacă nu există."""
+    with connection.cursor() as cursor:
+        if account_id is not None:
+            cursor.execute("SELECT id_cont, iban FROM conturi_bancare WHERE id_cont = %s", (account_id,))
+        else:
+            cursor.execute("SELECT id_cont, iban FROM conturi_bancare WHERE REPLACE(UPPER(iban), ' ', '') = %s",
+                           (_normalize_iban(account_iban),))
+        row = cursor.fetchone()
+    return (row[0], row[1]) if row else None
+
+
+def split_files_by_iban(file_paths, account_iban, parse_cache=None):
+    """
+    Separă fișierele al căror IBAN (:25:) corespunde contului de cele care nu corespund.
+    Fișierele fără IBAN detectabil sunt acceptate, la fel ca în interfață.
+    """
+    accepted, rejected = [], []
+    expected = _normalize_iban(account_iban)
+    for file_path in file_paths:
+        file_iban = _normalize_iban(extract_iban_from_mt940(file_path, parse_cache))
+        if file_iban and expected and file_iban != expected:
+            rejected.append({'file': file_path, 'iban': file_iban})
+        else:
+            accepted.append(file_path)
+    return accepted, rejected
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m BTExtrasViewer.import_cli",
+        description="Importă extrase MT940 în baza de date BTExtrasViewer, fără interfață grafică."
+    )
+    account = parser.add_mutually_exclusive_group(required=True)
+    account.add_argument('--account-iban', help="IBAN-ul contului în care se importă.")
+    account.add_argument('--account-id', type=int, help="ID-ul contului (id_cont) în care se importă.")
+    parser.add_argument('files', nargs='*', help="Fișierele MT940 de importat.")
+    parser.add_argument('--config', default=CONFIG_FILE, help=f"Fișierul de configurare (implicit {CONFIG_FILE}).")
+    parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE, help="Tranzacții per lot de inserare.")
+    parser.add_argument('--workers', type=int, default=IMPORT_MAX_PARSE_WORKERS, help="Procese pentru parsarea fișierelor.")
+    parser.add_argument('--user-id', type=int, default=None, help="Utilizatorul înregistrat în istoricul importurilor.")
+    parser.add_argument('--staging', action='store_true',
+                        help="Încărcare prin LOAD DATA LOCAL INFILE într-o tabelă de staging (migrări mari de istoric).")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continuă importurile întrerupte ale contului (fișierele din importuri_in_curs).")
+    parser.add_argument('--no-cache', action='store_true', help="Nu folosi cache-ul extraselor parsate.")
+    parser.add_argument('--no-iban-check', action='store_true', help="Nu verifica IBAN-ul din fișiere.")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Afișează progresul pe stderr.")
+    return parser
+
+
+def _emit(result, exit_code):
+    result['exit_code'] = exit_code
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return exit_code
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, stream=sys.stderr,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+    result = {'status': 'error', 'files_requested': len(args.files)}
+    if not args.files and not args.resume:
+        result['error'] = "Nu a fost indicat niciun fișier (sau --resume)."
+        return _emit(result, EXIT_USAGE_ERROR)
+    missing = [path for path in args.files if not os.path.isfile(path)]
+    if missing:
+        result['error'] = "Fișiere inexistente: " + ", ".join(missing)
+        return _emit(result, EXIT_USAGE_ERROR)
+
+    db_credentials = load_db_credentials(args.config)
+    if not db_credentials:
+        result['error'] = f"Credențialele DB lipsesc din {args.config} (secțiunea [Database])."
+        return _emit(result, EXIT_USAGE_ERROR)
+
+    connection = None
+    parse_cache = None if args.no_cache else default_parse_cache()
+    started = time.perf_counter()
+    try:
+        connection = connect_import_database(db_credentials, local_infile=args.staging)
+        account = resolve_account(connection, args.account_iban, args.account_id)
+        if account is None:
+            result['error'] = f"Contul {args.account_iban or args.account_id} nu există în baza de date."
+            return _emit(result, EXIT_USAGE_ERROR)
+        account_id, account_iban = account
+        result['account_id'] = account_id
+
+        requested = list(args.files)
+        if args.resume:
+            with connection.cursor() as cursor:
+                batches, missing = interrupted_import_batches(load_import_checkpoints(cursor, account_id))
+            requested += [path for batch in batches for path in batch['files'] if path not in requested]
+            result['missing_resume_files'] = [point['path'] for point in missing]
+            for point in missing:
+                logging.warning(f"Fișierul importului întrerupt nu mai există: {point['path']}")
+
+        files, rejected = (requested, []) if args.no_iban_check else split_files_by_iban(requested, account_iban, parse_cache)
+        for item in rejected:
+            logging.warning(f"Fișier respins (IBAN {item['iban']} diferit de cel al contului): {item['file']}")
+
+        stats = run_import_batch(
+            connection, files, account_id, chunk_size=args.chunk_size, max_parse_workers=args.workers,
+            user_id=args.user_id, progress=lambda index, text: logging.info(f"[{index + 1}/{len(files)}] {text}"),
+            staging=args.staging, parse_cache=parse_cache
+        )
+        result.update(stats)
+        result['rejected_files'] = rejected
+        result['status'] = 'ok' if not rejected else 'partial'
+        result['duration_s'] = round(time.perf_counter() - started, 3)
+        return _emit(result, EXIT_FILES_REJECTED if rejected else EXIT_OK)
+    except (pymysql.Error, OSError, ValueError) as e:
+        logging.error(f"Eroare la importul din linia de comandă: {e}", exc_info=args.verbose)
+        if connection:
+            try: connection.rollback()
+            except Exception: pass
+        result['error'] = f"{type(e).__name__}: {e}"
+        result['duration_s'] = round(time.perf_counter() - started, 3)
+        return _emit(result, EXIT_IMPORT_ERROR)
+    finally:
+        if connection:
+            connection.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
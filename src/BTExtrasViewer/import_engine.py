@@ -0,0 +1,1061 @@
+# src/BTExtrasViewer/import_engine.py
+"""
+Nucleul importului de extrase MT940, fără dependențe de Tk.
+
+Conține parsarea pe loturi, deduplicarea prin amprente și scrierea în baza de date.
+Este folosit atât de worker-ul din interfață (file_processing.threaded_import_worker),
+cât și de importul din linia de comandă (import_cli).
+"""
+import os
+import re
+import time
+import logging
+import hashlib
+import tempfile
+from contextlib import contextmanager
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import pymysql
+
+from common.db_pool import bump_data_versions, get_connection_pool
+from common.tx_fingerprint import compute_tx_fingerprint
+from BTExtrasViewer import mt940_parser, camt053_parser
+
+# Expresii regulate
+RE_IBAN_EXTRACT = re.compile(r"([A-Z]{2}[0-9]{2}[A-Z0-9]{11,30})")
+
+# Numărul de tranzacții parsate care sunt clasificate (nou/duplicat), inserate și confirmate (commit) împreună
+IMPORT_CHUNK_SIZE = 1000
+# Numărul maxim de procese folosite pentru parsarea în paralel a fișierelor dintr-un lot
+IMPORT_MAX_PARSE_WORKERS = max(1, (os.cpu_count() or 1) - 1)
+# Fișierele mai mari sunt parsate în flux în thread-ul curent, nu în pool: un proces din pool returnează
+# lista completă a tranzacțiilor fișierului (aprox. de 7 ori mărimea lui în memorie)
+IMPORT_POOL_MAX_FILE_BYTES = 4 * 1024 * 1024
+# Etapele importului pentru care se măsoară timpii (în ordinea din pipeline)
+IMPORT_STAGES = ("read", "tokenize", "extract", "dedup", "insert", "commit")
+IMPORT_STAGE_LABELS = {
+    "read": "citire", "tokenize": "tokenizare", "extract": "extragere",
+    "dedup": "deduplicare", "insert": "inserare", "commit": "commit",
+}
+# Intervalul minim (secunde) între două mesaje de statistică trimise interfeței
+IMPORT_STATS_INTERVAL = 0.5
+# Loturile (câte unul per cont) importate simultan, fiecare pe conexiunea sa
+IMPORT_MAX_PARALLEL_BATCHES = 4
+# Tranzacțiile noi păstrate ca exemplu pentru fiecare fișier în previzualizarea importului
+IMPORT_PREVIEW_SAMPLE_ROWS = 20
+# Erorile la care scrierea unui lot este reluată: lock wait timeout, deadlock (importuri paralele)
+RETRYABLE_WRITE_ERRORS = (1205, 1213)
+WRITE_RETRIES = 3
+
+def statement_parser_for(file_path):
+    """Modulul de parsare potrivit fișierului: camt053_parser pentru XML CAMT.053, altfel mt940_parser."""
+    return camt053_parser if camt053_parser.is_camt053_file(file_path) else mt940_parser
+
+def iter_parsed_transactions(file_path, timings=None, statements=None, start_offset=0):
+    """
+    Tranzacțiile parsate în flux dintr-un extras MT940 sau CAMT.053 (aceeași structură pentru ambele).
+    `start_offset` (poziția unui extras, din rezumatul său) este folosit doar la MT940: documentele
+    CAMT.053 nu au puncte de reluare și sunt citite mereu de la început.
+    """
+    if start_offset:
+        return mt940_parser.iter_parsed_transactions(file_path, timings, statements, start_offset)
+    return statement_parser_for(file_path).iter_parsed_transactions(file_path, timings, statements)
+
+def parse_statement_file_with_info(file_path):
+    """Parsare integrală (tranzacții, info) a unui extras MT940 sau CAMT.053; punctul de intrare al proceselor din pool."""
+    return statement_parser_for(file_path).parse_statement_file_with_info(file_path)
+
+def read_statement_reference(file_path):
+    """Referința extrasului (":20:/:28C:" la MT940, "<Id>/<ElctrncSeqNb>" la CAMT.053)."""
+    return statement_parser_for(file_path).read_statement_reference(file_path)
+
+def extract_iban_from_mt940(file_path, parse_cache=None):
+    """
+    Extrage IBAN-ul din câmpul :25: dintr-un fișier MT940 (sau din <Acct><Id><IBAN> la CAMT.053).
+    Funcția este acum mai robustă și citește linie cu linie.
+    Dacă `parse_cache` (ParseCache) conține fișierul, IBAN-ul este luat din cache, fără citirea fișierului.
+    Returnează IBAN-ul ca string (litere mari) sau None.
+    """
+    if parse_cache is not None:
+        cached_meta = parse_cache.read_meta(file_path)
+        if cached_meta and cached_meta.get('iban'):
+            return cached_meta['iban']
+    if camt053_parser.is_camt053_file(file_path):
+        try:
+            header = camt053_parser.read_statement_header(file_path) or {}
+        except Exception as e:
+            logging.debug(f"DEBUG_EXTRACT_IBAN: Eroare la citirea antetului CAMT.053 din {os.path.basename(file_path)}: {e}")
+            return None
+        account = re.sub(r'[^A-Z0-9]', '', (header.get('account') or '').upper())
+        return account if RE_IBAN_EXTRACT.fullmatch(account) else None
+    logging.debug(f"DEBUG_EXTRACT_IBAN: Se procesează fișierul (versiune îmbunătățită): {file_path}")
+    iban_candidate_line_content = None
+    try:
+        with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+            for line_num, line_text in enumerate(f):
+                stripped_line = line_text.strip()
+                if stripped_line.startswith(":25:"):
+                    iban_candidate_line_content = stripped_line[4:].strip() # Preluăm conținutul de după :25:
+                    logging.debug(f"DEBUG_EXTRACT_IBAN: Linia :25: găsită (linia {line_num + 1}): '{iban_candidate_line_content}'")
+                    break # Am găsit primul tag :25:, ne oprim
+            else: # Se execută dacă bucla for s-a terminat fără 'break'
+                logging.debug(f"DEBUG_EXTRACT_IBAN: Tag-ul :25: nu a fost găsit în fișierul {os.path.basename(file_path)}")
+                return None
+
+        if iban_candidate_line_content:
+            potential_iban_part = iban_candidate_line_content
+            # Eliminăm orice prefix de tipul "COD BANCA/" sau similar, dacă există
+            if '/' in potential_iban_part:
+                potential_iban_part = potential_iban_part.split('/')[-1].strip()
+                logging.debug(f"DEBUG_EXTRACT_IBAN: Parte după '/' selectată: '{potential_iban_part}'")
+            
+            # Eliminăm orice caractere non-alfanumerice, cu excepția literelor și cifrelor
+            # (IBAN-urile standard conțin doar litere și cifre)
+            cleaned_potential_iban = re.sub(r'[^A-Z0-9]', '', potential_iban_part.upper())
+            logging.debug(f"DEBUG_EXTRACT_IBAN: IBAN curățat și uppercase: '{cleaned_potential_iban}'")
+
+            # Aplicăm regex-ul pentru a valida și extrage formatul IBAN
+            iban_match = RE_IBAN_EXTRACT.fullmatch(cleaned_potential_iban) # Folosim fullmatch pentru a valida întregul string curățat
+            if iban_match:
+                extracted_iban = iban_match.group(1) # grupul 1 este întregul IBAN potrivit
+                logging.debug(f"DEBUG_EXTRACT_IBAN: IBAN extras și validat prin fullmatch: {extracted_iban}")
+                return extracted_iban
+            else:
+                logging.debug(f"DEBUG_EXTRACT_IBAN: IBAN-ul curățat '{cleaned_potential_iban}' nu corespunde formatului așteptat de RE_IBAN_EXTRACT.")
+                # Ca o ultimă încercare, dacă regex-ul e prea strict, dar stringul arată a IBAN
+                if 15 <= len(cleaned_potential_iban) <= 34 and cleaned_potential_iban[:2].isalpha() and cleaned_potential_iban[2:4].isdigit():
+                    logging.debug(f"DEBUG_EXTRACT_IBAN: IBAN-ul curățat trece validarea de bază. Se returnează: {cleaned_potential_iban}")
+                    return cleaned_potential_iban
+
+            logging.debug(f"DEBUG_EXTRACT_IBAN: Nu s-a găsit un IBAN valid în conținutul liniei :25: ('{iban_candidate_line_content}')")
+            return None
+        else:
+            # Acest caz este acoperit de for-else de mai sus, dar lăsăm pentru claritate
+            logging.debug(f"DEBUG_EXTRACT_IBAN: Conținutul liniei :25: este gol după extragere (improbabil dacă tag-ul a fost găsit).")
+            return None
+
+    except Exception as e:
+        logging.debug(f"DEBUG_EXTRACT_IBAN: Eroare la extragerea IBAN-ului din {os.path.basename(file_path)}: {e}")
+        return None
+
+def _iter_chunks(iterable, chunk_size):
+    """Grupează elementele unui iterabil în liste de cel mult `chunk_size` elemente."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def load_existing_fingerprints(cursor, account_id, date_from, date_to):
+    """
+    Încarcă, printr-o singură interogare, amprentele (tx_fingerprint) tranzacțiilor
+    existente în cont pentru intervalul de date dat. Returnează un set.
+    """
+    cursor.execute(
+        "SELECT tx_fingerprint FROM tranzactii WHERE id_cont_fk = %s AND data BETWEEN %s AND %s AND tx_fingerprint IS NOT NULL",
+        (account_id, date_from, date_to)
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+def compute_file_hash(file_path, block_size=1024 * 1024):
+    """Calculează SHA-256 al conținutului unui fișier, citit pe blocuri. Returnează (hash_hex, dimensiune)."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+            size += len(block)
+    return digest.hexdigest(), size
+
+def load_imported_file_hashes(cursor, account_id, file_hashes):
+    """
+    Returnează subsetul de hash-uri care apar deja în istoric_importuri pentru cont,
+    printr-o singură interogare pe indexul (hash_fisier, id_cont_fk).
+    """
+    if not file_hashes:
+        return set()
+    placeholders = ", ".join(["%s"] * len(file_hashes))
+    cursor.execute(
+        f"SELECT DISTINCT hash_fisier FROM istoric_importuri WHERE id_cont_fk = %s AND hash_fisier IN ({placeholders})",
+        (account_id, *file_hashes)
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+def iter_parsed_files(file_paths, max_workers=IMPORT_MAX_PARSE_WORKERS, parse_cache=None, resume_points=None):
+    """
+    Generator care returnează, în ordinea fișierelor, tupluri (index, cale, tranzacții, info),
+    unde `info` conține 'timings' (etapele de parsare 'read', 'tokenize', 'extract') și
+    'statements' (rezumatele extraselor, cu soldurile :60F:/:62F:).
+
+    Fișierele găsite în `parse_cache` (ParseCache, opțional) sunt luate de acolo, fără citire
+    și tokenizare; `info` are atunci 'cached': True, iar timpul încărcării este trecut la 'read'.
+
+    Pentru un singur fișier (sau max_workers <= 1) tranzacțiile sunt parsate în flux,
+    în thread-ul curent, cu memorie constantă. Pentru mai multe fișiere, parsarea (regex pur
+    Python, limitată de GIL) este distribuită într-un ProcessPoolExecutor, iar rezultatele sunt
+    consumate în ordine de apelant, care rămâne singurul care scrie în baza de date.
+
+    Un proces din pool returnează lista completă a tranzacțiilor fișierului, iar în avans sunt
+    trimise cel mult `max_workers + 1` fișiere: memoria parsării în pool este deci limitată la
+    aprox. (max_workers + 1) x 7 x IMPORT_POOL_MAX_FILE_BYTES. Fișierele mai mari decât
+    IMPORT_POOL_MAX_FILE_BYTES sunt parsate în flux, în thread-ul curent, când le vine rândul.
+
+    La parsarea în flux, `info` se completează pe măsură ce tranzacțiile sunt consumate;
+    în pool el vine complet, împreună cu lista tranzacțiilor.
+
+    `resume_points` ({cale: punct de reluare}, vezi load_import_checkpoints) indică fișierele al căror
+    import a fost întrerupt: tranzacțiile lor încep după ultima înregistrare confirmată. Fișierele MT940
+    sunt parsate de la extrasul acelei înregistrări (căutare directă la octetul său), nu de la început.
+    `info` are atunci 'start_record' (indexul primei tranzacții returnate) și 'statements_start'
+    (indexul primei tranzacții a primului extras din 'statements').
+    """
+    resume_points = resume_points or {}
+    cached_paths = set()
+    if parse_cache is not None:
+        cached_paths = {path for path in file_paths if parse_cache.read_meta(path) is not None}
+    parsed = _iter_parsed_files_uncached(
+        [path for path in file_paths if path not in cached_paths and path not in resume_points], max_workers
+    )
+
+    for i, file_path in enumerate(file_paths):
+        point = resume_points.get(file_path)
+        if file_path not in cached_paths:
+            if point is None:
+                _, transactions, info = next(parsed)
+            else:
+                transactions, info = _parse_from_resume_point(file_path, point)
+            yield i, file_path, transactions, info
+            continue
+        started = time.perf_counter()
+        entry = parse_cache.load(file_path)
+        if entry is None:
+            # Intrarea a dispărut între timp (ex. curățată de alt proces): parsare normală
+            transactions, info = _parse_from_resume_point(file_path, point)
+            yield i, file_path, transactions, info
+            continue
+        _, transactions, statements = entry
+        info = {"timings": {"read": time.perf_counter() - started}, "statements": statements, "cached": True}
+        if point is not None:
+            transactions = transactions[point['records']:]
+            info['start_record'] = point['records']
+        yield i, file_path, transactions, info
+
+def _parse_from_resume_point(file_path, point=None):
+    """Parsare în flux, de la punctul de reluare `point` (dacă este dat); returnează (tranzacții, info)."""
+    info = {"timings": {}, "statements": []}
+    if point is None:
+        return iter_parsed_transactions(file_path, info["timings"], info["statements"]), info
+    info.update(start_record=point['records'], statements_start=point['statement_records'])
+    transactions = iter_parsed_transactions(file_path, info["timings"], info["statements"], point['offset'])
+    return islice(transactions, point['records'] - point['statement_records'], None), info
+
+def _fits_in_pool(file_path):
+    try:
+        return os.path.getsize(file_path) <= IMPORT_POOL_MAX_FILE_BYTES
+    except OSError:
+        return False  # eroarea este raportată de parsarea în flux, pentru fișierul respectiv
+
+def _iter_parsed_files_uncached(file_paths, max_workers):
+    """Parsează fișierele (în flux sau în pool, vezi iter_parsed_files) și returnează (cale, tranzacții, info)."""
+    in_pool = [max_workers > 1 and _fits_in_pool(path) for path in file_paths]
+    pooled = [path for path, use_pool in zip(file_paths, in_pool) if use_pool]
+    if len(pooled) <= 1:
+        for file_path in file_paths:
+            transactions, info = _parse_from_resume_point(file_path)
+            yield file_path, transactions, info
+        return
+
+    window = max_workers + 1
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(pooled))) as executor:
+        futures = [executor.submit(parse_statement_file_with_info, path) for path in pooled[:window]]
+        done = 0
+        for file_path, use_pool in zip(file_paths, in_pool):
+            if not use_pool:
+                transactions, info = _parse_from_resume_point(file_path)
+                yield file_path, transactions, info
+                continue
+            transactions, info = futures[done].result()
+            futures[done] = None  # eliberăm rezultatul după consum
+            if done + window < len(pooled):
+                futures.append(executor.submit(parse_statement_file_with_info, pooled[done + window]))
+            done += 1
+            yield file_path, transactions, info
+
+class ImportTimings:
+    """
+    Timpii pe etape (secunde) și numărul de rânduri procesate ale unui fișier sau lot,
+    folosiți pentru mesajele de progres și pentru coloanele de durată din istoric_importuri.
+    """
+
+    def __init__(self):
+        self.stages = dict.fromkeys(IMPORT_STAGES, 0.0)
+        self.rows = 0
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def add(self, stage, seconds):
+        self.stages[stage] += seconds
+
+    def merge(self, stage_timings):
+        for stage, seconds in stage_timings.items():
+            self.stages[stage] += seconds
+
+    @contextmanager
+    def measure(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[stage] += time.perf_counter() - started
+
+    def stop(self):
+        self.finished = time.perf_counter()
+        return self
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def rows_per_second(self):
+        elapsed = self.elapsed
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    def as_dict(self, extra_stages=None):
+        """Rezumatul serializabil (JSON / coadă); `extra_stages` sunt adăugați doar în rezumat."""
+        stages = dict(self.stages)
+        for stage, seconds in (extra_stages or {}).items():
+            stages[stage] += seconds
+        return {
+            'rows': self.rows,
+            'elapsed_s': round(self.elapsed, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+            'stages_s': {stage: round(seconds, 3) for stage, seconds in stages.items()},
+        }
+
+def format_import_stats(stats):
+    """Textul afișat în fereastra de progres pentru un dicționar produs de ImportTimings.as_dict()."""
+    rows = f"{stats['rows']:,}".replace(",", ".")
+    rate = f"{stats['rows_per_second']:,.0f}".replace(",", ".")
+    stages = ", ".join(f"{IMPORT_STAGE_LABELS[stage]} {seconds:.1f}s" for stage, seconds in stats['stages_s'].items())
+    return f"{rows} rânduri în {stats['elapsed_s']:.1f}s ({rate} rânduri/s)\n{stages}"
+
+class ImportSession:
+    """
+    Datele de referință ale unui lot de import, încărcate o singură dată pe lot:
+    codurile din 'tipuri_tranzactii' și (doar la primul cod necunoscut) descrierile
+    din 'swift_code_descriptions'. Codurile noi sunt inserate printr-o singură instrucțiune
+    și adăugate în memorie, astfel încât fișierele următoare din lot nu mai interoghează baza.
+    """
+    SQL_INSERT_TX_TYPES = ("INSERT INTO tipuri_tranzactii (cod, descriere_tip) VALUES (%s, %s) "
+                           "ON DUPLICATE KEY UPDATE cod = cod")
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.known_tx_types = None
+        self.swift_descriptions = None
+
+    def load(self):
+        """Încarcă codurile existente (o singură dată pe sesiune)."""
+        if self.known_tx_types is None:
+            with self.connection.cursor() as cursor:
+                cursor.execute("SELECT cod FROM tipuri_tranzactii")
+                self.known_tx_types = {row[0] for row in cursor.fetchall()}
+        return self
+
+    def _load_swift_descriptions(self, cursor):
+        if self.swift_descriptions is None:
+            cursor.execute("SELECT cod_swift, descriere_standard FROM swift_code_descriptions")
+            self.swift_descriptions = {row[0]: row[1] for row in cursor.fetchall()}
+        return self.swift_descriptions
+
+    def ensure_tx_types(self, codes):
+        """
+        Asigură existența codurilor de tranzacție date. Codurile lipsă sunt inserate
+        împreună (un singur INSERT cu VALUES multiple) și confirmate. Returnează codurile adăugate.
+        """
+        self.load()
+        new_codes = sorted(set(codes) - self.known_tx_types)
+        if not new_codes:
+            return []
+        with self.connection.cursor() as cursor:
+            swift_descriptions = self._load_swift_descriptions(cursor)
+            cursor.executemany(self.SQL_INSERT_TX_TYPES, [
+                (code, swift_descriptions.get(code, f"Tip nou, cod: {code}")) for code in new_codes
+            ])
+            bump_data_versions(cursor, ('tipuri_tranzactii',))
+        self.connection.commit()
+        self.known_tx_types.update(new_codes)
+        return new_codes
+
+class TransactionBulkWriter:
+    """
+    Scrie tranzacțiile noi în tabela 'tranzactii' pe loturi de `chunk_size` rânduri.
+    Fiecare lot este trimis printr-un singur `executemany` (PyMySQL îl transformă într-un
+    INSERT cu VALUES multiple) și este confirmat imediat, astfel încât tranzacțiile
+    InnoDB rămân mici chiar și la importul mai multor ani de extrase.
+
+    Duplicatele sunt respinse de baza de date prin indexul unic pe tx_fingerprint
+    (ON DUPLICATE KEY UPDATE fără efect); rândurile respinse sunt numărate în `ignored`.
+    """
+    SQL_INSERT = ("INSERT INTO tranzactii (id_cont_fk, data, descriere, suma, tip, cod_tranzactie_fk, cif, beneficiar, factura, tid, rrn, pan, mid, "
+                  "sold_initial, sold_final, sold_dupa_tranzactie, tx_fingerprint) "
+                  "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) "
+                  "ON DUPLICATE KEY UPDATE tx_fingerprint = tx_fingerprint")
+
+    def __init__(self, connection, account_id, chunk_size=IMPORT_CHUNK_SIZE, timings=None):
+        self.connection = connection
+        self.account_id = account_id
+        self.chunk_size = max(1, int(chunk_size))
+        self.inserted = 0
+        self.ignored = 0
+        self._pending_rows = []
+        # ImportTimings (opțional) în care sunt cumulate etapele 'insert' și 'commit'
+        self.timings = timings
+        # Apelat (opțional) înaintea fiecărui commit, ca punctul de reluare să fie salvat în aceeași tranzacție
+        self.before_commit = None
+
+    def fingerprint(self, tx):
+        """Amprenta tranzacției în contul acestui writer (vezi common.tx_fingerprint)."""
+        return compute_tx_fingerprint(self.account_id, tx['data'], tx['suma'], tx['tip'],
+                                      tx['descriere'], tx['rrn'], tx['tid'])
+
+    def add(self, tx, fingerprint=None):
+        """Adaugă o tranzacție parsată; lotul este scris automat când se umple."""
+        self._pending_rows.append((
+            self.account_id, tx['data'].strftime('%Y-%m-%d'), tx['descriere'], tx['suma'],
+            tx['tip'], tx['cod_tranzactie'], tx['cif'], tx['beneficiar'], tx['factura'],
+            tx['tid'], tx['rrn'], tx['pan'], tx['mid'],
+            tx.get('sold_initial'), tx.get('sold_final'), tx.get('sold_dupa_tranzactie'),
+            fingerprint or self.fingerprint(tx)
+        ))
+        if len(self._pending_rows) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Scrie rândurile în așteptare și confirmă tranzacția (commit la granița lotului)."""
+        started = time.perf_counter()
+        if self._pending_rows:
+            affected = self._execute_with_retry(self._pending_rows)
+            self.inserted += affected
+            self.ignored += len(self._pending_rows) - affected
+            self._pending_rows = []
+        inserted = time.perf_counter()
+        if self.before_commit is not None:
+            self.before_commit()
+        self.connection.commit()
+        if self.timings is not None:
+            self.timings.add("insert", inserted - started)
+            self.timings.add("commit", time.perf_counter() - inserted)
+
+    def _execute_with_retry(self, rows):
+        # Lotul este singur în tranzacția sa, deci după un deadlock poate fi reluat integral
+        for attempt in range(1, WRITE_RETRIES + 1):
+            try:
+                with self.connection.cursor() as cursor:
+                    return cursor.executemany(self.SQL_INSERT, rows) or 0
+            except pymysql.err.OperationalError as e:
+                if not e.args or e.args[0] not in RETRYABLE_WRITE_ERRORS or attempt == WRITE_RETRIES:
+                    raise
+                logging.warning(f"Import cont {self.account_id}: lotul de {len(rows)} rânduri este reluat "
+                                f"(încercarea {attempt + 1}) după eroarea {e.args[0]}.")
+                self.connection.rollback()
+                time.sleep(0.2 * attempt)
+
+    def finish(self):
+        """Încheie fișierul curent: scrie și confirmă rândurile rămase."""
+        self.flush()
+
+
+# Erorile MariaDB/MySQL când LOAD DATA LOCAL INFILE este dezactivat pe server sau pe client
+LOAD_DATA_LOCAL_DISABLED_ERRORS = (1148, 2068, 3948)
+
+STAGING_TABLE = "tranzactii_import_staging"
+STAGING_COLUMNS = ("pozitie", "id_cont_fk", "data", "descriere", "suma", "tip", "cod_tranzactie_fk", "cif", "beneficiar",
+                   "factura", "tid", "rrn", "pan", "mid", "sold_initial", "sold_final", "sold_dupa_tranzactie",
+                   "tx_fingerprint")
+
+
+def _tsv_value(value):
+    """Un câmp în formatul implicit LOAD DATA (tab între câmpuri, escape cu backslash, NULL = \\N)."""
+    if value is None:
+        return "\\N"
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+class StagingBulkWriter(TransactionBulkWriter):
+    """
+    Variantă a writer-ului pentru importuri masive (migrări de istoric): rândurile unui fișier
+    sunt scrise într-un TSV temporar, încărcate cu LOAD DATA LOCAL INFILE într-o tabelă
+    temporară a sesiunii și mutate în 'tranzactii' printr-un singur INSERT ... SELECT.
+
+    Duplicatele (față de baza de date sau din același fișier) sunt respinse tot de indexul unic
+    pe tx_fingerprint, deci deduplicarea pe loturi din run_import_batch nu mai este necesară.
+    Conexiunea trebuie deschisă cu local_infile=True (vezi connect_import_database).
+    """
+    SQL_CREATE_STAGING = (
+        f"CREATE TEMPORARY TABLE IF NOT EXISTS {STAGING_TABLE} ("
+        "pozitie INT NOT NULL, id_cont_fk INT NOT NULL, data DATE, descriere TEXT, suma DECIMAL(15, 2), tip VARCHAR(10), "
+        "cod_tranzactie_fk VARCHAR(4), cif VARCHAR(50), beneficiar VARCHAR(255), factura VARCHAR(100), tid VARCHAR(100), "
+        "rrn VARCHAR(100), pan VARCHAR(100), mid VARCHAR(50), sold_initial DECIMAL(15, 2), sold_final DECIMAL(15, 2), "
+        "sold_dupa_tranzactie DECIMAL(15, 2), tx_fingerprint CHAR(64))"
+    )
+    SQL_LOAD_DATA = (
+        f"LOAD DATA LOCAL INFILE %s INTO TABLE {STAGING_TABLE} CHARACTER SET utf8mb4 "
+        "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' "
+        f"({', '.join(STAGING_COLUMNS)})"
+    )
+    SQL_MERGE = (
+        f"INSERT INTO tranzactii ({', '.join(STAGING_COLUMNS[1:])}) "
+        f"SELECT {', '.join(STAGING_COLUMNS[1:])} FROM {STAGING_TABLE} WHERE id_cont_fk = %s ORDER BY pozitie "
+        "ON DUPLICATE KEY UPDATE tx_fingerprint = tranzactii.tx_fingerprint"
+    )
+    SQL_CLEAR_STAGING = f"DELETE FROM {STAGING_TABLE}"
+
+    def __init__(self, connection, account_id, chunk_size=IMPORT_CHUNK_SIZE, timings=None, temp_dir=None):
+        super().__init__(connection, account_id, chunk_size, timings)
+        self.temp_dir = temp_dir
+        self.staged = 0
+        self._tsv_file = None
+        self._staging_ready = False
+
+    def flush(self):
+        """Adaugă rândurile în așteptare în fișierul TSV al fișierului curent (fără acces la baza de date)."""
+        if not self._pending_rows:
+            return
+        started = time.perf_counter()
+        if self._tsv_file is None:
+            self._tsv_file = tempfile.NamedTemporaryFile(
+                mode="w", encoding="utf-8", newline="\n", suffix=".tsv", prefix="btextras_", dir=self.temp_dir, delete=False
+            )
+        lines = []
+        for row in self._pending_rows:
+            self.staged += 1
+            lines.append("\t".join(_tsv_value(value) for value in (self.staged, *row)))
+        self._tsv_file.write("\n".join(lines) + "\n")
+        self._pending_rows = []
+        if self.timings is not None:
+            self.timings.add("insert", time.perf_counter() - started)
+
+    def finish(self):
+        """Încarcă TSV-ul în tabela de staging, îl mută în 'tranzactii' și confirmă."""
+        self.flush()
+        if self._tsv_file is None:
+            return
+        tsv_path, staged = self._tsv_file.name, self.staged
+        self._tsv_file.close()
+        self._tsv_file = None
+        self.staged = 0
+        started = time.perf_counter()
+        try:
+            with self.connection.cursor() as cursor:
+                if not self._staging_ready:
+                    cursor.execute(self.SQL_CREATE_STAGING)
+                    self._staging_ready = True
+                cursor.execute(self.SQL_CLEAR_STAGING)
+                cursor.execute(self.SQL_LOAD_DATA, (tsv_path,))
+                affected = cursor.execute(self.SQL_MERGE, (self.account_id,)) or 0
+                cursor.execute(self.SQL_CLEAR_STAGING)
+        except pymysql.err.MySQLError as e:
+            if e.args and e.args[0] in LOAD_DATA_LOCAL_DISABLED_ERRORS:
+                raise ConnectionError(
+                    "Încărcarea prin LOAD DATA LOCAL INFILE nu este permisă (verificați opțiunea local_infile "
+                    f"a serverului MariaDB): {e}"
+                ) from e
+            raise
+        finally:
+            try:
+                os.remove(tsv_path)
+            except OSError as e:
+                logging.warning(f"Fișierul temporar {tsv_path} nu a putut fi șters: {e}")
+        self.inserted += affected
+        self.ignored += staged - affected
+        inserted = time.perf_counter()
+        if self.before_commit is not None:
+            self.before_commit()
+        self.connection.commit()
+        if self.timings is not None:
+            self.timings.add("insert", inserted - started)
+            self.timings.add("commit", time.perf_counter() - inserted)
+
+
+SQL_UPSERT_STATEMENT_BALANCE = (
+    "INSERT INTO extrase_solduri (id_cont_fk, referinta, numar_extras, data_sold_initial, sold_initial, "
+    "data_sold_final, sold_final, valuta, numar_tranzactii, sold_verificat) "
+    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s) "
+    "ON DUPLICATE KEY UPDATE sold_initial = VALUES(sold_initial), data_sold_initial = VALUES(data_sold_initial), "
+    "sold_final = VALUES(sold_final), valuta = VALUES(valuta), numar_tranzactii = VALUES(numar_tranzactii), "
+    "sold_verificat = VALUES(sold_verificat)"
+)
+
+def save_statement_balances(cursor, account_id, statements):
+    """
+    Salvează soldurile la nivel de extras (:60F:/:62F:) în 'extrase_solduri', printr-un singur
+    executemany. Extrasele fără sold final sunt ignorate. Returnează numărul de extrase salvate.
+    """
+    rows = [
+        (account_id, (st['reference'] or "")[:35], (st['statement_no'] or "")[:20], st['opening_date'], st['opening_balance'],
+         st['closing_date'], st['closing_balance'], st['currency'], st['transactions'], st['consistent'])
+        for st in statements if st['closing_date'] is not None
+    ]
+    if rows:
+        cursor.executemany(SQL_UPSERT_STATEMENT_BALANCE, rows)
+    return len(rows)
+
+# REPLACE (și nu ON DUPLICATE KEY UPDATE): rândul fișierului este rescris integral la fiecare lot
+SQL_SAVE_IMPORT_CHECKPOINT = (
+    "REPLACE INTO importuri_in_curs (id_cont_fk, hash_fisier, cale_fisier, nume_fisier, inregistrari, octet_extras, "
+    "inregistrari_extras, tranzactii_inserate, tranzactii_ignorate, id_utilizator_fk) "
+    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
+)
+
+def load_import_checkpoints(cursor, account_id=None):
+    """
+    Punctele de reluare ale importurilor întrerupte (ale contului dat sau ale tuturor conturilor),
+    ca dicționare {'account_id', 'hash', 'path', 'file', 'records', 'offset', 'statement_records',
+    'inserted', 'ignored'}: 'records' înregistrări ale fișierului sunt deja confirmate, iar parsarea
+    poate fi reluată de la octetul 'offset', unde începe extrasul cu 'statement_records' înregistrări înainte.
+    """
+    query = ("SELECT id_cont_fk, hash_fisier, cale_fisier, nume_fisier, inregistrari, octet_extras, inregistrari_extras, "
+             "tranzactii_inserate, tranzactii_ignorate FROM importuri_in_curs")
+    if account_id is None:
+        cursor.execute(query + " ORDER BY id_cont_fk, cale_fisier")
+    else:
+        cursor.execute(query + " WHERE id_cont_fk = %s ORDER BY cale_fisier", (account_id,))
+    keys = ('account_id', 'hash', 'path', 'file', 'records', 'offset', 'statement_records', 'inserted', 'ignored')
+    # Funcționează și cu DictCursor (conexiunea interfeței): coloanele vin în ordinea din SELECT
+    return [dict(zip(keys, row.values() if isinstance(row, dict) else row)) for row in cursor.fetchall()]
+
+def interrupted_import_batches(checkpoints):
+    """
+    Loturile ({'target_id', 'files'}) care reiau importurile întrerupte, câte unul per cont, plus
+    lista fișierelor care nu mai există la calea salvată (acestea trebuie reselectate manual).
+    """
+    batches, missing = {}, []
+    for point in checkpoints:
+        if os.path.isfile(point['path']):
+            batches.setdefault(point['account_id'], []).append(point['path'])
+        else:
+            missing.append(point)
+    return [{'target_id': account_id, 'files': files} for account_id, files in batches.items()], missing
+
+def _statement_resume_point(statements, statements_start, records):
+    """(octet, înregistrări înaintea lui) al ultimului extras care începe cel târziu la înregistrarea `records`."""
+    point, index = (0, 0), statements_start
+    for statement in statements:
+        if index > records:
+            break
+        if statement.get('offset') is not None:
+            point = (statement['offset'], index)
+        index += statement['transactions']
+    return point
+
+
+class ImportCheckpoint:
+    """
+    Punctul de reluare al fișierului importat (tabela 'importuri_in_curs').
+
+    `save` este legat de writer (TransactionBulkWriter.before_commit), deci rândul este scris în aceeași
+    tranzacție cu fiecare lot: după o întrerupere (ex. conexiunea la NAS/VPN pierdută), importul reia
+    fișierul exact după ultimul lot confirmat, fără a reparsa sau reverifica loturile anterioare.
+    Soldurile extraselor parcurse sunt salvate tot la fiecare lot, pentru că reluarea nu le mai citește.
+    Tot aici este incrementată versiunea tabelei 'tranzactii' (versiuni_date) când lotul a adus rânduri noi,
+    ca rezultatele păstrate în cache de clienți (DatabaseHandler.query_cache) să fie invalidate.
+    """
+
+    def __init__(self, cursor, account_id, file_path, file_hash, user_id=None, resumed=None):
+        self.cursor = cursor
+        self.account_id = account_id
+        self.file_path = file_path
+        self.file_hash = file_hash
+        self.user_id = user_id
+        self.records = resumed['records'] if resumed else 0
+        self._inserted_before = resumed['inserted'] if resumed else 0
+        self._ignored_before = resumed['ignored'] if resumed else 0
+        self.statements, self.statements_start, self._saved_statements = [], 0, 0
+        self.writer = None
+        self._inserted_at_bump = 0
+
+    def attach(self, writer, statements, statements_start=0):
+        """Leagă punctul de writer și de rezumatele extraselor fișierului (completate pe măsura parsării)."""
+        self.writer = writer
+        self.statements, self.statements_start = statements, statements_start
+        self._inserted_before -= writer.inserted
+        self._ignored_before -= writer.ignored
+        self._inserted_at_bump = writer.inserted
+        writer.before_commit = self.save
+
+    @property
+    def inserted(self):
+        return self._inserted_before + self.writer.inserted
+
+    @property
+    def ignored(self):
+        return self._ignored_before + self.writer.ignored
+
+    def _save_statement_balances(self):
+        save_statement_balances(self.cursor, self.account_id, self.statements[self._saved_statements:])
+        self._saved_statements = len(self.statements)
+
+    def save(self):
+        offset, statement_records = _statement_resume_point(self.statements, self.statements_start, self.records)
+        self._save_statement_balances()
+        self.cursor.execute(SQL_SAVE_IMPORT_CHECKPOINT, (
+            self.account_id, self.file_hash, self.file_path[:1024], os.path.basename(self.file_path)[:255],
+            self.records, offset, statement_records, self.inserted, self.ignored, self.user_id
+        ))
+        if self.writer.inserted != self._inserted_at_bump:
+            bump_data_versions(self.cursor, ('tranzactii',))
+            self._inserted_at_bump = self.writer.inserted
+
+    def finish(self):
+        """Fișierul este complet: salvează soldurile rămase și șterge punctul (înaintea rândului din istoric)."""
+        self.writer.before_commit = None
+        self._save_statement_balances()
+        self.cursor.execute("DELETE FROM importuri_in_curs WHERE id_cont_fk = %s AND hash_fisier = %s",
+                            (self.account_id, self.file_hash))
+
+def connect_import_database(db_credentials, local_infile=False):
+    """
+    Împrumută din pool-ul comun al procesului o conexiune PyMySQL pentru import, din credențialele
+    standard (host, port, database, user, password); close() o returnează în pool.
+    `local_infile=True` permite LOAD DATA LOCAL INFILE (necesar pentru importul prin staging).
+    """
+    if not db_credentials:
+        raise ConnectionError("Credentialele DB nu au fost furnizate importului.")
+    options = {'local_infile': True} if local_infile else {}
+    return get_connection_pool(db_credentials, **options).acquire()
+
+def collect_file_infos(file_paths, parse_cache=None):
+    """
+    Hash-ul conținutului și mărimea fiecărui fișier: {cale: {'hash', 'size', 'hash_s', ...}}.
+    Pentru fișierele din `parse_cache` ele vin din cache (cu 'reference'), fără citirea fișierului;
+    pentru celelalte este reținută și 'cache_key', cheia cache-ului citită înaintea conținutului.
+    """
+    clock = time.perf_counter
+    file_infos = {}
+    for file_path in file_paths:
+        started = clock()
+        cached_meta = parse_cache.read_meta(file_path) if parse_cache is not None else None
+        if cached_meta and cached_meta.get('hash'):
+            file_infos[file_path] = {'hash': cached_meta['hash'], 'size': cached_meta['size'], 'hash_s': clock() - started,
+                                     'reference': cached_meta.get('reference')}
+            continue
+        # Cheia cache-ului este citită înaintea conținutului: dacă fișierul se schimbă între timp, nu este salvat
+        cache_key = parse_cache.file_key(file_path) if parse_cache is not None else None
+        file_hash, file_size = compute_file_hash(file_path)
+        file_infos[file_path] = {'hash': file_hash, 'size': file_size, 'hash_s': clock() - started, 'cache_key': cache_key}
+    return file_infos
+
+def _store_in_parse_cache(parse_cache, file_path, file_info, transactions, statements):
+    if 'reference' not in file_info:
+        file_info['reference'] = (read_statement_reference(file_path) or "")[:100] or None
+    parse_cache.store(file_path, file_info['cache_key'], transactions, statements,
+                      iban=extract_iban_from_mt940(file_path), hash=file_info['hash'], size=file_info['size'],
+                      reference=file_info['reference'])
+
+def preview_import_batch(connection, file_paths, account_id, max_parse_workers=IMPORT_MAX_PARSE_WORKERS,
+                         parse_cache=None, progress=None):
+    """
+    Simulează importul fișierelor în contul `account_id`, fără a scrie nimic în baza de date.
+
+    Fișierele sunt parsate în flux (sau luate din `parse_cache`, care este și completat, deci importul
+    care urmează nu le mai parsează), iar tranzacțiile sunt clasificate pe loturi de IMPORT_CHUNK_SIZE,
+    ca la import: o interogare aduce amprentele existente pentru intervalul de date al lotului. În memorie
+    rămân doar contoarele, amprentele tranzacțiilor noi din lot și cel mult IMPORT_PREVIEW_SAMPLE_ROWS
+    tranzacții noi pe fișier.
+    Returnează {'account_id', 'new', 'duplicates', 'unknown_codes', 'files'}, unde 'files' are, în
+    ordinea fișierelor, {'file', 'iban', 'transactions', 'new', 'duplicates', 'unknown', 'unknown_codes',
+    'date_from', 'date_to', 'already_imported', 'sample'}. Fișierele deja importate (același hash) nu sunt
+    parsate: importul le-ar omite. Codurile necunoscute sunt cele care lipsesc din 'tipuri_tranzactii'.
+    """
+    report = progress or (lambda index, text: None)
+    known_codes = ImportSession(connection).load().known_tx_types
+    file_infos = collect_file_infos(file_paths, parse_cache)
+    with connection.cursor() as cursor:
+        already_imported = load_imported_file_hashes(cursor, account_id, sorted({info['hash'] for info in file_infos.values()}))
+
+    previews, parsed, seen_hashes = [], [], set()
+    for file_path in file_paths:
+        file_hash = file_infos[file_path]['hash']
+        preview = {'file': file_path, 'iban': extract_iban_from_mt940(file_path, parse_cache), 'transactions': 0,
+                   'new': 0, 'duplicates': 0, 'unknown': 0, 'unknown_codes': [], 'date_from': None, 'date_to': None,
+                   'already_imported': file_hash in already_imported or file_hash in seen_hashes, 'sample': []}
+        seen_hashes.add(file_hash)
+        previews.append(preview)
+        if not preview['already_imported']:
+            parsed.append(preview)
+
+    fingerprint = TransactionBulkWriter(None, account_id).fingerprint
+    # Tranzacțiile repetate în lot (același extras în două fișiere) sunt noi doar prima dată
+    new_fingerprints = set()
+    with connection.cursor() as cursor:
+        for i, file_path, transactions, parse_info in iter_parsed_files([p['file'] for p in parsed], max_parse_workers, parse_cache):
+            report(i, f"Analiză: {os.path.basename(file_path)}")
+            preview, file_info = parsed[i], file_infos[file_path]
+            to_cache = [] if (parse_cache is not None and file_info.get('cache_key') is not None
+                              and not parse_info.get('cached')) else None
+            unknown_codes = set()
+            for chunk in _iter_chunks(transactions, IMPORT_CHUNK_SIZE):
+                date_from, date_to = min(tx['data'] for tx in chunk), max(tx['data'] for tx in chunk)
+                preview['date_from'] = date_from if preview['date_from'] is None else min(preview['date_from'], date_from)
+                preview['date_to'] = date_to if preview['date_to'] is None else max(preview['date_to'], date_to)
+                existing = load_existing_fingerprints(cursor, account_id, date_from, date_to)
+                for tx in chunk:
+                    if tx['cod_tranzactie'] not in known_codes:
+                        preview['unknown'] += 1
+                        unknown_codes.add(tx['cod_tranzactie'])
+                    tx_fingerprint = fingerprint(tx)
+                    if tx_fingerprint in existing or tx_fingerprint in new_fingerprints:
+                        preview['duplicates'] += 1
+                        continue
+                    new_fingerprints.add(tx_fingerprint)
+                    preview['new'] += 1
+                    if len(preview['sample']) < IMPORT_PREVIEW_SAMPLE_ROWS:
+                        preview['sample'].append(tx)
+                preview['transactions'] += len(chunk)
+                if to_cache is not None:
+                    to_cache.extend(chunk)
+                    if len(to_cache) > parse_cache.max_transactions:
+                        to_cache = None
+            preview['unknown_codes'] = sorted(unknown_codes)
+            if to_cache is not None:
+                _store_in_parse_cache(parse_cache, file_path, file_info, to_cache, parse_info['statements'])
+
+    return {
+        'account_id': account_id,
+        'new': sum(p['new'] for p in previews),
+        'duplicates': sum(p['duplicates'] for p in previews),
+        'unknown_codes': sorted({code for p in previews for code in p['unknown_codes']}),
+        'files': previews,
+    }
+
+
+def run_import_batch(connection, file_paths, account_id, chunk_size=IMPORT_CHUNK_SIZE,
+                     max_parse_workers=IMPORT_MAX_PARSE_WORKERS, user_id=None, progress=None, on_stats=None,
+                     staging=False, parse_cache=None):
+    """
+    Importă un lot de fișiere MT940 în contul `account_id`, pe conexiunea dată.
+
+    `progress(index, text)` este apelat (opțional) la începutul fiecărui fișier.
+    `on_stats(stats)` primește (opțional, cel mult o dată la IMPORT_STATS_INTERVAL secunde și
+    la sfârșitul fiecărui fișier) timpii pe etape ai fișierului curent (ImportTimings.as_dict()
+    plus 'file').
+    `staging=True` scrie tranzacțiile prin StagingBulkWriter (LOAD DATA LOCAL INFILE + INSERT ... SELECT),
+    potrivit pentru migrări mari de istoric; conexiunea trebuie să permită local_infile.
+    `parse_cache` (ParseCache, opțional): fișierele deja parsate sunt luate din cache (inclusiv
+    hash-ul conținutului, deci nu mai sunt citite deloc), iar cele parsate acum sunt adăugate în el.
+    După fiecare lot confirmat este salvat punctul de reluare al fișierului (ImportCheckpoint); un fișier
+    al cărui import a fost întrerupt este continuat de la acel punct, cu totalurile cumulate.
+    Returnează un dicționar cu statisticile lotului:
+      - 'inserted' / 'ignored': totalul tranzacțiilor inserate / ignorate ca duplicate;
+      - 'skipped_files': fișierele omise pentru că au mai fost importate în cont;
+      - 'resumed_files': fișierele al căror import întrerupt a fost continuat;
+      - 'files': câte o intrare {'file', 'inserted', 'ignored', 'timings'} pentru fiecare fișier importat;
+      - 'timings': timpii pe etape cumulați pentru tot lotul.
+    Erorile sunt propagate apelantului (care decide rollback-ul și raportarea).
+    """
+    if account_id is None:
+        raise ValueError("ID-ul contului activ nu a fost furnizat pentru import.")
+    report = progress or (lambda index, text: None)
+    clock = time.perf_counter
+
+    skipped_files = []
+    file_stats = []
+    batch_timings = ImportTimings()
+    cursor = connection.cursor()
+    writer = (StagingBulkWriter if staging else TransactionBulkWriter)(connection, account_id, chunk_size)
+    session = ImportSession(connection).load()
+
+    # Fișierele identice (același hash de conținut) deja importate în acest cont sunt omise
+    # fără parsare: o singură interogare pe istoric pentru tot lotul.
+    file_infos = collect_file_infos(file_paths, parse_cache)
+    already_imported = load_imported_file_hashes(
+        cursor, account_id, sorted({info['hash'] for info in file_infos.values()})
+    )
+    checkpoints = {point['hash']: point for point in load_import_checkpoints(cursor, account_id)}
+
+    files_to_import, seen_hashes, resume_points = [], set(), {}
+    for file_path in file_paths:
+        file_hash = file_infos[file_path]['hash']
+        if file_hash in already_imported or file_hash in seen_hashes:
+            report(len(skipped_files), f"Deja importat: {os.path.basename(file_path)}")
+            skipped_files.append(file_path)
+            continue
+        seen_hashes.add(file_hash)
+        files_to_import.append(file_path)
+        if file_hash in checkpoints:
+            resume_points[file_path] = checkpoints[file_hash]
+
+    parsed_files = iter_parsed_files(files_to_import, max_parse_workers, parse_cache, resume_points)
+    for i, file_path, parsed_transactions, parse_info in parsed_files:
+        parse_timings = parse_info['timings']
+        file_info = file_infos[file_path]
+        resumed = resume_points.get(file_path)
+        # Tranzacțiile parsate acum sunt păstrate pentru cache (doar pentru fișiere de mărime rezonabilă și complete)
+        to_cache = [] if (file_info.get('cache_key') is not None and not parse_info.get('cached')
+                          and resumed is None) else None
+        if resumed is None:
+            report(len(skipped_files) + i, f"Procesare: {os.path.basename(file_path)}")
+        else:
+            report(len(skipped_files) + i, f"Reluare: {os.path.basename(file_path)} (după {resumed['records']} înregistrări)")
+        checkpoint = ImportCheckpoint(cursor, account_id, file_path, file_info['hash'], user_id, resumed)
+        checkpoint.attach(writer, parse_info['statements'], parse_info.get('statements_start', 0))
+        file_timings = ImportTimings()
+        file_timings.add("read", file_info['hash_s'])  # citirea pentru hash-ul conținutului
+        writer.timings = file_timings
+        last_stats_sent = clock()
+
+        # Tranzacțiile (parsate în flux sau de procesele din pool) sunt clasificate pe loturi:
+        # o singură interogare aduce amprentele existente pentru intervalul de date al lotului.
+        for chunk in _iter_chunks(parsed_transactions, writer.chunk_size):
+            with file_timings.measure("dedup"):
+                session.ensure_tx_types(tx['cod_tranzactie'] for tx in chunk)
+
+            if staging:
+                # Duplicatele sunt respinse la mutarea din staging (indexul unic), fără interogări pe loturi
+                new_rows = [(tx, None) for tx in chunk]
+            else:
+                with file_timings.measure("dedup"):
+                    existing_fingerprints = load_existing_fingerprints(
+                        cursor, account_id, min(tx['data'] for tx in chunk), max(tx['data'] for tx in chunk)
+                    )
+
+                    new_rows = []
+                    for tx in chunk:
+                        fingerprint = writer.fingerprint(tx)
+                        if fingerprint in existing_fingerprints:
+                            writer.ignored += 1
+                            continue
+                        existing_fingerprints.add(fingerprint)
+                        new_rows.append((tx, fingerprint))
+
+            # Punctul de reluare salvat la commit include lotul curent
+            checkpoint.records += len(chunk)
+            for tx, fingerprint in new_rows:
+                writer.add(tx, fingerprint)
+
+            # Granița lotului: rândurile noi sunt scrise și confirmate împreună cu punctul de reluare
+            # (în staging: adăugate în TSV, confirmate la sfârșitul fișierului)
+            writer.flush()
+            file_timings.rows += len(chunk)
+            if to_cache is not None:
+                to_cache.extend(chunk)
+                if len(to_cache) > parse_cache.max_transactions:
+                    to_cache = None
+
+            if on_stats and clock() - last_stats_sent >= IMPORT_STATS_INTERVAL:
+                on_stats(dict(file_timings.as_dict(parse_timings), file=file_path))
+                last_stats_sent = clock()
+
+        writer.finish()
+        file_inserted, file_ignored = checkpoint.inserted, checkpoint.ignored
+
+        # Fișierul este înregistrat în istoric (cu hash-ul său și timpii importului) chiar dacă nu
+        # a adus tranzacții noi, pentru ca o nouă selecție a lui să fie recunoscută și omisă.
+        # Soldurile rămase și ștergerea punctului de reluare sunt în aceeași tranzacție cu rândul din istoric.
+        file_timings.merge(parse_timings)
+        history_started = clock()
+        if 'reference' not in file_info:
+            file_info['reference'] = (read_statement_reference(file_path) or "")[:100] or None
+        checkpoint.finish()
+        cursor.execute(
+            "INSERT INTO istoric_importuri (nume_fisier, tranzactii_procesate, tranzactii_ignorate, id_cont_fk, id_utilizator_fk, "
+            "hash_fisier, dimensiune_fisier, referinta_extras, durata_ms, durata_citire_ms, durata_tokenizare_ms, "
+            "durata_extragere_ms, durata_deduplicare_ms, durata_inserare_ms, durata_commit_ms, randuri_pe_secunda) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+            (os.path.basename(file_path), file_inserted, file_ignored, account_id, user_id,
+             file_info['hash'], file_info['size'],
+             file_info['reference'],
+             *_history_timing_values(file_timings.stop()))
+        )
+        connection.commit()
+        file_timings.add("commit", clock() - history_started)
+        file_timings.stop()
+
+        if to_cache is not None:
+            _store_in_parse_cache(parse_cache, file_path, file_info, to_cache, parse_info['statements'])
+
+        batch_timings.rows += file_timings.rows
+        batch_timings.merge(file_timings.stages)
+        file_summary = file_timings.as_dict()
+        file_stats.append({'file': file_path, 'inserted': file_inserted, 'ignored': file_ignored, 'timings': file_summary})
+        if on_stats:
+            on_stats(dict(file_summary, file=file_path))
+        logging.info(f"Import {os.path.basename(file_path)}: {file_summary['rows']} rânduri în {file_summary['elapsed_s']}s "
+                     f"({file_summary['rows_per_second']} rânduri/s), etape: {file_summary['stages_s']}")
+
+    cursor.close()
+    batch_timings.stop()
+    logging.info(f"Import lot cont {account_id}: {writer.inserted} inserate, {writer.ignored} ignorate, "
+                 f"{len(skipped_files)} fișiere omise, {len(resume_points)} reluate.")
+    return {
+        'inserted': writer.inserted,
+        'ignored': writer.ignored,
+        'skipped_files': skipped_files,
+        'resumed_files': list(resume_points),
+        'files': file_stats,
+        'timings': batch_timings.as_dict(),
+    }
+
+def run_parallel_import_batches(db_credentials, batches, max_parallel=IMPORT_MAX_PARALLEL_BATCHES, user_id=None,
+                                parse_cache=None, on_event=None):
+    """
+    Importă mai multe loturi (câte unul per cont: {'target_id', 'files'}) în paralel.
+
+    Cel mult `max_parallel` loturi rulează simultan, fiecare într-un thread cu propria conexiune
+    (run_import_batch); loturile nu ating aceleași rânduri, deci nu se blochează între ele.
+    Loturile mari sunt pornite primele, ca durata totală să se apropie de cea a celui mai lent cont.
+    Procesele de parsare sunt împărțite între loturile simultane.
+
+    `on_event(kind, index, payload)` (opțional, apelat din thread-urile de import) primește, pentru
+    lotul `index` din `batches`: 'start' (None), 'progress' ((index fișier, text)), 'stats'
+    (telemetria fișierului), 'done' (statisticile lotului) sau 'error' (mesajul erorii).
+    Returnează, în ordinea loturilor, dicționare {'target_id', 'files', 'stats', 'error'}.
+    Eroarea unui lot nu le oprește pe celelalte.
+    """
+    emit = on_event or (lambda kind, index, payload: None)
+    parallel = max(1, min(max_parallel, len(batches)))
+    parse_workers = max(1, IMPORT_MAX_PARSE_WORKERS // parallel)
+
+    def run_one(index):
+        batch = batches[index]
+        emit('start', index, None)
+        connection = None
+        try:
+            connection = connect_import_database(db_credentials)
+            stats = run_import_batch(
+                connection, batch['files'], batch['target_id'], max_parse_workers=parse_workers, user_id=user_id,
+                progress=lambda file_index, text: emit('progress', index, (file_index, text)),
+                on_stats=lambda file_stats: emit('stats', index, file_stats), parse_cache=parse_cache
+            )
+        except Exception as e:
+            logging.error(f"Eroare la importul lotului pentru contul {batch['target_id']}: {e}", exc_info=True)
+            if connection:
+                try: connection.rollback()
+                except Exception: pass
+            message = f"{type(e).__name__}: {e}"
+            emit('error', index, message)
+            return {'stats': None, 'error': message}
+        finally:
+            if connection:
+                connection.close()
+        emit('done', index, stats)
+        return {'stats': stats, 'error': None}
+
+    def batch_size(index):
+        return sum(os.path.getsize(path) for path in batches[index]['files'] if os.path.isfile(path))
+
+    order = sorted(range(len(batches)), key=batch_size, reverse=True)
+    with ThreadPoolExecutor(max_workers=parallel, thread_name_prefix="import-lot") as executor:
+        futures = {index: executor.submit(run_one, index) for index in order}
+        return [dict(batch, **futures[index].result()) for index, batch in enumerate(batches)]
+
+def _history_timing_values(timings):
+    """Valorile coloanelor de durată din istoric_importuri (milisecunde, plus rânduri/s)."""
+    return (
+        int(round(timings.elapsed * 1000)),
+        *(int(round(timings.stages[stage] * 1000)) for stage in IMPORT_STAGES),
+        round(timings.rows_per_second, 1),
+    )
@@ -0,0 +1,242 @@
+# src/BTExtrasViewer/import_watcher.py
+"""
+Serviciu de import automat: urmărește un director în care sosesc extrasele MT940
+și le importă fără intervenția utilizatorului.
+
+Rulare (din directorul src/):
+    python -m BTExtrasViewer.import_watcher            # rulează continuu
+    python -m BTExtrasViewer.import_watcher --once     # o singură scanare (ex. din cron)
+
+Configurația se află în config.ini, secțiunea [ImportWatcher]:
+    watch_dir       - directorul urmărit (obligatoriu);
+    archive_dir     - unde sunt mutate fișierele procesate (implicit <watch_dir>/arhiva);
+    rejected_dir    - unde sunt mutate fișierele fără cont corespunzător (implicit <watch_dir>/respinse);
+    poll_interval   - secunde între scanări (implicit 30);
+    settle_seconds  - cât timp trebuie să rămână un fișier neschimbat înainte de import (implicit 10);
+    extensions      - extensiile acceptate (implicit .sta,.txt,.940,.mt940,.xml).
+
+Fiecare fișier este direcționat către contul al cărui IBAN apare în :25: și importat
+prin aceeași logică pe loturi ca în aplicație (import_engine.run_import_batch).
+"""
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import threading
+import configparser
+from datetime import datetime
+
+import pymysql
+
+from common.config_management import (
+    CONFIG_FILE, read_db_config_from_parser, read_performance_config_from_parser, read_watch_config_from_parser
+)
+from common.db_pool import configure_query_timing
+from BTExtrasViewer.import_engine import connect_import_database, extract_iban_from_mt940, run_import_batch
+
+
+def _normalize_iban(iban):
+    return iban.replace(" ", "").upper() if iban else None
+
+
+class FileStabilityTracker:
+    """
+    Debounce pentru fișierele scrise parțial: un fișier este considerat gata abia după
+    ce dimensiunea și data modificării au rămas neschimbate cel puțin `settle_seconds`.
+    """
+
+    def __init__(self, settle_seconds):
+        self.settle_seconds = settle_seconds
+        self._observed = {}  # cale -> (dimensiune, mtime, momentul primei observări a acestei stări)
+
+    def ready_files(self, file_paths, now=None):
+        now = time.monotonic() if now is None else now
+        ready = []
+        current = {}
+        for path in file_paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue  # fișierul a fost mutat/șters între listare și verificare
+            signature = (stat.st_size, stat.st_mtime)
+            previous = self._observed.get(path)
+            since = previous[2] if previous and previous[:2] == signature else now
+            current[path] = signature + (since,)
+            if stat.st_size > 0 and now - since >= self.settle_seconds:
+                ready.append(path)
+        self._observed = current
+        return ready
+
+    def forget(self, path):
+        self._observed.pop(path, None)
+
+
+def move_to_directory(file_path, target_dir, now=None):
+    """
+    Mută fișierul în `target_dir`/AAAA-LL/, fără a suprascrie un fișier existent
+    (se adaugă un sufix numeric). Returnează noua cale.
+    """
+    month_dir = os.path.join(target_dir, (now or datetime.now()).strftime('%Y-%m'))
+    os.makedirs(month_dir, exist_ok=True)
+    base, ext = os.path.splitext(os.path.basename(file_path))
+    destination = os.path.join(month_dir, base + ext)
+    counter = 1
+    while os.path.exists(destination):
+        destination = os.path.join(month_dir, f"{base}_{counter}{ext}")
+        counter += 1
+    shutil.move(file_path, destination)
+    return destination
+
+
+class ImportWatcher:
+    """Scanează periodic directorul configurat și importă fișierele stabile, grupate pe cont."""
+
+    def __init__(self, db_credentials, settings):
+        self.db_credentials = db_credentials
+        self.settings = settings
+        self.tracker = FileStabilityTracker(settings['settle_seconds'])
+        # Fișierele care au eșuat la import nu sunt reîncercate cât timp rămân neschimbate
+        self._failed_signatures = {}
+
+    def list_candidate_files(self):
+        watch_dir = self.settings['watch_dir']
+        extensions = self.settings['extensions']
+        try:
+            names = os.listdir(watch_dir)
+        except OSError as e:
+            logging.error(f"Directorul urmărit nu poate fi citit ({watch_dir}): {e}")
+            return []
+        paths = []
+        for name in sorted(names):
+            path = os.path.join(watch_dir, name)
+            if os.path.isfile(path) and (not extensions or os.path.splitext(name)[1].lower() in extensions):
+                paths.append(path)
+        return paths
+
+    def _signature(self, path):
+        stat = os.stat(path)
+        return (stat.st_size, stat.st_mtime)
+
+    def route_files(self, file_paths, accounts_by_iban):
+        """Grupează fișierele pe ID de cont. Returnează (dict cont -> fișiere, fișiere fără cont)."""
+        routed, unmatched = {}, []
+        for path in file_paths:
+            account_id = accounts_by_iban.get(_normalize_iban(extract_iban_from_mt940(path)))
+            if account_id is None:
+                unmatched.append(path)
+            else:
+                routed.setdefault(account_id, []).append(path)
+        return routed, unmatched
+
+    def scan_once(self, now=None):
+        """
+        O scanare completă: debounce, direcționare pe cont, import și arhivare.
+        Returnează o listă de rezultate (câte unul pentru fiecare cont importat).
+        """
+        candidates = [path for path in self.list_candidate_files()
+                      if self._failed_signatures.get(path) != self._safe_signature(path)]
+        ready = self.tracker.ready_files(candidates, now)
+        if not ready:
+            return []
+
+        results = []
+        connection = connect_import_database(self.db_credentials)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT id_cont, iban FROM conturi_bancare WHERE iban IS NOT NULL")
+                accounts_by_iban = {_normalize_iban(iban): account_id for account_id, iban in cursor.fetchall()}
+
+            routed, unmatched = self.route_files(ready, accounts_by_iban)
+            for path in unmatched:
+                destination = move_to_directory(path, self.settings['rejected_dir'])
+                self.tracker.forget(path)
+                logging.warning(f"Fișier fără cont corespunzător (IBAN necunoscut), mutat în {destination}")
+
+            for account_id, paths in routed.items():
+                try:
+                    stats = run_import_batch(connection, paths, account_id)
+                except (pymysql.Error, OSError, ValueError) as e:
+                    logging.error(f"Import automat eșuat pentru contul {account_id}: {e}", exc_info=True)
+                    try: connection.rollback()
+                    except Exception: pass
+                    if isinstance(e, (pymysql.OperationalError, pymysql.InterfaceError)):
+                        # Eroare de conexiune / server, trecătoare: fișierele nu sunt marcate ca eșuate,
+                        # iar importul lor este reîncercat (și reluat din punctul salvat) la scanarea următoare
+                        raise
+                    # Fișier invalid sau date respinse: nu se reîncearcă până când fișierul nu se schimbă
+                    for path in paths:
+                        self._failed_signatures[path] = self._safe_signature(path)
+                    continue
+
+                for path in paths:
+                    move_to_directory(path, self.settings['archive_dir'])
+                    self.tracker.forget(path)
+                    self._failed_signatures.pop(path, None)
+                logging.info(f"Import automat cont {account_id}: {len(paths)} fișiere, {stats['inserted']} tranzacții noi, "
+                             f"{stats['ignored']} ignorate, {len(stats['skipped_files'])} fișiere deja importate.")
+                results.append(dict(stats, account_id=account_id))
+        finally:
+            connection.close()
+        return results
+
+    def _safe_signature(self, path):
+        try:
+            return self._signature(path)
+        except OSError:
+            return None
+
+    def run_forever(self, stop_event=None):
+        stop_event = stop_event or threading.Event()
+        logging.info(f"Import automat pornit; se urmărește {self.settings['watch_dir']} "
+                     f"(la fiecare {self.settings['poll_interval']:g} s).")
+        while not stop_event.is_set():
+            try:
+                self.scan_once()
+            except Exception as e:
+                logging.error(f"Eroare în scanarea importului automat: {e}", exc_info=True)
+            stop_event.wait(self.settings['poll_interval'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m BTExtrasViewer.import_watcher",
+                                     description="Importă automat extrasele MT940 dintr-un director urmărit.")
+    parser.add_argument('--config', default=CONFIG_FILE, help=f"Fișierul de configurare (implicit {CONFIG_FILE}).")
+    parser.add_argument('--once', action='store_true', help="O singură scanare, apoi ieșire.")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Jurnal detaliat.")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, stream=sys.stderr,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+    config = configparser.ConfigParser()
+    if os.path.exists(args.config):
+        config.read(args.config, encoding='utf-8')
+    db_credentials = read_db_config_from_parser(config)
+    settings = read_watch_config_from_parser(config)
+    configure_query_timing(read_performance_config_from_parser(config))
+    if not db_credentials or not settings:
+        logging.error(f"Configurație incompletă în {args.config}: sunt necesare secțiunile [Database] și [ImportWatcher] (watch_dir).")
+        return 2
+
+    watcher = ImportWatcher(db_credentials, settings)
+    if args.once:
+        # La o rulare unică nu există scanări anterioare: prima observare și așteptarea fac debounce-ul
+        watcher.tracker.ready_files(watcher.list_candidate_files())
+        time.sleep(settings['settle_seconds'])
+        try:
+            watcher.scan_once()
+        except Exception as e:
+            logging.error(f"Scanarea a eșuat: {e}", exc_info=True)
+            return 1
+        return 0
+
+    try:
+        watcher.run_forever()
+    except KeyboardInterrupt:
+        logging.info("Import automat oprit.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,441 @@
+# src/BTExtrasViewer/mt940_parser.py
+"""
+Parsarea fișierelor MT940 în flux (streaming).
+
+Fișierul este citit linie cu linie și fiecare tranzacție este returnată pe rând,
+astfel încât memoria folosită la import rămâne constantă indiferent de mărimea
+extrasului (extrasele consolidate anuale au zeci de MB).
+"""
+import re
+import time
+import logging
+from datetime import date
+
+# Versiunea rezultatului parsării; se incrementează la orice schimbare a câmpurilor produse,
+# ca intrările vechi din cache-ul de parsare (parse_cache) să nu mai fie folosite.
+PARSER_VERSION = 2
+
+# Expresii regulate pentru câmpurile extrase din descrierea :86:
+RE_CIF = re.compile(r"C\.I\.F\.?:\s?(\d+)")
+RE_FACTURA = re.compile(r"(?:FACT(?:URA)?(?: NR)?(?:\.|:)?\s*|F\.\s*)(\w+)")
+RE_BENEFICIAR = re.compile(r"\b([A-Z][A-Z\s.\-0-9&]{5,})\b")
+RE_TID = re.compile(r"TID:?\s?(\S+)")
+RE_RRN = re.compile(r"RRN:?\s?(\S+)")
+RE_PAN = re.compile(r"PAN:?\s?(\S+)")
+RE_MID = re.compile(r"MID\s*(\d+)")  # Merchant ID pentru tranzacții POS grupate (BT feb 2026)
+
+# Câmpurile cu etichetă din :86: -> (coloană, text obligatoriu în descriere, căutarea regex).
+# Fiecare regex începe cu eticheta sa, deci dacă textul lipsește din descriere potrivirea este
+# imposibilă și căutarea poate fi omisă (verificarea `in` se face în C, fără a porni motorul regex).
+# Grupurile nu pot conține spații (\d+, \w+, \S+), deci nu mai este nevoie de .strip().
+TAGGED_FIELD_SPECS = (
+    ("cif", "C.I.F", RE_CIF.search),
+    ("factura", "F", RE_FACTURA.search),
+    ("tid", "TID", RE_TID.search),
+    ("rrn", "RRN", RE_RRN.search),
+    ("pan", "PAN", RE_PAN.search),
+    ("mid", "MID", RE_MID.search),
+)
+
+# Antetul unei linii :61: -> data (AALLZZ), data înregistrării opțională (LLZZ), C/D, sumă, cod tranzacție
+RE_61_HEADER = re.compile(r"(\d{6})(?:\d{4})?([CD])([\d,]+)([A-Z]{4})")
+# Sold :60F:/:62F: -> C/D, data (AALLZZ), valuta, sumă (ex. C250101RON1000,00)
+RE_BALANCE = re.compile(r"([CD])(\d{6})([A-Z]{3})([\d,]+)")
+# Orice linie care începe un tag SWIFT (:20:, :25:, :28C:, :60F:, :61:, :86:, :62F: etc.)
+RE_TAG_LINE = re.compile(r"^:(\d{2}[A-Z]?):")
+
+# Tag-urile de context ale unui extras și cheia sub care sunt păstrate
+STATEMENT_CONTEXT_TAGS = {
+    "20": "reference",
+    "25": "account",
+    "28C": "statement_no",
+    "60F": "opening_balance",
+    "62F": "closing_balance",
+}
+
+
+# Dimensiunea blocurilor citite din fișier; timpul citirilor (ex. de pe NAS) este măsurat separat de parsare
+READ_BLOCK_SIZE = 1024 * 1024
+# Înregistrările convertite odată de un batch_extractor (vezi iter_parsed_transactions)
+BATCH_EXTRACT_SIZE = 10000
+
+
+def _new_statement_context():
+    return {key: None for key in STATEMENT_CONTEXT_TAGS.values()}
+
+
+def _add_timing(timings, stage, seconds):
+    timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+def _iter_raw_lines(f, timings=None, block_size=None):
+    """
+    Returnează liniile (bytes, fără terminatorul "\n") citind fișierul pe blocuri (implicit READ_BLOCK_SIZE).
+    Dacă `timings` este dat, timpul petrecut în citiri este adăugat la etapa 'read'.
+    """
+    block_size = block_size or READ_BLOCK_SIZE
+    clock = time.perf_counter
+    pending = b""
+    while True:
+        started = clock()
+        block = f.read(block_size)
+        if timings is not None:
+            _add_timing(timings, "read", clock() - started)
+        if not block:
+            break
+        lines = (pending + block).split(b"\n")
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+
+def iter_mt940_records(file_path, timings=None, start_offset=0):
+    """
+    Generator care citește un fișier MT940 linie cu linie și returnează câte o
+    înregistrare (dicționar) pentru fiecare tranzacție :61:.
+
+    Fiecare înregistrare conține:
+      - 'tag61': conținutul liniei :61: (fără tag), inclusiv liniile de continuare;
+      - 'tag86': descrierea :86: cu liniile de continuare unite prin spațiu;
+      - 'context': dicționarul extrasului curent (:20:, :25:, :28C:, :60F:, :62F:).
+
+    Dicționarul 'context' este comun tuturor tranzacțiilor aceluiași extras.
+    Valoarea 'closing_balance' (:62F:) apare în fișier după tranzacții, deci este
+    completată abia după ce ultima tranzacție a extrasului a fost returnată.
+
+    Contextul reține și 'offset', poziția (în octeți) a liniei :20: care începe extrasul.
+    `start_offset` permite citirea de la începutul unui extras (reluarea unui import întrerupt).
+
+    Dacă `timings` (dicționar etapă -> secunde) este dat, timpul citirilor este adăugat la 'read'.
+    """
+    context = dict(_new_statement_context(), offset=start_offset)
+    position = start_offset
+    tag61_lines = None
+    tag86_lines = None
+    current_tag = None
+
+    def build_record():
+        description = " ".join(tag86_lines).strip() if tag86_lines is not None else ""
+        return {"tag61": " ".join(tag61_lines).strip(), "tag86": description, "context": context}
+
+    with open(file_path, "rb") as f:
+        f.seek(start_offset)
+        for raw_line in _iter_raw_lines(f, timings):
+            line_offset = position
+            position += len(raw_line) + 1
+            line = raw_line.decode("utf-8", errors="replace").rstrip("\r\n")
+            tag_match = RE_TAG_LINE.match(line)
+
+            if tag_match is None:
+                # Terminatorii de mesaj SWIFT ("-}", "-") și antetele "{1:..." închid tag-ul curent
+                stripped = line.strip()
+                if stripped == "-" or stripped.startswith("-}") or stripped.startswith("{"):
+                    current_tag = None
+                    continue
+                if current_tag == "61" and tag86_lines is None:
+                    tag61_lines.append(line)
+                elif current_tag == "86" and tag86_lines is not None:
+                    tag86_lines.append(line)
+                continue
+
+            tag = tag_match.group(1)
+            value = line[tag_match.end():]
+
+            if tag == "61":
+                if tag61_lines is not None:
+                    yield build_record()
+                tag61_lines, tag86_lines = [value], None
+                current_tag = "61"
+                continue
+
+            if tag == "86" and tag61_lines is not None and tag86_lines is None:
+                tag86_lines = [value]
+                current_tag = "86"
+                continue
+
+            # Orice alt tag închide tranzacția în curs
+            if tag61_lines is not None:
+                yield build_record()
+                tag61_lines, tag86_lines = None, None
+
+            if tag == "20":
+                context = dict(_new_statement_context(), offset=line_offset)
+            key = STATEMENT_CONTEXT_TAGS.get(tag)
+            if key:
+                context[key] = value.strip()
+            current_tag = tag
+
+    if tag61_lines is not None:
+        yield build_record()
+
+
+def read_statement_reference(file_path):
+    """
+    Returnează referința extrasului sub forma ":20:/:28C:" (ex. "EXTRAS0001/00012/001"),
+    citind doar antetul fișierului (până la prima tranzacție). Returnează None dacă
+    fișierul nu conține niciunul dintre cele două tag-uri.
+    """
+    reference, statement_no = None, None
+    with open(file_path, "rb") as f:
+        for raw_line in f:
+            line = raw_line.decode("utf-8", errors="replace").strip()
+            if line.startswith(":20:") and reference is None:
+                reference = line[4:].strip()
+            elif line.startswith(":28C:") and statement_no is None:
+                statement_no = line[5:].strip()
+            if line.startswith(":61:") or (reference and statement_no):
+                break
+    parts = [part for part in (reference, statement_no) if part]
+    return "/".join(parts) if parts else None
+
+
+def parse_yymmdd(date_str):
+    """
+    Convertește o dată AALLZZ în `date`, cu aceeași regulă de secol ca strptime('%y')
+    (00-68 -> 20xx, 69-99 -> 19xx), dar de câteva ori mai rapid decât strptime.
+    Ridică ValueError pentru o dată invalidă.
+    """
+    year = int(date_str[0:2])
+    return date(year + (2000 if year < 69 else 1900), int(date_str[2:4]), int(date_str[4:6]))
+
+
+def parse_tx_record(record):
+    """
+    Transformă o înregistrare brută (vezi iter_mt940_records) într-un dicționar cu
+    valorile coloanelor din tabela 'tranzactii'. Returnează None dacă linia :61:
+    nu are formatul așteptat.
+    """
+    match61 = RE_61_HEADER.match(record["tag61"])
+    if not match61:
+        return None
+
+    date_str, type_char, amount_str, tx_code_full = match61.groups()
+    full_descr = record["tag86"]
+
+    tx = {
+        "data": parse_yymmdd(date_str),
+        "suma": float(amount_str.replace(',', '.')),
+        "tip": "credit" if type_char == 'C' else "debit",
+        "cod_tranzactie": tx_code_full,
+        "descriere": full_descr,
+    }
+    tx.update(extract_description_fields(full_descr))
+    return tx
+
+
+def extract_description_fields(full_descr):
+    """
+    Extrage CIF, beneficiar, factură, TID, RRN, PAN și MID dintr-o descriere :86:.
+
+    Rezultatul este identic cu cel al celor șapte căutări RE_xxx.search() independente,
+    dar o căutare regex este pornită doar pentru etichetele prezente în text (vezi TAGGED_FIELD_SPECS).
+
+    Nu este o singură trecere prin descriere: o alternanță compilată cu toate etichetele parcursă cu
+    finditer a fost măsurată și este mai lentă în CPython decât verificările `in` plus căutările
+    ancorate pe etichetă (aprox. 2x). Ambele variante sunt măsurate de
+    tests/benchmarks/bench_field_extraction.py (compare_extractors); dacă alternanța devine mai
+    rapidă, extractorul trebuie înlocuit cu varianta finditer de acolo.
+    """
+    fields = {}
+    for name, tag, search in TAGGED_FIELD_SPECS:
+        match = search(full_descr) if tag in full_descr else None
+        fields[name] = match.group(1) if match else None
+
+    beneficiar_match = RE_BENEFICIAR.search(full_descr)
+    fields["beneficiar"] = beneficiar_match.group(1).strip() if beneficiar_match else None
+    return fields
+
+
+def _amount_to_cents(amount_str):
+    """Suma SWIFT ("1234,5") în bani (int), ca soldurile cumulate să nu acumuleze erori de rotunjire."""
+    units, _, fraction = amount_str.partition(',')
+    return int(units or 0) * 100 + int((fraction + "00")[:2])
+
+
+def parse_balance(value):
+    """
+    Parsează un sold :60F:/:62F: (ex. "C250101RON1000,00") într-un dicționar
+    {'date', 'currency', 'cents'} cu suma cu semn (debit negativ). Returnează None dacă lipsește.
+    """
+    match = RE_BALANCE.match(value or "")
+    if not match:
+        return None
+    mark, date_str, currency, amount_str = match.groups()
+    cents = _amount_to_cents(amount_str)
+    return {"date": parse_yymmdd(date_str), "currency": currency, "cents": cents if mark == 'C' else -cents}
+
+
+class StatementBalances:
+    """
+    Soldurile unui extras, calculate pe măsură ce tranzacțiile sunt returnate: 'sold_dupa_tranzactie'
+    este soldul inițial (:60F:) plus suma cumulată (în bani) a mișcărilor de până atunci, iar
+    'sold_initial' / 'sold_final' sunt soldurile :60F: / :62F: ale extrasului. Soldul :62F: apare în
+    fișier după tranzacții, deci este primit din afară (vezi read_closing_balances).
+    """
+
+    def __init__(self, context, closing_balance):
+        self.context = context
+        self.opening = parse_balance(context.get("opening_balance"))
+        closing = parse_balance(closing_balance)
+        self.opening_value = self.opening["cents"] / 100 if self.opening else None
+        self.closing_value = closing["cents"] / 100 if closing else None
+        self.running = self.opening["cents"] if self.opening else None
+        self.count = 0
+
+    def apply(self, tx):
+        """Completează soldurile tranzacției (următoarea din extras)."""
+        self.count += 1
+        if self.running is not None:
+            self.running += round(tx["suma"] * 100) if tx["tip"] == "credit" else -round(tx["suma"] * 100)
+        tx["sold_initial"] = self.opening_value
+        tx["sold_final"] = self.closing_value
+        tx["sold_dupa_tranzactie"] = self.running / 100 if self.running is not None else None
+        return tx
+
+    def summary(self):
+        """
+        Rezumatul extrasului, după ultima tranzacție; indică și dacă soldul final calculat
+        corespunde celui din :62F: ('consistent').
+        """
+        closing = parse_balance(self.context.get("closing_balance"))
+        return summarize_statement(self.context, self.opening, closing, self.running, self.count)
+
+
+def summarize_statement(context, opening, closing, computed_closing, transaction_count):
+    """
+    Rezumatul unui extras (vezi StatementBalances.summary), din soldurile parsate (parse_balance)
+    și soldul final calculat în bani. Comun pentru MT940 și CAMT.053.
+    """
+    consistent = bool(opening and closing and computed_closing == closing["cents"])
+    if opening and closing and not consistent:
+        logging.warning(f"Extrasul {context.get('reference')}/{context.get('statement_no')}: soldul final calculat "
+                        f"({computed_closing / 100:.2f}) diferă de cel declarat ({closing['cents'] / 100:.2f}).")
+    return {
+        "reference": context.get("reference"),
+        "statement_no": context.get("statement_no"),
+        "account": context.get("account"),
+        "opening_date": opening["date"] if opening else None,
+        "opening_balance": opening["cents"] / 100 if opening else None,
+        "closing_date": closing["date"] if closing else None,
+        "closing_balance": closing["cents"] / 100 if closing else None,
+        "currency": (closing or opening or {}).get("currency"),
+        "transactions": transaction_count,
+        "consistent": consistent,
+        "offset": context.get("offset"),
+    }
+
+
+def read_closing_balances(file_path, timings=None, start_offset=0):
+    """
+    Soldurile finale (:62F:) ale extraselor din fișier, după poziția extrasului (cheia 'offset' din
+    contextul returnat de iter_mt940_records). Este o trecere rapidă peste linii, fără tranzacții reținute,
+    deci memoria crește doar cu numărul de extrase, nu cu mărimea lor.
+    """
+    closings = {}
+    statement_offset = position = start_offset
+    with open(file_path, "rb") as f:
+        f.seek(start_offset)
+        for raw_line in _iter_raw_lines(f, timings):
+            if raw_line.startswith(b":20:"):
+                statement_offset = position
+            elif raw_line.startswith(b":62F:"):
+                closings[statement_offset] = raw_line[5:].decode("utf-8", errors="replace").strip()
+            position += len(raw_line) + 1
+    return closings
+
+
+def iter_parsed_transactions(file_path, timings=None, statements=None, start_offset=0, batch_extractor=None):
+    """
+    Generator cu tranzacțiile parsate (vezi parse_tx_record) dintr-un fișier MT940.
+
+    Tranzacțiile sunt returnate pe măsura citirii, cu soldurile completate (vezi StatementBalances),
+    deci memoria rămâne constantă și pentru un singur extras consolidat de zeci de MB. Soldurile
+    finale :62F:, aflate după tranzacțiile fiecărui extras, sunt citite înainte printr-o trecere
+    separată peste fișier (read_closing_balances).
+
+    Dacă `statements` (listă) este dat, la el se adaugă rezumatul fiecărui extras, înainte de returnarea
+    ultimei lui tranzacții; rezumatul are și 'offset', poziția extrasului în fișier, de la care parsarea
+    poate fi reluată (`start_offset`).
+    Dacă `timings` (dicționar etapă -> secunde) este dat, sunt cumulate etapele
+    'read' (citirea fișierului), 'tokenize' (împărțirea în tag-uri) și 'extract'
+    (conversia valorilor, extragerea câmpurilor din :86: și calculul soldurilor).
+
+    `batch_extractor` (opțional) înlocuiește parse_tx_record pe înregistrări cu o conversie pe loturi de
+    cel mult BATCH_EXTRACT_SIZE înregistrări ale aceluiași extras: primește lista înregistrărilor și
+    returnează tranzacțiile (vezi mt940_vectorized).
+    """
+    clock = time.perf_counter
+    read_before = timings.get("read", 0.0) if timings is not None else 0.0
+    started = clock()
+    closings = read_closing_balances(file_path, timings, start_offset)
+    tokenize_and_read = clock() - started
+    records = iter_mt940_records(file_path, timings, start_offset)
+    balances, pending_records = None, []
+    # Tranzacțiile convertite sunt returnate după citirea înregistrării următoare: dacă aceasta începe alt
+    # extras, rezumatul extrasului curent este adăugat înaintea ultimei lui tranzacții (ca înainte de
+    # returnarea ei punctul de reluare al importului, ImportCheckpoint, să cunoască extrasul)
+    pending = []
+
+    def extract_pending():
+        started = clock()
+        transactions = [balances.apply(tx) for tx in batch_extractor(pending_records)]
+        pending_records.clear()
+        if timings is not None:
+            _add_timing(timings, "extract", clock() - started)
+        return transactions
+
+    try:
+        while True:
+            started = clock()
+            record = next(records, None)
+            tokenized = clock()
+            tokenize_and_read += tokenized - started
+            new_statement = record is None or balances is None or record["context"] is not balances.context
+            if new_statement:
+                # Extrasul anterior este complet (inclusiv :62F:): rezumatul poate fi adăugat
+                if pending_records:
+                    pending.extend(extract_pending())
+                if balances is not None and statements is not None:
+                    statements.append(balances.summary())
+            if pending:
+                yield from pending
+                pending = []
+            if record is None:
+                break
+            if new_statement:
+                context = record["context"]
+                balances = StatementBalances(context, closings.get(context["offset"]))
+            if batch_extractor is not None:
+                pending_records.append(record)
+                if len(pending_records) >= BATCH_EXTRACT_SIZE:
+                    pending = extract_pending()
+                continue
+            tx = parse_tx_record(record)
+            if tx is not None:
+                pending.append(balances.apply(tx))
+            if timings is not None:
+                _add_timing(timings, "extract", clock() - tokenized)
+    finally:
+        if timings is not None:
+            # Timpul citirilor este măsurat în iter_mt940_records; tokenizarea este restul
+            _add_timing(timings, "tokenize", tokenize_and_read - (timings.get("read", 0.0) - read_before))
+
+
+def parse_statement_file(file_path):
+    """
+    Parsează integral un fișier MT940 și returnează lista tranzacțiilor.
+    Este punctul de intrare pentru procesele din ProcessPoolExecutor (funcție de nivel
+    de modul, fără dependențe de Tk sau DB, ca să poată fi serializată între procese).
+    """
+    return list(iter_parsed_transactions(file_path))
+
+
+def parse_statement_file_with_info(file_path):
+    """
+    Ca parse_statement_file, dar returnează (tranzacții, informații), unde informațiile sunt
+    {'timings': timpii pe etape, 'statements': rezumatele extraselor} (pentru import).
+    """
+    info = {"timings": {}, "statements": []}
+    transactions = list(iter_parsed_transactions(file_path, info["timings"], info["statements"]))
+    return transactions, info
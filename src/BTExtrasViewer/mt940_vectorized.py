@@ -0,0 +1,76 @@
+# src/BTExtrasViewer/mt940_vectorized.py
+"""
+Extragerea vectorizată (pandas) a câmpurilor tranzacțiilor unui extras MT940.
+
+În locul apelului parse_tx_record pentru fiecare înregistrare, liniile :61: și descrierile
+:86: ale unui lot de înregistrări din extras (cel mult mt940_parser.BATCH_EXTRACT_SIZE, ca memoria
+să nu crească cu mărimea extrasului) sunt puse în câte o Series, iar câmpurile sunt extrase pe coloane:
+antetul :61: și câmpurile cu etichetă (CIF, factură, TID, RRN, PAN, MID, beneficiar) cu
+Series.str.extract, sumele cu pd.to_numeric, iar datele cu pd.to_datetime(format='%y%m%d').
+Rezultatul este identic cu cel al parse_tx_record (aceleași expresii regulate, aceeași regulă
+de secol pentru AA), deci cele două căi sunt interschimbabile la import.
+
+Modulul este separat de mt940_parser pentru ca procesele de parsare din pool să nu importe pandas.
+Comparația cu bucla pe înregistrări: tests/benchmarks/test_import_benchmarks.py (grupul "extragere").
+"""
+import numpy as np
+import pandas as pd
+
+from BTExtrasViewer.mt940_parser import RE_61_HEADER, RE_BENEFICIAR, TAGGED_FIELD_SPECS
+
+
+def _column_values(series):
+    """Valorile coloanei ca listă Python, cu None în locul valorilor lipsă (NaN)."""
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def extract_description_columns(descriptions):
+    """
+    Câmpurile din descrierile :86: (Series de text), pe coloane: {câmp: listă de valori sau None}.
+    Echivalent cu extract_description_fields aplicat fiecărei descrieri.
+    """
+    columns = {}
+    for name, tag, search in TAGGED_FIELD_SPECS:
+        # Ca în extractorul pe înregistrări: regex-ul este aplicat doar descrierilor care conțin eticheta
+        has_tag = descriptions.str.contains(tag, regex=False)
+        values = pd.Series(None, index=descriptions.index, dtype=object)
+        if has_tag.any():
+            # search este metoda legată a expresiei compilate (RE_CIF.search etc.)
+            values[has_tag] = descriptions[has_tag].str.extract(search.__self__, expand=False)
+        columns[name] = _column_values(values)
+    columns["beneficiar"] = _column_values(descriptions.str.extract(RE_BENEFICIAR, expand=False).str.strip())
+    return columns
+
+
+def parse_tx_records(records):
+    """
+    Transformă înregistrările brute ale unui extras (vezi mt940_parser.iter_mt940_records) în
+    tranzacții, ca parse_tx_record, dar pe coloane. Înregistrările cu antet :61: invalid sunt omise.
+    Ridică ValueError pentru o dată invalidă, ca parse_tx_record.
+    """
+    if not records:
+        return []
+    # RE_61_HEADER.match este ancorat la început; str.extract caută, deci ancora este explicită
+    header_parts = pd.Series([record["tag61"] for record in records], dtype=object).str.extract(
+        "^" + RE_61_HEADER.pattern
+    )
+    valid = header_parts[0].notna().to_numpy()
+    if not valid.all():
+        header_parts = header_parts[valid]
+    if header_parts.empty:
+        return []
+    descriptions = pd.Series([record["tag86"] for record, ok in zip(records, valid) if ok], dtype=object)
+
+    dates = pd.to_datetime(header_parts[0], format="%y%m%d").dt.date.tolist()
+    amounts = pd.to_numeric(header_parts[2].str.replace(",", ".", regex=False)).tolist()
+    types = np.where(header_parts[1].to_numpy() == "C", "credit", "debit").tolist()
+    columns = {
+        "data": dates,
+        "suma": amounts,
+        "tip": types,
+        "cod_tranzactie": header_parts[3].tolist(),
+        "descriere": descriptions.tolist(),
+    }
+    columns.update(extract_description_columns(descriptions))
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*columns.values())]
@@ -0,0 +1,170 @@
+# src/BTExtrasViewer/parse_cache.py
+"""
+Cache pe disc pentru extrasele MT940 deja parsate.
+
+Fiecare intrare corespunde unui fișier și este identificată prin (cale, mtime, mărime,
+versiunea parserului): dacă fișierul este modificat, mutat sau parserul se schimbă, cheia
+nu mai corespunde și fișierul este parsat din nou. Intrările sunt scrise în APP_DATA_DIR,
+așa că reselectarea arhivelor de pe share-uri de rețea (rutare după IBAN, import) nu mai
+citește și nu mai tokenizează fișierele a doua oară.
+
+Formatul unei intrări: antet (MAGIC), apoi metadatele (pickle: IBAN, hash, referință) și
+tranzacțiile pe coloane (pickle comprimat cu zlib). Metadatele pot fi citite fără a
+decomprima tranzacțiile, pentru rutarea rapidă după IBAN.
+"""
+import os
+import zlib
+import pickle
+import hashlib
+import logging
+
+from common.config_management import APP_DATA_DIR
+from BTExtrasViewer.mt940_parser import PARSER_VERSION
+
+PARSE_CACHE_DIR = os.path.join(APP_DATA_DIR, "parse_cache")
+PARSE_CACHE_MAGIC = b"BTXPC1\n"
+# Fișierele mai mari nu sunt păstrate (ar dubla memoria importului în flux)
+PARSE_CACHE_MAX_TRANSACTIONS = 200000
+# Mărimea maximă a directorului; intrările cel mai puțin recent folosite sunt șterse primele
+PARSE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+
+def _to_columns(transactions):
+    columns = tuple(transactions[0].keys()) if transactions else ()
+    return columns, [[tx.get(column) for tx in transactions] for column in columns]
+
+
+def _from_columns(columns, values):
+    return [dict(zip(columns, row)) for row in zip(*values)] if columns else []
+
+
+class ParseCache:
+    """Cache de extrase parsate, cu câte un fișier binar per extras sursă."""
+
+    def __init__(self, directory=PARSE_CACHE_DIR, max_transactions=PARSE_CACHE_MAX_TRANSACTIONS,
+                 max_bytes=PARSE_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_transactions = max_transactions
+        self.max_bytes = max_bytes
+
+    def file_key(self, file_path):
+        """Cheia curentă a fișierului (cale absolută, mtime în ns, mărime) sau None dacă nu există."""
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        return os.path.normcase(os.path.abspath(file_path)), st.st_mtime_ns, st.st_size
+
+    def _entry_path(self, key):
+        digest = hashlib.sha1(repr((key, PARSER_VERSION)).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.bin")
+
+    def _open_entry(self, file_path):
+        key = self.file_key(file_path)
+        if key is None:
+            return None, None
+        entry_path = self._entry_path(key)
+        try:
+            f = open(entry_path, "rb")
+        except OSError:
+            return None, None
+        if f.read(len(PARSE_CACHE_MAGIC)) != PARSE_CACHE_MAGIC:
+            f.close()
+            return None, None
+        return f, entry_path
+
+    def read_meta(self, file_path):
+        """Metadatele intrării ('iban', 'hash', 'size', 'reference', 'transactions') sau None la ratare."""
+        f, entry_path = self._open_entry(file_path)
+        if f is None:
+            return None
+        try:
+            with f:
+                return pickle.load(f)
+        except Exception as e:
+            logging.debug(f"Cache parsare: intrare coruptă {entry_path}: {e}")
+            self._discard(entry_path)
+            return None
+
+    def load(self, file_path):
+        """Returnează (metadate, tranzacții, rezumatele extraselor) din cache sau None la ratare."""
+        f, entry_path = self._open_entry(file_path)
+        if f is None:
+            return None
+        try:
+            with f:
+                meta = pickle.load(f)
+                columns, values, statements = pickle.loads(zlib.decompress(f.read()))
+        except Exception as e:
+            logging.debug(f"Cache parsare: intrare coruptă {entry_path}: {e}")
+            self._discard(entry_path)
+            return None
+        try:
+            os.utime(entry_path)  # intrarea devine cea mai recent folosită
+        except OSError:
+            pass
+        return meta, _from_columns(columns, values), statements
+
+    def store(self, file_path, key, transactions, statements, **meta):
+        """
+        Salvează rezultatul parsării fișierului, dacă acesta nu s-a schimbat față de `key`
+        (cheia citită înainte de parsare). Returnează True dacă intrarea a fost scrisă.
+        """
+        if key is None or len(transactions) > self.max_transactions or self.file_key(file_path) != key:
+            return False
+        meta = dict(meta, transactions=len(transactions))
+        entry_path = self._entry_path(key)
+        temp_path = f"{entry_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            payload = zlib.compress(pickle.dumps((*_to_columns(transactions), statements), pickle.HIGHEST_PROTOCOL), 1)
+            with open(temp_path, "wb") as f:
+                f.write(PARSE_CACHE_MAGIC)
+                pickle.dump(meta, f, pickle.HIGHEST_PROTOCOL)
+                f.write(payload)
+            os.replace(temp_path, entry_path)
+        except OSError as e:
+            logging.warning(f"Cache parsare: intrarea pentru {os.path.basename(file_path)} nu a putut fi scrisă: {e}")
+            self._discard(temp_path)
+            return False
+        self.prune()
+        return True
+
+    def prune(self):
+        """Șterge intrările cel mai puțin recent folosite până când directorul încape în max_bytes."""
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".bin")]
+        except OSError:
+            return
+        stats = [(entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in entries]
+        total = sum(size for _, size, _ in stats)
+        for _, size, path in sorted(stats):
+            if total <= self.max_bytes:
+                break
+            self._discard(path)
+            total -= size
+
+    def clear(self):
+        """Golește cache-ul."""
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return
+        for entry in entries:
+            self._discard(entry.path)
+
+    @staticmethod
+    def _discard(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def default_parse_cache():
+    """
+    Cache-ul din APP_DATA_DIR, folosit de aplicație și de importul din linia de comandă.
+    Watcher-ul (import_watcher) nu îl folosește: mută fiecare fișier în arhivă imediat după import,
+    iar intrările, identificate prin cale, nu ar mai fi găsite niciodată.
+    """
+    return ParseCache()
@@ -14,6 +14,7 @@ import pymysql
 import logging
 import hashlib
 import re
+import os
 
 class RoleManagerDialog(simpledialog.Dialog):
     """Dialog pentru managementul complet al rolurilor și permisiunilor."""
@@ -426,7 +427,7 @@ class TransactionTypeManagerDialog(simpledialog.Dialog):
         for item in self.types_tree.get_children(): self.types_tree.delete(item)
         if not self.db_handler.is_connected(): return
         
-        types_data = self.db_handler.fetch_all_dict("SELECT cod, descriere_tip FROM tipuri_tranzactii ORDER BY cod")
+        types_data = self.db_handler.fetch_all_dict("SELECT cod, descriere_tip FROM tipuri_tranzactii ORDER BY cod", cached=True)
         if types_data:
             for type_info in types_data:
                 cod = type_info['cod']
@@ -1556,4 +1557,175 @@ class ResetPasswordWithTokenDialog(simpledialog.Dialog):
             self.result = True
         else:
             messagebox.showerror("Eroare DB", "Nu s-a putut actualiza parola în baza de date.", parent=self)
-            self.result = False
\ No newline at end of file
+            self.result = False
+
+class ImportPreviewDialog(simpledialog.Dialog):
+    """
+    Rezultatul previzualizării importului: pentru fiecare fișier, câte tranzacții sunt noi,
+    câte sunt duplicate și câte au coduri de tranzacție necunoscute; sub tabel, câteva dintre
+    tranzacțiile noi ale fișierului selectat. 'Importă' setează result = True.
+    """
+    def __init__(self, parent, results, account_names, can_import=True):
+        self.results = results
+        self.account_names = account_names
+        self.can_import = can_import
+        self.result = False
+        super().__init__(parent, "Previzualizare Import")
+
+    def body(self, master):
+        tree_frame = ttk.Frame(master)
+        tree_frame.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=10, pady=10)
+        cols = ("cont", "fisier", "tranzactii", "noi", "duplicate", "necunoscute", "stare")
+        self.tree = ttk.Treeview(tree_frame, columns=cols, show="headings", height=12)
+        headings = {"cont": ("Cont", 140, "w"), "fisier": ("Fișier", 220, "w"), "tranzactii": ("Tranzacții", 80, "e"),
+                    "noi": ("Noi", 70, "e"), "duplicate": ("Duplicate", 80, "e"),
+                    "necunoscute": ("Coduri necunoscute", 140, "w"), "stare": ("Stare", 120, "w")}
+        for col, (text, width, anchor) in headings.items():
+            self.tree.heading(col, text=text)
+            self.tree.column(col, width=width, anchor=anchor, stretch=(col == "fisier"))
+        self.tree.tag_configure('deja_importat', foreground='gray')
+        self.tree.tag_configure('necunoscut', background='#FCF3CF')
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+
+        total_new = total_duplicates = 0
+        unknown_codes = set()
+        self.previews = []
+        for batch in self.results:
+            account_name = self.account_names.get(batch['account_id'], str(batch['account_id']))
+            total_new += batch['new']
+            total_duplicates += batch['duplicates']
+            unknown_codes.update(batch['unknown_codes'])
+            for preview in batch['files']:
+                if preview['already_imported']:
+                    values = (account_name, os.path.basename(preview['file']), "-", "-", "-", "", "Deja importat")
+                    tags = ('deja_importat',)
+                else:
+                    values = (account_name, os.path.basename(preview['file']), preview['transactions'], preview['new'],
+                              preview['duplicates'], ", ".join(preview['unknown_codes']), "De importat")
+                    tags = ('necunoscut',) if preview['unknown_codes'] else ()
+                self.tree.insert("", tk.END, iid=str(len(self.previews)), values=values, tags=tags)
+                self.previews.append(preview)
+        self.tree.bind("<<TreeviewSelect>>", self._show_sample)
+
+        sample_cols = ("data", "suma", "tip", "descriere")
+        self.sample_tree = ttk.Treeview(master, columns=sample_cols, show="headings", height=6)
+        for col, text, width, anchor in (("data", "Data", 90, "w"), ("suma", "Sumă", 90, "e"),
+                                         ("tip", "Tip", 60, "w"), ("descriere", "Descriere (tranzacții noi)", 470, "w")):
+            self.sample_tree.heading(col, text=text)
+            self.sample_tree.column(col, width=width, anchor=anchor, stretch=(col == "descriere"))
+        self.sample_tree.pack(side=tk.TOP, fill=tk.X, padx=10, pady=(0, 10))
+
+        summary = f"Total: {total_new} tranzacții noi, {total_duplicates} duplicate."
+        if unknown_codes:
+            summary += f"\nCoduri de tranzacție necunoscute (vor fi adăugate la import): {', '.join(sorted(unknown_codes))}"
+        ttk.Label(master, text=summary, justify=tk.LEFT).pack(side=tk.TOP, anchor="w", padx=10, pady=(0, 10))
+        return self.tree
+
+    def _show_sample(self, event=None):
+        self.sample_tree.delete(*self.sample_tree.get_children())
+        selection = self.tree.selection()
+        if not selection:
+            return
+        for tx in self.previews[int(selection[0])]['sample']:
+            self.sample_tree.insert("", tk.END, values=(tx['data'], f"{tx['suma']:.2f}", tx['tip'], tx['descriere']))
+
+    def buttonbox(self):
+        box = ttk.Frame(self)
+        import_button = ttk.Button(box, text="Importă", width=12, command=self.ok,
+                                   state=tk.NORMAL if self.can_import else tk.DISABLED)
+        import_button.pack(side=tk.LEFT, padx=5, pady=5)
+        ttk.Button(box, text="Închide", width=12, command=self.cancel).pack(side=tk.LEFT, padx=5, pady=5)
+        self.bind("<Escape>", self.cancel)
+        box.pack()
+
+    def apply(self):
+        self.result = True
+
+
+class QueryPerformanceDialog(simpledialog.Dialog):
+    """
+    Interogările SQL executate de aplicație de la pornire (sau de la ultima resetare), descrescător după
+    timpul total: execuții, durata totală / medie / maximă, rânduri, erori și locul din cod al apelului.
+    Textul complet și toate locurile apelului interogării selectate sunt afișate sub tabel.
+    """
+    def __init__(self, parent, stats):
+        self.stats = stats
+        self.rows = []
+        super().__init__(parent, "Performanță Interogări")
+
+    def body(self, master):
+        tree_frame = ttk.Frame(master)
+        tree_frame.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=10, pady=(10, 5))
+        cols = ("interogare", "apeluri", "total", "medie", "maxim", "randuri", "erori", "apelant")
+        self.tree = ttk.Treeview(tree_frame, columns=cols, show="headings", height=15, selectmode="browse")
+        headings = {"interogare": ("Interogare", 380, "w"), "apeluri": ("Apeluri", 70, "e"),
+                    "total": ("Total (ms)", 90, "e"), "medie": ("Medie (ms)", 90, "e"), "maxim": ("Maxim (ms)", 90, "e"),
+                    "randuri": ("Rânduri", 80, "e"), "erori": ("Erori", 60, "e"), "apelant": ("Apelat din", 220, "w")}
+        for col, (text, width, anchor) in headings.items():
+            self.tree.heading(col, text=text)
+            self.tree.column(col, width=width, anchor=anchor, stretch=(col == "interogare"))
+        self.tree.tag_configure('lenta', background='#FADBD8')
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.bind("<<TreeviewSelect>>", self._show_details)
+
+        self.details_text = tk.Text(master, height=6, wrap=tk.WORD, state=tk.DISABLED)
+        self.details_text.pack(side=tk.TOP, fill=tk.X, padx=10, pady=5)
+        self.summary_label = ttk.Label(master, justify=tk.LEFT)
+        self.summary_label.pack(side=tk.TOP, anchor="w", padx=10, pady=(0, 10))
+        self._load()
+        return self.tree
+
+    def _load(self):
+        self.tree.delete(*self.tree.get_children())
+        self.rows = self.stats.snapshot()
+        threshold = self.stats.slow_query_ms
+        for index, row in enumerate(self.rows):
+            call_site = row['call_sites'][0][0] if row['call_sites'] else ""
+            if len(row['call_sites']) > 1:
+                call_site += f" (+{len(row['call_sites']) - 1})"
+            values = (row['query'], row['calls'], f"{row['total_ms']:.1f}", f"{row['mean_ms']:.1f}",
+                      f"{row['max_ms']:.1f}", row['rows'], row['errors'], call_site)
+            tags = ('lenta',) if threshold > 0 and row['max_ms'] >= threshold else ()
+            self.tree.insert("", tk.END, iid=str(index), values=values, tags=tags)
+
+        total_ms = sum(row['total_ms'] for row in self.rows)
+        calls = sum(row['calls'] for row in self.rows)
+        summary = f"{len(self.rows)} interogări distincte, {calls} execuții, {total_ms / 1000:.2f} s în total."
+        if threshold > 0:
+            summary += (f"\nRândurile evidențiate au depășit cel puțin o dată pragul de {threshold:g} ms; "
+                        f"aceste execuții sunt scrise în {self.stats.slow_query_log}.")
+        self.summary_label.config(text=summary)
+        self._set_details("")
+
+    def _show_details(self, event=None):
+        selection = self.tree.selection()
+        if not selection:
+            return
+        row = self.rows[int(selection[0])]
+        call_sites = "\n".join(f"  {site} - {count} apeluri" for site, count in row['call_sites'])
+        self._set_details(f"{row['query']}\n\nApelată din:\n{call_sites}")
+
+    def _set_details(self, text):
+        self.details_text.config(state=tk.NORMAL)
+        self.details_text.delete("1.0", tk.END)
+        self.details_text.insert("1.0", text)
+        self.details_text.config(state=tk.DISABLED)
+
+    def _reset(self):
+        if messagebox.askyesno("Resetare Statistici", "Ștergeți statisticile interogărilor colectate până acum?", parent=self):
+            self.stats.reset()
+            self._load()
+
+    def buttonbox(self):
+        box = ttk.Frame(self)
+        ttk.Button(box, text="Reîmprospătează", width=15, command=self._load).pack(side=tk.LEFT, padx=5, pady=5)
+        ttk.Button(box, text="Resetează", width=12, command=self._reset).pack(side=tk.LEFT, padx=5, pady=5)
+        ttk.Button(box, text="Închide", width=12, command=self.cancel).pack(side=tk.LEFT, padx=5, pady=5)
+        self.bind("<Escape>", self.cancel)
+        box.pack()
@@ -2,7 +2,9 @@
 import io
 import os
 import logging
+from collections import defaultdict
 import numpy as np
+import pymysql
 import matplotlib.pyplot as plt
 import tempfile
 import tkinter as tk
@@ -591,45 +593,24 @@ class BalanceEvolutionReportDialog(tk.Toplevel):
 
         # Combinăm filtrele
         filter_sql = access_sql + visibility_sql
-        
-        # Aplicăm filtrele la interogarea pentru soldul inițial
-        initial_balance_query = f"""
-            SELECT SUM(CASE WHEN tip = 'credit' THEN suma ELSE -suma END)
-            FROM tranzactii
-            WHERE id_cont_fk = %s AND data < %s
-            {filter_sql}
-        """
-        initial_balance_params = [account_id, start_date] + access_params + visibility_params
-        initial_balance_result = self.db_handler.fetch_scalar(initial_balance_query, tuple(initial_balance_params))
-        initial_balance = float(initial_balance_result) if initial_balance_result is not None else 0.0
-        logging.debug(f"DEBUG_REPORT (filtrat): Sold inițial calculat (înainte de {start_date}): {initial_balance}")
 
-        # Aplicăm filtrele la interogarea pentru tranzacțiile din perioadă
-        transactions_query = f"""
-            SELECT data, suma, tip
-            FROM tranzactii
-            WHERE id_cont_fk = %s AND data BETWEEN %s AND %s
-            {filter_sql}
-            ORDER BY data ASC, id ASC
-        """
-        transactions_params = [account_id, start_date, end_date] + access_params + visibility_params
-        transactions = self.db_handler.fetch_all_dict(transactions_query, tuple(transactions_params))
-        
-        # ... (restul metodei, care procesează datele, rămâne neschimbat) ...
-        if not transactions and initial_balance == 0:
+        # Fără filtre, soldurile zilnice vin direct din soldurile extraselor salvate la import
+        precomputed = None
+        if not access_sql and self._all_tx_codes_visible(visible_tx_codes):
+            precomputed = self._load_precomputed_daily_balances(account_id, start_date, end_date)
+
+        if precomputed is not None:
+            initial_balance, daily_closings = precomputed
+            all_days = pd.date_range(start=start_date, end=end_date, freq='D')
+            final_daily_balances = daily_closings.reindex(all_days, method='ffill').fillna(initial_balance)
+        else:
+            final_daily_balances = self._compute_daily_balances_from_transactions(
+                account_id, start_date, end_date, filter_sql, access_params + visibility_params
+            )
+
+        if final_daily_balances is None:
             self.report_data = []
         else:
-            all_days = pd.date_range(start=start_date, end=end_date, freq='D')
-            daily_balances = pd.Series(index=all_days, dtype=float).fillna(0)
-            if transactions:
-                df = pd.DataFrame(transactions)
-                df['data'] = pd.to_datetime(df['data'])
-                df['net_change'] = df.apply(lambda row: float(row['suma']) if row['tip'] == 'credit' else -float(row['suma']), axis=1)
-                daily_changes = df.groupby('data')['net_change'].sum()
-                daily_balances = daily_balances.add(daily_changes, fill_value=0)
-            
-            final_daily_balances = daily_balances.cumsum() + initial_balance
-            
             if granularity == 'Lună':
                 sampled_balances = final_daily_balances.resample('M').last()
             elif granularity == 'Anuală':
@@ -653,6 +634,98 @@ class BalanceEvolutionReportDialog(tk.Toplevel):
             
         self._update_chart()
 
+    def _all_tx_codes_visible(self, visible_tx_codes):
+        """True dacă filtrul de vizibilitate nu ascunde niciun tip de tranzacție."""
+        if not visible_tx_codes:
+            return True
+        all_codes = self.db_handler.fetch_all_dict("SELECT cod FROM tipuri_tranzactii", cached=True) or []
+        return {row['cod'] for row in all_codes} <= set(visible_tx_codes)
+
+    def _load_precomputed_daily_balances(self, account_id, start_date, end_date):
+        """
+        Soldurile la sfârșitul zilei din 'extrase_solduri' (:62F:, salvate la import).
+        Returnează (sold_inițial, serie sold_final pe zile) sau None dacă există tranzacții
+        importate fără solduri (ex. înainte de această versiune) și trebuie folosit calculul complet.
+        """
+        has_unbalanced = self.db_handler.fetch_scalar(
+            "SELECT 1 FROM tranzactii WHERE id_cont_fk = %s AND data <= %s AND sold_dupa_tranzactie IS NULL LIMIT 1",
+            (account_id, end_date)
+        )
+        if has_unbalanced:
+            return None
+
+        statements = self.db_handler.fetch_all_dict(
+            "SELECT data_sold_initial, sold_initial, data_sold_final, sold_final FROM extrase_solduri "
+            "WHERE id_cont_fk = %s AND data_sold_final BETWEEN %s AND %s ORDER BY data_sold_final, id",
+            (account_id, start_date, end_date)
+        ) or []
+        previous = self.db_handler.fetch_one_dict(
+            "SELECT sold_final FROM extrase_solduri WHERE id_cont_fk = %s AND data_sold_final < %s "
+            "ORDER BY data_sold_final DESC, id DESC LIMIT 1",
+            (account_id, start_date)
+        )
+        if previous:
+            initial_balance = float(previous['sold_final'])
+        elif statements and statements[0]['sold_initial'] is not None:
+            initial_balance = float(statements[0]['sold_initial'])
+        elif not statements:
+            return None
+        else:
+            initial_balance = 0.0
+
+        closings = pd.Series(
+            [float(row['sold_final']) for row in statements],
+            index=pd.to_datetime([row['data_sold_final'] for row in statements]), dtype=float
+        )
+        # Mai multe extrase în aceeași zi: contează ultimul
+        closings = closings[~closings.index.duplicated(keep='last')]
+        logging.debug(f"DEBUG_REPORT: Solduri precalculate din {len(statements)} extrase, sold inițial {initial_balance}")
+        return initial_balance, closings
+
+    def _compute_daily_balances_from_transactions(self, account_id, start_date, end_date, filter_sql, filter_params):
+        """Calculul complet (cu filtre): soldul inițial din tot istoricul plus mișcările zilnice din perioadă."""
+        # Aplicăm filtrele la interogarea pentru soldul inițial
+        initial_balance_query = f"""
+            SELECT SUM(CASE WHEN tip = 'credit' THEN suma ELSE -suma END)
+            FROM tranzactii
+            WHERE id_cont_fk = %s AND data < %s
+            {filter_sql}
+        """
+        initial_balance_params = [account_id, start_date] + filter_params
+        initial_balance_result = self.db_handler.fetch_scalar(initial_balance_query, tuple(initial_balance_params))
+        initial_balance = float(initial_balance_result) if initial_balance_result is not None else 0.0
+        logging.debug(f"DEBUG_REPORT (filtrat): Sold inițial calculat (înainte de {start_date}): {initial_balance}")
+
+        # Aplicăm filtrele la interogarea pentru tranzacțiile din perioadă
+        transactions_query = f"""
+            SELECT data, suma, tip
+            FROM tranzactii
+            WHERE id_cont_fk = %s AND data BETWEEN %s AND %s
+            {filter_sql}
+            ORDER BY data ASC, id ASC
+        """
+        transactions_params = [account_id, start_date, end_date] + filter_params
+        # Tranzacțiile sunt citite în flux și însumate pe zile pe măsură ce sosesc: în memorie rămâne
+        # doar câte o valoare pe zi, nu toate tranzacțiile perioadei
+        net_changes = defaultdict(float)
+        try:
+            for row in self.db_handler.iter_rows(transactions_query, tuple(transactions_params)):
+                amount = float(row['suma'])
+                net_changes[row['data']] += amount if row['tip'] == 'credit' else -amount
+        except pymysql.Error as e:
+            logging.error(f"Eroare SQL la citirea tranzacțiilor pentru raportul de sold: {e}")
+            net_changes.clear()
+
+        if not net_changes and initial_balance == 0:
+            return None
+        all_days = pd.date_range(start=start_date, end=end_date, freq='D')
+        daily_balances = pd.Series(index=all_days, dtype=float).fillna(0)
+        if net_changes:
+            daily_changes = pd.Series(list(net_changes.values()), index=pd.to_datetime(list(net_changes.keys())), dtype=float)
+            daily_balances = daily_balances.add(daily_changes, fill_value=0)
+
+        return daily_balances.cumsum() + initial_balance
+
     def _update_chart(self):
         self.ax.clear()
         if not self.report_data:
@@ -1034,7 +1107,7 @@ class TransactionAnalysisReportDialog(tk.Toplevel):
         if end_date: self.end_date_entry.set_date(end_date)
 
         all_transaction_types = self.db_handler.fetch_all_dict(
-            "SELECT cod, descriere_tip FROM tipuri_tranzactii ORDER BY cod ASC"
+            "SELECT cod, descriere_tip FROM tipuri_tranzactii ORDER BY cod ASC", cached=True
         )
         visible_codes = self.initial_context.get('visible_tx_codes', [])
         
@@ -1183,7 +1256,7 @@ class TransactionAnalysisReportDialog(tk.Toplevel):
             pivot_credit.plot(kind='bar', stacked=True, ax=self.ax, color=plt.cm.Greens(np.linspace(0.4, 0.8, len(pivot_credit.columns))), width=bar_width, position=pos)
 
         handles, labels = self.ax.get_legend_handles_labels()
-        all_tx_types_info = self.db_handler.fetch_all_dict("SELECT cod, descriere_tip FROM tipuri_tranzactii")
+        all_tx_types_info = self.db_handler.fetch_all_dict("SELECT cod, descriere_tip FROM tipuri_tranzactii", cached=True)
         self.legend_desc_map = {item['cod']: item['descriere_tip'] for item in all_tx_types_info}
         
         self.ax.legend(handles, labels, title='Coduri Tranzacție', bbox_to_anchor=(1.02, 1), loc='upper left', fontsize='small')
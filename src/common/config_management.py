@@ -37,6 +37,48 @@ def read_db_config_from_parser(config_parser_obj):
             }
     return db_credentials
 
+def read_watch_config_from_parser(config_parser_obj):
+    """
+    Citește configurația importului automat din secțiunea [ImportWatcher].
+    Returnează None dacă secțiunea lipsește sau nu are 'watch_dir'.
+    """
+    if not config_parser_obj.has_section('ImportWatcher'):
+        return None
+    watch_dir = config_parser_obj.get('ImportWatcher', 'watch_dir', fallback="").strip()
+    if not watch_dir:
+        return None
+
+    extensions = config_parser_obj.get('ImportWatcher', 'extensions', fallback=".sta,.txt,.940,.mt940,.xml")
+    return {
+        "watch_dir": watch_dir,
+        "archive_dir": config_parser_obj.get('ImportWatcher', 'archive_dir', fallback="").strip() or os.path.join(watch_dir, 'arhiva'),
+        "rejected_dir": config_parser_obj.get('ImportWatcher', 'rejected_dir', fallback="").strip() or os.path.join(watch_dir, 'respinse'),
+        "poll_interval": config_parser_obj.getfloat('ImportWatcher', 'poll_interval', fallback=30.0),
+        "settle_seconds": config_parser_obj.getfloat('ImportWatcher', 'settle_seconds', fallback=10.0),
+        "extensions": tuple(ext.strip().lower() for ext in extensions.split(',') if ext.strip()),
+    }
+
+def read_performance_config_from_parser(config_parser_obj):
+    """
+    Citește setările jurnalului interogărilor lente din secțiunea [Performance]: 'slow_query_ms' (pragul,
+    în milisecunde; 0 dezactivează jurnalul) și 'slow_query_log' (fișierul). Cheile lipsă rămân la valorile
+    implicite din db_pool (dicționar gol dacă secțiunea lipsește).
+    """
+    if not config_parser_obj.has_section('Performance'):
+        return {}
+    settings = {}
+    try:
+        slow_query_ms = config_parser_obj.getfloat('Performance', 'slow_query_ms', fallback=None)
+    except ValueError:
+        logging.warning("Valoare invalidă pentru [Performance] slow_query_ms; se folosește pragul implicit.")
+        slow_query_ms = None
+    if slow_query_ms is not None:
+        settings['slow_query_ms'] = slow_query_ms
+    slow_query_log = config_parser_obj.get('Performance', 'slow_query_log', fallback="").strip()
+    if slow_query_log:
+        settings['slow_query_log'] = slow_query_log
+    return settings
+
 def save_db_credentials(db_creds_to_save):
     """Salvează DOAR credențialele DB în fișierul de configurare local."""
     config = configparser.ConfigParser()
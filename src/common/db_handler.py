@@ -2,12 +2,34 @@
 import pymysql
 from pymysql.cursors import DictCursor
 import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 import tkinter as tk
 from tkinter import simpledialog, messagebox
 import json
 
 # Importăm auth_handler, care este acum un modul 'frate' în pachetul 'common'
 from . import auth_handler
+from .tx_fingerprint import compute_tx_fingerprint, normalize_legacy_description
+# Pool-ul de conexiuni și cronometrarea interogărilor sunt în db_pool (fără Tk, folosit și de importul din linia de comandă)
+from .db_pool import (
+    DATA_VERSIONED_TABLES, STREAM_BATCH_SIZE, bump_data_versions, get_connection_pool, is_lost_connection_error,
+    is_read_timeout_error, streaming_cursor, tables_read_by, versioned_tables_written_by
+)
+
+# Numărul de rânduri completate cu amprenta tranzacției într-o singură tranzacție la migrare
+TX_FINGERPRINT_BACKFILL_CHUNK_SIZE = 2000
+
+# is_connected() face ping doar dacă conexiunea UI nu a mai fost folosită de atâtea secunde (sau după o eroare)
+DB_IDLE_PING_INTERVAL = 30
+
+# Cache-ul rezultatelor interogărilor de referință și agregate (vezi QueryCache): numărul maxim de intrări,
+# durata maximă de viață a unei intrări și cât de des sunt recitite versiunile tabelelor din versiuni_date
+QUERY_CACHE_MAX_ENTRIES = 512
+QUERY_CACHE_TTL = 300
+DATA_VERSION_CHECK_INTERVAL = 2
 
 # --- CONSTANTE SQL PENTRU STRUCTURA BAZEI DE DATE (neschimbate) ---
 
@@ -79,6 +101,8 @@ CREATE TABLE IF NOT EXISTS tranzactii (
     sold_final DECIMAL(15, 2),
     sold_dupa_tranzactie DECIMAL(15, 2),
     observatii VARCHAR(300),
+    tx_fingerprint CHAR(64) CHARACTER SET ascii NULL,
+    UNIQUE KEY uq_tx_fingerprint (tx_fingerprint),
     CONSTRAINT fk_tranzactie_cont FOREIGN KEY (id_cont_fk) REFERENCES conturi_bancare(id_cont) ON DELETE RESTRICT,
     CONSTRAINT fk_tranzactie_tip FOREIGN KEY (cod_tranzactie_fk) REFERENCES tipuri_tranzactii(cod) ON DELETE SET NULL
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -93,11 +117,72 @@ CREATE TABLE IF NOT EXISTS istoric_importuri (
     tranzactii_ignorate INT NOT NULL,
     id_cont_fk INT NOT NULL,
     id_utilizator_fk INT,
+    hash_fisier CHAR(64) CHARACTER SET ascii NULL,
+    dimensiune_fisier BIGINT NULL,
+    referinta_extras VARCHAR(100) NULL,
+    durata_ms INT NULL,
+    durata_citire_ms INT NULL,
+    durata_tokenizare_ms INT NULL,
+    durata_extragere_ms INT NULL,
+    durata_deduplicare_ms INT NULL,
+    durata_inserare_ms INT NULL,
+    durata_commit_ms INT NULL,
+    randuri_pe_secunda DECIMAL(12,1) NULL,
+    KEY idx_istoric_hash_fisier (hash_fisier, id_cont_fk),
     FOREIGN KEY (id_cont_fk) REFERENCES conturi_bancare(id_cont) ON DELETE CASCADE,
     FOREIGN KEY (id_utilizator_fk) REFERENCES utilizatori(id) ON DELETE SET NULL
 ) ENGINE=InnoDB;
 """
 
+# Soldurile la nivel de extras (:60F:/:62F:), salvate la import; folosite de raportul de evoluție a soldului
+DB_STRUCTURE_EXTRASE_SOLDURI = """
+CREATE TABLE IF NOT EXISTS extrase_solduri (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    id_cont_fk INT NOT NULL,
+    referinta VARCHAR(35) NOT NULL DEFAULT '',
+    numar_extras VARCHAR(20) NOT NULL DEFAULT '',
+    data_sold_initial DATE NULL,
+    sold_initial DECIMAL(15, 2) NULL,
+    data_sold_final DATE NOT NULL,
+    sold_final DECIMAL(15, 2) NOT NULL,
+    valuta CHAR(3) NULL,
+    numar_tranzactii INT NOT NULL DEFAULT 0,
+    sold_verificat BOOLEAN NOT NULL DEFAULT FALSE,
+    UNIQUE KEY uq_extras_sold (id_cont_fk, referinta, numar_extras, data_sold_final),
+    KEY idx_extrase_solduri_cont_data (id_cont_fk, data_sold_final),
+    FOREIGN KEY (id_cont_fk) REFERENCES conturi_bancare(id_cont) ON DELETE CASCADE
+) ENGINE=InnoDB;
+"""
+
+# Punctele de reluare ale importurilor întrerupte (un rând per fișier în curs de import), salvate
+# în aceeași tranzacție cu fiecare lot confirmat și șterse odată cu înregistrarea fișierului în istoric
+DB_STRUCTURE_IMPORTURI_IN_CURS = """
+CREATE TABLE IF NOT EXISTS importuri_in_curs (
+    id_cont_fk INT NOT NULL,
+    hash_fisier CHAR(64) CHARACTER SET ascii NOT NULL,
+    cale_fisier VARCHAR(1024) NOT NULL,
+    nume_fisier VARCHAR(255) NOT NULL,
+    inregistrari INT NOT NULL DEFAULT 0,
+    octet_extras BIGINT NOT NULL DEFAULT 0,
+    inregistrari_extras INT NOT NULL DEFAULT 0,
+    tranzactii_inserate INT NOT NULL DEFAULT 0,
+    tranzactii_ignorate INT NOT NULL DEFAULT 0,
+    id_utilizator_fk INT NULL,
+    actualizat_la TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (id_cont_fk, hash_fisier),
+    FOREIGN KEY (id_cont_fk) REFERENCES conturi_bancare(id_cont) ON DELETE CASCADE,
+    FOREIGN KEY (id_utilizator_fk) REFERENCES utilizatori(id) ON DELETE SET NULL
+) ENGINE=InnoDB;
+"""
+
+# Câte un contor per tabelă, incrementat de fiecare tranzacție care scrie în ea (vezi bump_data_versions)
+DB_STRUCTURE_VERSIUNI_DATE = """
+CREATE TABLE IF NOT EXISTS versiuni_date (
+    tabela VARCHAR(64) NOT NULL PRIMARY KEY,
+    versiune BIGINT UNSIGNED NOT NULL DEFAULT 0
+) ENGINE=InnoDB;
+"""
+
 # Definiție pentru tabela de setări de sistem (SMTP central, etc.)
 DB_STRUCTURE_SETARI_SISTEM = """
 CREATE TABLE IF NOT EXISTS setari_sistem (
@@ -206,28 +291,94 @@ CREATE TABLE IF NOT EXISTS chat_mesaje (
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 """
 
-def get_new_db_connection(db_credentials):
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    return value
+
+
+class QueryCache:
     """
-    Creează și returnează o nouă conexiune la baza de date, complet izolată.
-    Ideală pentru a fi folosită în thread-uri separate.
-    Returnează un obiect de conexiune sau None în caz de eroare.
+    Cache LRU/TTL pentru rezultatele interogărilor, folosit de DatabaseHandler (parametrul `cached`
+    al metodelor fetch_*). Cheia este textul SQL normalizat (spațiile comprimate) plus parametrii.
+
+    Fiecare intrare reține versiunile tabelelor citite (din versiuni_date) din momentul execuției și este
+    validă doar cât timp acestea nu s-au schimbat: o scriere a oricărui utilizator incrementează contorul
+    tabelei, iar intrările care depind de ea nu mai sunt folosite. Versiunile sunt recitite (o interogare
+    pe o tabelă mică) cel mult o dată la `version_check_interval` secunde; scrierile proprii invalidează
+    intrările imediat. Intrările expiră oricum după `ttl` secunde, iar peste `max_entries` sunt eliminate
+    cele mai puțin recent folosite.
     """
-    if not db_credentials:
-        logging.error("Eroare get_new_db_connection: Nu au fost furnizate credentiale.")
-        return None
-    try:
-        # Copiem și adaptăm parametrii pentru pymysql
-        conn_params = db_credentials.copy()
-        conn_params['db'] = conn_params.pop('database', None)
-        conn_params['passwd'] = conn_params.pop('password', None)
-        conn_params['cursorclass'] = pymysql.cursors.DictCursor
-        
-        # Ne conectăm și returnăm conexiunea
-        connection = pymysql.connect(**conn_params)
-        return connection
-    except pymysql.Error as e:
-        logging.error(f"Eroare la crearea unei noi conexiuni DB: {e}")
-        return None
+
+    def __init__(self, max_entries=QUERY_CACHE_MAX_ENTRIES, ttl=QUERY_CACHE_TTL,
+                 version_check_interval=DATA_VERSION_CHECK_INTERVAL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version_check_interval = version_check_interval
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # cheie -> (rezultat, {tabelă: versiune}, expiră_la)
+        self._versions = {}
+        self._versions_read_at = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(kind, query, params):
+        return kind, " ".join(query.split()).rstrip(";"), _freeze(params or ())
+
+    def versions_due(self):
+        """True dacă versiunile tabelelor trebuie recitite din baza de date."""
+        with self._lock:
+            return self._versions_read_at is None or \
+                time.monotonic() - self._versions_read_at >= self.version_check_interval
+
+    def set_versions(self, versions):
+        with self._lock:
+            self._versions = dict(versions)
+            self._versions_read_at = time.monotonic()
+
+    def snapshot(self, tables):
+        """Versiunile curente ale tabelelor (de reținut la intrarea calculată după acest moment)."""
+        with self._lock:
+            return {table: self._versions.get(table, 0) for table in tables}
+
+    def get(self, key):
+        """(True, rezultat) pentru o intrare validă, altfel (False, None)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, versions, expires_at = entry
+                if time.monotonic() < expires_at and all(
+                        self._versions.get(table, 0) == version for table, version in versions.items()):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value, versions):
+        with self._lock:
+            self._entries[key] = (value, versions, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, tables):
+        """Elimină intrările care depind de tabelele date; versiunile sunt recitite la următoarea interogare."""
+        tables = set(tables)
+        with self._lock:
+            for key in [key for key, (_, versions, _) in self._entries.items() if tables & versions.keys()]:
+                del self._entries[key]
+            self._versions_read_at = None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions_read_at = None
+
 
 class MariaDBConfigDialog(simpledialog.Dialog):
     # ... (Această clasă rămâne neschimbată) ...
@@ -266,6 +417,13 @@ class DatabaseHandler:
         self.conn = None
         self.db_credentials = db_credentials
         self.app_master_ref = app_master_ref
+        # self.conn aparține thread-ului care a apelat connect() (UI); celelalte thread-uri
+        # primesc conexiuni din pool (vezi _run_once)
+        self.pool = None
+        self._owner_thread = None
+        # Momentul ultimei folosiri reușite a self.conn (None = trebuie verificată cu ping)
+        self._last_activity = None
+        self.query_cache = QueryCache()
 
     def _seed_swift_codes_table(self):
         """Populează tabela cu descrierile standard ale codurilor SWIFT dacă aceasta este goală."""
@@ -348,8 +506,10 @@ class DatabaseHandler:
                 with self.conn.cursor() as cursor:
                     sql_insert = "INSERT INTO swift_code_descriptions (cod_swift, descriere_standard) VALUES (%s, %s)"
                     cursor.executemany(sql_insert, swift_data)
+                    bump_data_versions(cursor, ('swift_code_descriptions',))
                 
                 self.conn.commit()
+                self.query_cache.invalidate(('swift_code_descriptions',))
                 logging.info(f"{len(swift_data)} înregistrări SWIFT standard au fost inserate.")
 
         except pymysql.Error as err:
@@ -362,19 +522,13 @@ class DatabaseHandler:
             logging.error("Credentiale DB lipsesc. Conectare eșuată.")
             return False
         try:
-            # --- BLOC MODIFICAT PENTRU ROBUSTEȚE ---
-            creds = self.db_credentials.copy()
-            
-            # Folosim .pop(cheie, None) pentru a ne asigura că nu crapă dacă o cheie lipsește.
-            # PyMySQL se va descurca cu valori None pentru 'db' și 'passwd' și va genera o eroare specifică.
-            creds['db'] = creds.pop('database', None)
-            creds['passwd'] = creds.pop('password', None)
-            
-            # Ne asigurăm că portul este un număr întreg
-            creds['port'] = int(creds.get('port', 3306))
-
-            self.conn = pymysql.connect(**creds, charset='utf8mb4', cursorclass=DictCursor, connect_timeout=5, read_timeout=5)
-            # --- SFÂRȘIT BLOC MODIFICAT ---
+            # Conexiunea UI este împrumutată din pool-ul comun (DictCursor, timeout-uri scurte) și
+            # rămâne a acestui thread; thread-urile de fundal împrumută alte conexiuni din același pool.
+            # connection_params tolerează lipsa cheilor: PyMySQL va genera o eroare specifică.
+            self.pool = get_connection_pool(self.db_credentials, cursorclass=DictCursor, connect_timeout=5, read_timeout=5)
+            self.conn = self.pool.acquire()
+            self._owner_thread = threading.get_ident()
+            self._last_activity = time.monotonic()
 
             logging.info(f"Conectat cu succes la DB '{self.db_credentials.get('database')}' pe host '{self.db_credentials.get('host')}'.")
             return True
@@ -418,27 +572,85 @@ class DatabaseHandler:
                 cursor.close()
 
     def close_connection(self):
-        # --- CORECȚIE AICI: Folosim .open în loc de .is_connected() ---
-        if self.conn and self.conn.open:
+        if self.conn:
+            # Conexiunea este returnată în pool (și acolo, dacă s-a închis între timp, doar eliberează locul)
             self.conn.close()
             logging.info("Conexiune la baza de date închisă.")
 
+    def _in_owner_thread(self):
+        return threading.get_ident() == self._owner_thread
+
+    @contextmanager
+    def pooled_connection(self):
+        """Împrumută din pool o conexiune (DictCursor) pentru un thread de fundal și o returnează la ieșire."""
+        with self.pool.connection() as conn:
+            yield conn
+
     def is_connected(self):
         """
         Verifică dacă conexiunea este activă și încearcă să se reconecteze dacă s-a pierdut.
         Returnează True dacă conexiunea este validă, altfel False.
+        Ping-ul (un drum dus-întors la server) se face doar dacă conexiunea a stat nefolosită mai mult
+        de DB_IDLE_PING_INTERVAL secunde sau după o eroare de conexiune; o conexiune căzută între timp
+        este oricum restabilită de _run, care reia interogarea o dată.
+        În thread-urile de fundal nu atinge self.conn: conexiunea din pool este verificată la împrumut.
         """
         if self.conn is None:
             return False
+        if not self._in_owner_thread():
+            return self.pool is not None
+        if self._last_activity is not None and time.monotonic() - self._last_activity < DB_IDLE_PING_INTERVAL:
+            return True
         try:
             # Ping-ul verifică dacă serverul este accesibil.
             # reconnect=True va restabili automat conexiunea dacă a fost pierdută.
             self.conn.ping(reconnect=True)
         except pymysql.Error:
             # Dacă ping-ul eșuează chiar și cu reconectare, conexiunea este pierdută.
+            self._last_activity = None
             return False
+        self._last_activity = time.monotonic()
         return True
 
+    def _run_once(self, operation):
+        """operation(self.conn) în thread-ul UI; în orice alt thread, pe o conexiune din pool (self.conn nu este thread-safe)."""
+        if not self._in_owner_thread():
+            with self.pooled_connection() as conn:
+                try:
+                    return operation(conn)
+                except pymysql.Error as e:
+                    if is_lost_connection_error(e):
+                        conn.discard()
+                    raise
+        try:
+            result = operation(self.conn)
+        except pymysql.Error as e:
+            if is_lost_connection_error(e):
+                self._last_activity = None
+            raise
+        self._last_activity = time.monotonic()
+        return result
+
+    def _run(self, operation, can_retry=None):
+        """
+        Execută operation(conn) pe conexiunea thread-ului curent (vezi _run_once). Dacă
+        aceasta s-a pierdut (LOST_CONNECTION_ERRORS), conexiunea este restabilită și operația este
+        reluată o singură dată; `can_retry()` poate interzice reluarea (de ex. după un COMMIT trimis).
+        O interogare care a depășit read_timeout nu este reluată: ar aștepta din nou la fel de mult.
+        """
+        try:
+            return self._run_once(operation)
+        except pymysql.Error as e:
+            if not is_lost_connection_error(e) or (can_retry is not None and not can_retry()):
+                raise
+            if is_read_timeout_error(e):
+                logging.warning(f"Interogarea a depășit timpul de citire ({e}); nu este reluată.")
+                raise
+            logging.warning(f"Conexiunea la baza de date s-a pierdut ({e}); se reconectează și se reia interogarea.")
+        if self._in_owner_thread():
+            self.conn.ping(reconnect=True)
+        return self._run_once(operation)
+
     def check_and_setup_database_schema(self):
         if not self.is_connected():
             return False
@@ -455,13 +667,14 @@ class DatabaseHandler:
             all_tables_scripts = [
                 DB_STRUCTURE_CONTURI_BANCARE_MARIADB, DB_STRUCTURE_TIPURI_TRANZACTII_MARIADB,
                 DB_STRUCTURE_UTILIZATORI, DB_STRUCTURE_ROLURI, DB_STRUCTURE_TRANZACTII_V2_MARIADB,
-                CREATE_TABLE_ISTORIC_IMPORTURI, DB_STRUCTURE_UTILIZATORI_ROLURI,
+                CREATE_TABLE_ISTORIC_IMPORTURI, DB_STRUCTURE_EXTRASE_SOLDURI, DB_STRUCTURE_IMPORTURI_IN_CURS,
+                DB_STRUCTURE_UTILIZATORI_ROLURI,
                 DB_STRUCTURE_ROLURI_PERMISIUNI, DB_STRUCTURE_UTILIZATORI_CONTURI,
                 DB_STRUCTURE_JURNAL_ACTIUNI, DB_STRUCTURE_SWIFT_CODES,
                 DB_STRUCTURE_VALUTE, DB_STRUCTURE_CHAT_CONVERSATII,
                 DB_STRUCTURE_CHAT_PARTICIPANTI, DB_STRUCTURE_CHAT_MESAJE,
                 DB_STRUCTURE_SETARI_SISTEM,  # Adăugăm noua tabelă la procesul de creare
-                DB_STRUCTURE_PAROLA_RESET_TOKENS
+                DB_STRUCTURE_PAROLA_RESET_TOKENS, DB_STRUCTURE_VERSIUNI_DATE
             ]
             
             for table_script in all_tables_scripts:
@@ -500,6 +713,62 @@ class DatabaseHandler:
                 cursor.execute("ALTER TABLE tranzactii ADD COLUMN mid VARCHAR(50) NULL AFTER pan")
                 logging.info("Coloana 'mid' (Merchant ID) a fost adăugată cu succes.")
 
+            # Migrare: amprenta tranzacției (tx_fingerprint) cu index unic, folosită la deduplicarea importurilor
+            query_check_fp = f"SELECT COUNT(*) FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = '{db_name}' AND TABLE_NAME = 'tranzactii' AND COLUMN_NAME = 'tx_fingerprint'"
+            if self.fetch_scalar(query_check_fp) == 0:
+                logging.warning("Coloana 'tx_fingerprint' lipsește din tabela 'tranzactii'. Se adaugă...")
+                cursor.execute("ALTER TABLE tranzactii ADD COLUMN tx_fingerprint CHAR(64) CHARACTER SET ascii NULL")
+                logging.info("Coloana 'tx_fingerprint' a fost adăugată cu succes.")
+
+            query_check_fp_index = f"SELECT COUNT(*) FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = '{db_name}' AND TABLE_NAME = 'tranzactii' AND INDEX_NAME = 'uq_tx_fingerprint'"
+            if self.fetch_scalar(query_check_fp_index) == 0:
+                logging.warning("Indexul unic 'uq_tx_fingerprint' lipsește. Se completează amprentele tranzacțiilor existente...")
+                self._backfill_tx_fingerprints(cursor)
+                # Tranzacțiile identice importate înainte de deduplicare păstrează amprenta doar pe primul rând
+                cursor.execute("""
+                    UPDATE tranzactii t
+                    JOIN (
+                        SELECT tx_fingerprint, MIN(id) AS id_pastrat
+                        FROM tranzactii
+                        WHERE tx_fingerprint IS NOT NULL
+                        GROUP BY tx_fingerprint
+                        HAVING COUNT(*) > 1
+                    ) dup ON t.tx_fingerprint = dup.tx_fingerprint AND t.id <> dup.id_pastrat
+                    SET t.tx_fingerprint = NULL
+                """)
+                cursor.execute("ALTER TABLE tranzactii ADD UNIQUE KEY uq_tx_fingerprint (tx_fingerprint)")
+                logging.info("Indexul unic 'uq_tx_fingerprint' a fost creat cu succes.")
+
+            # Migrare: hash-ul conținutului fișierelor importate, pentru a omite reimporturile identice
+            query_check_hash = f"SELECT COUNT(*) FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = '{db_name}' AND TABLE_NAME = 'istoric_importuri' AND COLUMN_NAME = 'hash_fisier'"
+            if self.fetch_scalar(query_check_hash) == 0:
+                logging.warning("Coloanele pentru hash-ul fișierelor lipsesc din 'istoric_importuri'. Se adaugă...")
+                cursor.execute("""
+                    ALTER TABLE istoric_importuri
+                    ADD COLUMN hash_fisier CHAR(64) CHARACTER SET ascii NULL,
+                    ADD COLUMN dimensiune_fisier BIGINT NULL,
+                    ADD COLUMN referinta_extras VARCHAR(100) NULL,
+                    ADD KEY idx_istoric_hash_fisier (hash_fisier, id_cont_fk)
+                """)
+                logging.info("Coloanele 'hash_fisier', 'dimensiune_fisier' și 'referinta_extras' au fost adăugate cu succes.")
+
+            # Migrare: timpii pe etape ai importului (telemetrie), pentru a vedea unde se pierde timpul
+            query_check_durations = f"SELECT COUNT(*) FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = '{db_name}' AND TABLE_NAME = 'istoric_importuri' AND COLUMN_NAME = 'durata_ms'"
+            if self.fetch_scalar(query_check_durations) == 0:
+                logging.warning("Coloanele de durată lipsesc din 'istoric_importuri'. Se adaugă...")
+                cursor.execute("""
+                    ALTER TABLE istoric_importuri
+                    ADD COLUMN durata_ms INT NULL,
+                    ADD COLUMN durata_citire_ms INT NULL,
+                    ADD COLUMN durata_tokenizare_ms INT NULL,
+                    ADD COLUMN durata_extragere_ms INT NULL,
+                    ADD COLUMN durata_deduplicare_ms INT NULL,
+                    ADD COLUMN durata_inserare_ms INT NULL,
+                    ADD COLUMN durata_commit_ms INT NULL,
+                    ADD COLUMN randuri_pe_secunda DECIMAL(12,1) NULL
+                """)
+                logging.info("Coloanele de durată au fost adăugate în 'istoric_importuri'.")
+
             self.conn.commit()
             self._seed_initial_data()
             self._seed_swift_codes_table()
@@ -516,6 +785,47 @@ class DatabaseHandler:
             if cursor:
                 cursor.close()
 
+    def _backfill_tx_fingerprints(self, cursor, chunk_size=TX_FINGERPRINT_BACKFILL_CHUNK_SIZE):
+        """
+        Completează coloana tx_fingerprint pentru rândurile existente, pe loturi parcurse
+        după ID. Fiecare lot este scris cu un singur UPDATE și confirmat separat, astfel
+        încât migrarea poate fi reluată dacă este întreruptă.
+        Pentru descrierile importate cu parserul inițial amprenta este calculată din textul fără
+        resturile extrasului (normalize_legacy_description), ca reimportul aceluiași fișier să fie
+        recunoscut ca duplicat; coloana descriere rămâne neschimbată.
+        """
+        last_id, total_updated = 0, 0
+        while True:
+            cursor.execute(
+                "SELECT id, id_cont_fk, data, suma, tip, descriere, rrn, tid FROM tranzactii "
+                "WHERE id > %s AND tx_fingerprint IS NULL ORDER BY id LIMIT %s",
+                (last_id, chunk_size)
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            case_params, ids = [], []
+            for row in rows:
+                fingerprint = compute_tx_fingerprint(
+                    row['id_cont_fk'], row['data'], row['suma'], row['tip'],
+                    normalize_legacy_description(row['descriere']), row['rrn'], row['tid']
+                )
+                case_params.extend((row['id'], fingerprint))
+                ids.append(row['id'])
+
+            when_clauses = " ".join(["WHEN %s THEN %s"] * len(rows))
+            sql_update = (
+                f"UPDATE tranzactii SET tx_fingerprint = CASE id {when_clauses} END "
+                "WHERE id IN (" + ", ".join(["%s"] * len(ids)) + ")"
+            )
+            cursor.execute(sql_update, case_params + ids)
+            self.conn.commit()
+
+            total_updated += len(rows)
+            last_id = rows[-1]['id']
+            logging.info(f"Amprente tranzacții completate: {total_updated} rânduri...")
+
     def _seed_initial_data(self):
         if not self.is_connected(): return
 
@@ -567,23 +877,79 @@ class DatabaseHandler:
             logging.error(f"Eroare la inserarea datelor inițiale (seed): {err}")
             self.conn.rollback()
 
-    def fetch_all_dict(self, query, params=None):
+    def iter_rows(self, query, params=None, batch_size=STREAM_BATCH_SIZE):
+        """
+        Generator cu rândurile (dicționare) interogării, citite în flux de pe server câte `batch_size`:
+        procesarea începe de la primul lot, în paralel cu transferul, iar memoria rămâne limitată la un lot.
+        Rulează pe o conexiune din pool (nu pe self.conn), ca interfața să poată interoga în continuare
+        cât timp rezultatul este parcurs. Spre deosebire de fetch_all_dict, erorile sunt propagate.
+        """
+        if not self.is_connected():
+            return
+        with self.pooled_connection() as conn, streaming_cursor(conn) as cursor:
+            cursor.execute(query, params or ())
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+
+    def run_with_cursor(self, operation):
+        """
+        Returnează operation(cursor) pentru funcțiile care primesc un cursor (ex. import_engine.load_import_checkpoints),
+        prin _run: conexiunea thread-ului curent, reluarea după o conexiune pierdută și cronometrarea interogărilor.
+        Operația trebuie să poată fi repetată (doar citiri). Spre deosebire de fetch_all_dict, erorile sunt propagate.
+        """
+        def execute(conn):
+            with conn.cursor() as cursor:
+                return operation(cursor)
+        return self._run(execute)
+
+    def _refresh_data_versions(self):
+        if self.query_cache.versions_due():
+            def fetch(conn):
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT tabela, versiune FROM versiuni_date")
+                    return cursor.fetchall()
+            self.query_cache.set_versions({row['tabela']: row['versiune'] for row in self._run(fetch)})
+
+    def _query(self, method, query, params, cached=False):
+        """
+        Execută interogarea și returnează cursor.<method>() ('fetchall' / 'fetchone'). Cu `cached=True`,
+        rezultatul interogărilor care citesc doar din DATA_VERSIONED_TABLES este luat din query_cache cât
+        timp versiunile acestor tabele nu s-au schimbat (fără drum la server); apelantul primește o copie.
+        """
+        def fetch(conn):
+            with conn.cursor() as cursor:
+                cursor.execute(query, params or ())
+                return getattr(cursor, method)()
+        tables = tables_read_by(query) if cached else None
+        if not tables or not tables <= DATA_VERSIONED_TABLES:
+            return self._run(fetch)
+        self._refresh_data_versions()
+        key = QueryCache.make_key(method, query, params)
+        found, result = self.query_cache.get(key)
+        if not found:
+            versions = self.query_cache.snapshot(tables)
+            result = self._run(fetch)
+            self.query_cache.put(key, result, versions)
+        if isinstance(result, (list, tuple)):
+            return [dict(row) if isinstance(row, dict) else row for row in result]
+        return dict(result) if isinstance(result, dict) else result
+
+    def fetch_all_dict(self, query, params=None, cached=False):
         if not self.is_connected(): return []
         try:
-            with self.conn.cursor() as cursor:
-                cursor.execute(query, params or ())
-                return cursor.fetchall()
+            return self._query('fetchall', query, params, cached)
         except pymysql.Error as e:
             # Corecție: Am înlocuit e.msg cu str(e)
             logging.error(f"Eroare SQL la fetch_all_dict: {str(e)}")
             return []
 
-    def fetch_one_dict(self, query, params=None):
+    def fetch_one_dict(self, query, params=None, cached=False):
         if not self.is_connected(): return None
         try:
-            with self.conn.cursor() as cursor:
-                cursor.execute(query, params or ())
-                return cursor.fetchone()
+            return self._query('fetchone', query, params, cached)
         except pymysql.Error as e:
             # Corecție: Am înlocuit e.msg cu str(e)
             logging.error(f"Eroare SQL la fetch_one_dict: {str(e)}")
@@ -666,12 +1032,10 @@ class DatabaseHandler:
             (conversation_id,)
         )
 
-    def fetch_scalar(self, query, params=None):
+    def fetch_scalar(self, query, params=None, cached=False):
         if not self.is_connected(): return None
         try:
-            with self.conn.cursor() as cursor:
-                cursor.execute(query, params or ())
-                result = cursor.fetchone()
+            result = self._query('fetchone', query, params, cached)
             return list(result.values())[0] if result else None
         except pymysql.Error as e:
             # Corecție: Am înlocuit e.msg cu str(e)
@@ -680,23 +1044,39 @@ class DatabaseHandler:
 
     def execute_commit(self, query, params=None):
         if not self.is_connected(): return False
+        commit_sent = []
+        written = versioned_tables_written_by(query)
+        def execute(conn):
+            commit_sent.clear()
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(query, params or ())
+                    # Contorul tabelei modificate este confirmat împreună cu scrierea (vezi QueryCache)
+                    bump_data_versions(cursor, written)
+                commit_sent.append(True)
+                conn.commit()
+            except pymysql.Error as e:
+                if not is_lost_connection_error(e):
+                    conn.rollback()
+                raise
         try:
-            with self.conn.cursor() as cursor:
-                cursor.execute(query, params or ())
-            self.conn.commit()
+            # Tranzacția neconfirmată a unei conexiuni pierdute este anulată de server, deci poate fi reluată;
+            # un COMMIT întrerupt poate să fi fost aplicat, deci nu este repetat.
+            self._run(execute, can_retry=lambda: not commit_sent)
+            if written:
+                self.query_cache.invalidate(written)
             return True
         except pymysql.Error as e:
             # Corecție: Am înlocuit e.msg cu str(e)
             logging.error(f"EROARE SQL în execute_commit: {str(e)}")
-            self.conn.rollback()
-            if self.app_master_ref:
+            if self.app_master_ref and self._in_owner_thread():
                 messagebox.showerror("Eroare Execuție Query", f"Eroare SQL: {str(e)}", parent=self.app_master_ref)
             return False
 
     def get_all_currencies(self):
         """Returnează o listă cu toate codurile de valute din baza de date."""
         if not self.is_connected(): return []
-        results = self.fetch_all_dict("SELECT cod_valuta FROM valute ORDER BY cod_valuta ASC")
+        results = self.fetch_all_dict("SELECT cod_valuta FROM valute ORDER BY cod_valuta ASC", cached=True)
         return [r['cod_valuta'] for r in results]
 
     def add_currency(self, cod_valuta):
@@ -742,8 +1122,10 @@ class DatabaseHandler:
                 with self.conn.cursor() as cursor:
                     sql_insert = "INSERT INTO valute (cod_valuta) VALUES (%s)"
                     cursor.executemany(sql_insert, valute_standard)
+                    bump_data_versions(cursor, ('valute',))
                 
                 self.conn.commit()
+                self.query_cache.invalidate(('valute',))
                 logging.info(f"{len(valute_standard)} valute standard au fost inserate.")
 
         except pymysql.Error as err:
@@ -754,7 +1136,7 @@ class DatabaseHandler:
         if not self.is_connected(): return []
         return self.fetch_all_dict(
             "SELECT id_cont, nume_cont, iban, nume_banca, valuta, observatii_cont, culoare_cont "
-            "FROM conturi_bancare ORDER BY nume_cont ASC"
+            "FROM conturi_bancare ORDER BY nume_cont ASC", cached=True
         )
         
     def log_action(self, user_id, username, action, details=""):
@@ -914,7 +1296,7 @@ class DatabaseHandler:
     def get_all_swift_descriptions(self):
         """Returnează toate descrierile standard SWIFT din baza de date."""
         if not self.is_connected(): return []
-        return self.fetch_all_dict("SELECT cod_swift, descriere_standard FROM swift_code_descriptions ORDER BY cod_swift ASC")
+        return self.fetch_all_dict("SELECT cod_swift, descriere_standard FROM swift_code_descriptions ORDER BY cod_swift ASC", cached=True)
 
     def update_swift_description(self, code, description):
         """Actualizează descrierea standard pentru un cod SWIFT."""
@@ -0,0 +1,573 @@
+# db_pool.py
+"""
+Pool-ul de conexiuni comun al procesului, cronometrarea interogărilor (QueryStats) și contoarele din
+versiuni_date, fără dependențe de Tk: sunt folosite de DatabaseHandler, dar și de importul din linia
+de comandă și de importul automat (import_engine), care rulează fără interfață.
+"""
+import pymysql
+from pymysql.cursors import DictCursor, SSDictCursor
+import re
+import os
+import sys
+import socket
+import logging
+import logging.handlers
+import threading
+import time
+import atexit
+import contextlib
+from collections import Counter
+from contextlib import contextmanager
+
+from .config_management import APP_DATA_DIR
+
+# Pool-ul de conexiuni: numărul maxim de conexiuni deschise pentru un set de credențiale și opțiuni,
+# cât așteaptă un thread o conexiune liberă și după câte secunde de inactivitate este verificată cu ping
+DB_POOL_MAX_SIZE = 8
+DB_POOL_CHECKOUT_TIMEOUT = 30
+DB_POOL_HEALTH_CHECK_INTERVAL = 30
+
+# Erorile de conexiune pierdută după care interogarea este reluată o dată, pe conexiunea restabilită:
+# server has gone away, lost connection during query, lost connection to server
+LOST_CONNECTION_ERRORS = (2006, 2013, 2055)
+
+# Tabelele cu contor de versiune: orice scriere în ele (execute_commit, import) incrementează contorul în
+# aceeași tranzacție. Doar interogările care citesc exclusiv din aceste tabele sunt păstrate în cache.
+DATA_VERSIONED_TABLES = frozenset({'conturi_bancare', 'tranzactii', 'tipuri_tranzactii', 'swift_code_descriptions', 'valute'})
+
+# Rândurile citite dintr-o dată de un cursor în flux (iter_rows, exporturi)
+STREAM_BATCH_SIZE = 2000
+
+# Cronometrarea interogărilor (vezi QueryStats): pragul peste care o instrucțiune este scrisă în jurnalul
+# interogărilor lente (suprascris din config.ini, secțiunea [Performance]), fișierul jurnalului și numărul
+# maxim de interogări distincte păstrate în statistici
+SLOW_QUERY_THRESHOLD_MS = 500
+SLOW_QUERY_LOG_FILE = os.path.join(APP_DATA_DIR, 'slow_queries.log')
+QUERY_STATS_MAX_ENTRIES = 500
+SLOW_QUERY_LOGGER_NAME = 'BTExtras.slow_queries'
+
+
+def is_lost_connection_error(error):
+    """True pentru erorile după care conexiunea nu mai poate fi folosită (vezi LOST_CONNECTION_ERRORS)."""
+    if isinstance(error, pymysql.err.InterfaceError):
+        return True  # conexiune deja închisă pe partea clientului
+    return isinstance(error, pymysql.err.OperationalError) and bool(error.args) \
+        and error.args[0] in LOST_CONNECTION_ERRORS
+
+
+def is_read_timeout_error(error):
+    """
+    True dacă eroarea de conexiune pierdută (2013) a fost cauzată de depășirea read_timeout: PyMySQL
+    ridică același cod ca la o conexiune căzută, cu socket.timeout ca excepție de context.
+    """
+    cause = error
+    while cause is not None:
+        if isinstance(cause, (socket.timeout, TimeoutError)):
+            return True
+        cause = cause.__cause__ or cause.__context__
+    return False
+
+
+RE_TABLES_READ = re.compile(r"\b(?:FROM|JOIN)\s+`?(\w+)", re.IGNORECASE)
+RE_TABLE_WRITTEN = re.compile(
+    r"^\s*(?:INSERT(?:\s+IGNORE)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+IGNORE)?|DELETE\s+FROM)\s+`?(\w+)", re.IGNORECASE
+)
+SQL_BUMP_DATA_VERSION = ("INSERT INTO versiuni_date (tabela, versiune) VALUES (%s, 1) "
+                         "ON DUPLICATE KEY UPDATE versiune = versiune + 1")
+
+
+def tables_read_by(query):
+    """Tabelele din clauzele FROM / JOIN ale interogării (inclusiv subinterogări), cu litere mici."""
+    return frozenset(name.lower() for name in RE_TABLES_READ.findall(query))
+
+
+def versioned_tables_written_by(query):
+    """Tabela cu contor de versiune modificată de un INSERT / REPLACE / UPDATE / DELETE (mulțime vidă altfel)."""
+    match = RE_TABLE_WRITTEN.match(query)
+    return frozenset({match.group(1).lower()}) & DATA_VERSIONED_TABLES if match else frozenset()
+
+
+def bump_data_versions(cursor, tables):
+    """
+    Incrementează contoarele tabelelor date în versiuni_date, în tranzacția curentă (deci confirmate
+    împreună cu scrierea). Ordinea fixă a tabelelor evită blocajele între tranzacții concurente.
+    """
+    tables = sorted(set(tables))
+    if tables:
+        cursor.executemany(SQL_BUMP_DATA_VERSION, [(table,) for table in tables])
+
+
+RE_SQL_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+RE_SQL_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+RE_SQL_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+# Fișierele ale căror cadre nu sunt "locul apelului" unei interogări: stratul de acces la date (acest
+# modul și db_handler), contextlib și PyMySQL
+_DATA_ACCESS_FILES = (__file__, os.path.join(os.path.dirname(__file__), 'db_handler.py'))
+_INSTRUMENTATION_FILES = _DATA_ACCESS_FILES + (contextlib.__file__,)
+_PYMYSQL_DIR = os.path.dirname(pymysql.__file__)
+
+
+def normalize_query(query):
+    """
+    Forma canonică a interogării pentru statistici: spațiile comprimate, valorile literale (text, numere)
+    și parametrii (%s) înlocuiți cu ?, listele de valori - IN (%s, %s, ...) - cu (...). Interogările care
+    diferă doar prin valori (inclusiv cele construite cu f-string) ajung astfel la aceeași intrare.
+    """
+    query = " ".join(query.split()).rstrip(";")
+    query = RE_SQL_STRING_LITERAL.sub("?", query).replace("%s", "?")
+    return RE_SQL_VALUE_LIST.sub("(...)", RE_SQL_NUMBER_LITERAL.sub("?", query))
+
+
+def _call_site():
+    """'fișier.py:linie (funcție)' pentru primul cadru din afara stratului de acces la date."""
+    frame = sys._getframe(1)
+    fallback = None
+    while frame is not None:
+        code = frame.f_code
+        if code.co_filename not in _INSTRUMENTATION_FILES and not code.co_filename.startswith(_PYMYSQL_DIR):
+            return f"{os.path.basename(code.co_filename)}:{frame.f_lineno} ({code.co_name})"
+        if code.co_filename in _DATA_ACCESS_FILES:
+            # Interogările pornite chiar din stratul de acces la date (schema, migrări) fără un apelant extern
+            fallback = f"{os.path.basename(code.co_filename)}:{frame.f_lineno} ({code.co_name})"
+        frame = frame.f_back
+    return fallback or "?"
+
+
+class QueryStats:
+    """
+    Statisticile instrucțiunilor SQL executate în proces, pe toate conexiunile din pool (interfață,
+    thread-uri de fundal, exporturi, import): pentru fiecare interogare normalizată (normalize_query)
+    numărul de execuții, durata totală și maximă, rândurile returnate sau afectate, erorile și locurile
+    din cod din care a fost apelată. Instrucțiunile care durează cel puțin `slow_query_ms` sunt scrise
+    în jurnalul interogărilor lente (`slow_query_log`, cu rotație); parametrii nu sunt scriși în jurnal.
+    """
+
+    def __init__(self, max_entries=QUERY_STATS_MAX_ENTRIES, slow_query_ms=SLOW_QUERY_THRESHOLD_MS,
+                 slow_query_log=SLOW_QUERY_LOG_FILE):
+        self.max_entries = max_entries
+        self.slow_query_ms = slow_query_ms
+        self.slow_query_log = slow_query_log
+        self._entries = {}
+        self._slow_log_handler = None
+        self._lock = threading.Lock()
+
+    def configure(self, slow_query_ms=None, slow_query_log=None):
+        """Schimbă pragul (ms; 0 sau negativ dezactivează jurnalul) și/sau fișierul jurnalului interogărilor lente."""
+        with self._lock:
+            if slow_query_ms is not None:
+                self.slow_query_ms = slow_query_ms
+            if slow_query_log and slow_query_log != self.slow_query_log:
+                self.slow_query_log = slow_query_log
+                handler, self._slow_log_handler = self._slow_log_handler, None
+                if handler is not None:
+                    handler.close()
+
+    def record(self, query, elapsed, rows, call_site, failed=False):
+        """Adaugă o execuție: durata în secunde, rândurile (None dacă nu se cunosc) și locul apelului."""
+        key = normalize_query(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self.max_entries:
+                    # Se renunță la interogarea cu cel mai mic timp total, care contează cel mai puțin în clasament
+                    del self._entries[min(self._entries, key=lambda k: self._entries[k]['total'])]
+                entry = self._entries[key] = {'calls': 0, 'total': 0.0, 'max': 0.0, 'rows': 0, 'errors': 0,
+                                              'call_sites': Counter()}
+            entry['calls'] += 1
+            entry['total'] += elapsed
+            entry['max'] = max(entry['max'], elapsed)
+            entry['rows'] += rows or 0
+            entry['errors'] += failed
+            entry['call_sites'][call_site] += 1
+            slow = self.slow_query_ms > 0 and elapsed * 1000 >= self.slow_query_ms
+        if slow:
+            self._log_slow_query(query, elapsed, rows, call_site, failed)
+
+    def snapshot(self):
+        """Lista interogărilor, descrescător după timpul total, cu duratele în milisecunde."""
+        with self._lock:
+            items = [(query, dict(entry, call_sites=entry['call_sites'].most_common()))
+                     for query, entry in self._entries.items()]
+        return [{
+            'query': query,
+            'calls': entry['calls'],
+            'total_ms': entry['total'] * 1000,
+            'mean_ms': entry['total'] * 1000 / entry['calls'],
+            'max_ms': entry['max'] * 1000,
+            'rows': entry['rows'],
+            'errors': entry['errors'],
+            'call_sites': entry['call_sites'],
+        } for query, entry in sorted(items, key=lambda item: item[1]['total'], reverse=True)]
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _slow_log(self):
+        with self._lock:
+            if self._slow_log_handler is None:
+                handler = logging.handlers.RotatingFileHandler(self.slow_query_log, maxBytes=1_000_000, backupCount=3,
+                                                               encoding='utf-8', delay=True)
+                handler.setFormatter(logging.Formatter('%(asctime)s [%(threadName)s] %(message)s'))
+                self._slow_log_handler = handler
+            return self._slow_log_handler
+
+    def _log_slow_query(self, query, elapsed, rows, call_site, failed):
+        message = (f"{elapsed * 1000:.0f} ms | rânduri: {'-' if rows is None else rows} | {call_site}"
+                   f"{' | EROARE' if failed else ''} | {' '.join(query.split())}")
+        try:
+            # Handler propriu, nu un logger din ierarhie: jurnalul interogărilor lente nu ajunge în jurnalul aplicației
+            self._slow_log().handle(logging.LogRecord(SLOW_QUERY_LOGGER_NAME, logging.WARNING, __file__, 0,
+                                                      message, None, None))
+        except Exception as e:
+            logging.error(f"Jurnalul interogărilor lente nu poate fi scris în {self.slow_query_log}: {e}")
+
+
+# Statisticile comune ale procesului; pragul și fișierul sunt setate din config.ini (configure_query_timing)
+query_stats = QueryStats()
+
+
+def configure_query_timing(settings):
+    """Aplică setările din secțiunea [Performance] (vezi config_management.read_performance_config_from_parser)."""
+    query_stats.configure(**settings)
+
+
+class TimedCursor:
+    """
+    Cursorul returnat de PooledConnection.cursor(): cronometrează fiecare execute / executemany și îl
+    înregistrează în QueryStats, cu numărul de rânduri și locul apelului. La cursoarele nebufferizate
+    (SSCursor / SSDictCursor) rândurile sunt transferate la fetch, deci execuția este înregistrată la
+    următorul execute sau la close(), cu timpul citirilor inclus și rândurile numărate pe măsură ce sunt citite.
+    Restul interfeței cursorului (lastrowid, description, rowcount...) este delegat cursorului PyMySQL.
+    """
+
+    def __init__(self, cursor, stats):
+        self._cursor = cursor
+        self._stats = stats
+        self._unbuffered = isinstance(cursor, pymysql.cursors.SSCursor)
+        self._pending = None  # [interogare, loc apel, durată, rânduri citite] pentru cursorul nebufferizat
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def execute(self, query, args=None):
+        return self._timed(self._cursor.execute, query, args)
+
+    def executemany(self, query, args):
+        return self._timed(self._cursor.executemany, query, args)
+
+    def fetchone(self):
+        return self._fetch(self._cursor.fetchone)
+
+    def fetchmany(self, *args):
+        return self._fetch(self._cursor.fetchmany, *args)
+
+    def fetchall(self):
+        return self._fetch(self._cursor.fetchall)
+
+    def close(self):
+        started = time.perf_counter()
+        try:
+            self._cursor.close()  # un cursor nebufferizat citește aici restul rezultatului
+        finally:
+            if self._pending is not None:
+                self._pending[2] += time.perf_counter() - started
+            self.finish()
+
+    def finish(self):
+        """Înregistrează execuția în curs a unui cursor nebufferizat (apelat și când cursorul este abandonat)."""
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            query, call_site, elapsed, rows = pending
+            self._stats.record(query, elapsed, rows, call_site)
+
+    def _timed(self, method, query, args):
+        self.finish()
+        call_site = _call_site()
+        started = time.perf_counter()
+        try:
+            result = method(query, args)
+        except BaseException:
+            self._stats.record(query, time.perf_counter() - started, None, call_site, failed=True)
+            raise
+        elapsed = time.perf_counter() - started
+        if self._unbuffered:
+            self._pending = [query, call_site, elapsed, 0]
+        else:
+            self._stats.record(query, elapsed, self._row_count(), call_site)
+        return result
+
+    def _fetch(self, method, *args):
+        if self._pending is None:
+            return method(*args)
+        started = time.perf_counter()
+        rows = method(*args)
+        self._pending[2] += time.perf_counter() - started
+        if method is self._cursor.fetchone:
+            self._pending[3] += rows is not None
+        else:
+            self._pending[3] += len(rows)
+        return rows
+
+    def _row_count(self):
+        # rowcount: rândurile unui SELECT bufferizat sau afectate de o scriere; -1 / 2**64 - 1 = necunoscut
+        count = getattr(self._cursor, 'rowcount', -1)
+        return count if isinstance(count, int) and 0 <= count < 2 ** 63 else None
+
+
+def connection_params(db_credentials, **options):
+    """
+    Parametrii pymysql.connect din credențialele standard (host, port, database, user, password),
+    cu charset utf8mb4 și opțiunile suplimentare (cursorclass, local_infile, timeout-uri).
+    """
+    params = db_credentials.copy()
+    params['db'] = params.pop('database', None)
+    params['passwd'] = params.pop('password', None)
+    params['port'] = int(params.get('port') or 3306)
+    params.setdefault('charset', 'utf8mb4')
+    params.update(options)
+    return params
+
+
+class ConnectionPoolTimeout(pymysql.err.OperationalError):
+    """Nicio conexiune nu s-a eliberat în timpul de așteptare (toate cele max_size sunt folosite)."""
+
+
+class PooledConnection:
+    """
+    Conexiune împrumutată din ConnectionPool. Expune interfața conexiunii PyMySQL (cursor, commit,
+    rollback, ping, open...), dar close() o returnează în pool în loc să închidă socket-ul, așa că
+    codul existent (`connection.close()` în finally) eliberează conexiunea fără modificări.
+    O conexiune împrumutată trebuie folosită dintr-un singur thread până la returnare.
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+
+    def __getattr__(self, name):
+        raw = self.__dict__.get('_raw')
+        if raw is None:
+            raise pymysql.err.InterfaceError(0, "Conexiunea a fost deja returnată în pool.")
+        return getattr(raw, name)
+
+    @property
+    def open(self):
+        return self._raw is not None and self._raw.open
+
+    def cursor(self, *args, **kwargs):
+        """Cursorul conexiunii, cronometrat (vezi TimedCursor și query_stats)."""
+        return TimedCursor(self.__getattr__('cursor')(*args, **kwargs), query_stats)
+
+    def close(self):
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool.release(raw)
+
+    def discard(self):
+        """Închide conexiunea de tot (de ex. după o eroare care a lăsat-o într-o stare nesigură)."""
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool.release(raw, discard=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+class ConnectionPool:
+    """
+    Pool de conexiuni PyMySQL pentru un set de credențiale și opțiuni, folosit din mai multe thread-uri.
+
+    - cel mult `max_size` conexiuni deschise; acquire() așteaptă `timeout` secunde o conexiune liberă
+      și apoi ridică ConnectionPoolTimeout;
+    - conexiunile returnate rămân deschise și sunt refolosite (fără un nou handshake TLS / autentificare);
+    - la împrumut, conexiunile inactive de peste `health_check_interval` secunde sunt verificate cu ping,
+      iar cele căzute sunt închise și înlocuite cu una nouă;
+    - la returnare se face rollback (o tranzacție neconfirmată nu trece la următorul thread), iar
+      conexiunile închise sau care nu mai răspund sunt eliminate din pool.
+    """
+
+    def __init__(self, params, max_size=DB_POOL_MAX_SIZE, timeout=DB_POOL_CHECKOUT_TIMEOUT,
+                 health_check_interval=DB_POOL_HEALTH_CHECK_INTERVAL, connect=pymysql.connect):
+        self.params = params
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._connect = connect
+        self._idle = []  # (conexiune, momentul returnării), ultima returnată la final
+        self._in_use = 0
+        self._closed = False
+        self._lock = threading.Condition()
+
+    @property
+    def size(self):
+        """Numărul de conexiuni deschise (libere + împrumutate)."""
+        with self._lock:
+            return len(self._idle) + self._in_use
+
+    def acquire(self):
+        """Împrumută o conexiune (PooledConnection); se returnează cu close() sau folosind-o în `with`."""
+        deadline = time.monotonic() + self.timeout
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise pymysql.err.InterfaceError(0, "Pool-ul de conexiuni a fost închis.")
+                if self._idle:
+                    raw, returned_at = self._idle.pop()
+                    break
+                if self._in_use < self.max_size:
+                    raw, returned_at = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise ConnectionPoolTimeout(0, f"Nicio conexiune liberă în pool după {self.timeout} s "
+                                                   f"({self.max_size} conexiuni folosite).")
+                self._lock.wait(remaining)
+            self._in_use += 1
+
+        # Conectarea și ping-ul au loc în afara lock-ului, ca alte thread-uri să nu aștepte după rețea
+        try:
+            if raw is not None and time.monotonic() - returned_at >= self.health_check_interval \
+                    and not self._is_alive(raw):
+                self._close_quietly(raw)
+                raw = None
+            if raw is None:
+                raw = self._connect(**self.params)
+        except BaseException:
+            self._forget()
+            raise
+        return PooledConnection(self, raw)
+
+    @contextmanager
+    def connection(self):
+        """Context manager: împrumută o conexiune și o returnează la ieșire (și la excepții)."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def release(self, raw, discard=False):
+        """Returnează în pool o conexiune brută împrumutată (apelat de PooledConnection.close)."""
+        if not discard and raw.open:
+            try:
+                raw.rollback()
+            except Exception as e:
+                logging.debug(f"Pool DB: conexiunea nu a putut fi resetată și este închisă: {e}")
+                discard = True
+        else:
+            discard = True
+        with self._lock:
+            self._in_use -= 1
+            if not discard and not self._closed:
+                self._idle.append((raw, time.monotonic()))
+                raw = None
+            self._lock.notify()
+        if raw is not None:
+            self._close_quietly(raw)
+
+    def close(self):
+        """Închide conexiunile libere; cele împrumutate sunt închise la returnare."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._lock.notify_all()
+        for raw, _ in idle:
+            self._close_quietly(raw)
+
+    def _forget(self):
+        with self._lock:
+            self._in_use -= 1
+            self._lock.notify()
+
+    @staticmethod
+    def _is_alive(raw):
+        try:
+            raw.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+
+_connection_pools = {}
+_connection_pools_lock = threading.Lock()
+
+
+def get_connection_pool(db_credentials, **options):
+    """
+    Pool-ul comun al procesului pentru credențialele și opțiunile date (cursorclass, local_infile,
+    timeout-uri). Același set de credențiale și opțiuni primește mereu același pool, din orice thread.
+    """
+    params = connection_params(db_credentials, **options)
+    key = tuple(sorted((name, repr(value)) for name, value in params.items()))
+    with _connection_pools_lock:
+        pool = _connection_pools.get(key)
+        if pool is None:
+            if not _connection_pools:
+                atexit.register(close_connection_pools)
+            pool = _connection_pools[key] = ConnectionPool(params)
+        return pool
+
+
+def close_connection_pools():
+    """Închide toate pool-urile procesului (la ieșirea din aplicație)."""
+    with _connection_pools_lock:
+        pools = list(_connection_pools.values())
+        _connection_pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+@contextmanager
+def streaming_cursor(conn, cursorclass=SSDictCursor):
+    """
+    Cursor nebufferizat (SSCursor / SSDictCursor) pe o conexiune împrumutată din pool: rândurile sunt
+    citite de pe server pe măsură ce sunt cerute (fetchmany), nu toate la execute(). Conexiunea rămâne
+    ocupată până la închiderea cursorului; după o eroare sau o oprire înainte de ultimul rând ea este
+    eliminată din pool, pentru că închiderea socket-ului costă mai puțin decât citirea restului rezultatului.
+    """
+    cursor = conn.cursor(cursorclass)
+    try:
+        yield cursor
+    except BaseException:
+        cursor.finish()
+        conn.discard()
+        raise
+    cursor.close()
+
+
+def get_new_db_connection(db_credentials):
+    """
+    Împrumută din pool-ul comun o conexiune cu DictCursor, pentru a fi folosită într-un thread separat.
+    close() o returnează în pool.
+    Returnează un obiect de conexiune sau None în caz de eroare.
+    """
+    if not db_credentials:
+        logging.error("Eroare get_new_db_connection: Nu au fost furnizate credentiale.")
+        return None
+    try:
+        return get_connection_pool(db_credentials, cursorclass=DictCursor).acquire()
+    except (pymysql.Error, TypeError, ValueError) as e:
+        logging.error(f"Eroare la crearea unei noi conexiuni DB: {e}")
+        return None
@@ -0,0 +1,57 @@
+# src/common/tx_fingerprint.py
+
+import re
+import hashlib
+from datetime import date, datetime
+from decimal import Decimal
+
+# Lungimea amprentei (SHA-256 în format hex), folosită și în definiția coloanei tx_fingerprint
+TX_FINGERPRINT_LENGTH = 64
+
+# Parserul inițial (regex `(:61:.*?)(?=(:61:|$))`) lăsa în descrierea ultimei tranzacții a fiecărui extras
+# restul mesajului SWIFT: ":62F:... :64:... -} {1:...}{2:...}{4: :20:... :25:... :60F:...". Descrierea se
+# oprește la primul tag de sold / antet al extrasului următor sau la terminatorul mesajului.
+RE_LEGACY_DESCRIPTION_TRAILER = re.compile(r"(?:^|\s):(?:20|21|25|28C?|60[FM]|62[FM]|64|65):|-\}|\{1:")
+
+def _normalize_amount(suma):
+    """Aduce suma (float, Decimal sau string) la forma cu 2 zecimale a coloanei DECIMAL(15,2)."""
+    if suma is None or suma == "":
+        return ""
+    return str(Decimal(str(suma)).quantize(Decimal('0.01')))
+
+def _normalize_date(data):
+    if isinstance(data, datetime):
+        return data.date().isoformat()
+    if isinstance(data, date):
+        return data.isoformat()
+    return str(data or "")
+
+def normalize_legacy_description(descriere):
+    """
+    Descrierea unui rând importat cu parserul inițial, adusă la forma produsă de parserul în flux
+    (mt940_parser): fără soldurile și antetele extrasului lipite de ultima tranzacție.
+    Descrierile care nu conțin astfel de resturi sunt returnate neschimbate. Este folosită doar pentru
+    amprenta calculată la migrare; descrierea salvată în baza de date nu este modificată.
+    """
+    if not descriere:
+        return descriere
+    match = RE_LEGACY_DESCRIPTION_TRAILER.search(descriere)
+    return descriere[:match.start()].rstrip() if match else descriere
+
+def compute_tx_fingerprint(id_cont, data, suma, tip, descriere, rrn=None, tid=None):
+    """
+    Calculează amprenta unei tranzacții: SHA-256 peste cont, dată, sumă, tip,
+    descriere și, dacă există, câmpurile RRN/TID.
+    Aceeași funcție este folosită la import și la completarea rândurilor existente,
+    astfel încât amprentele sunt comparabile indiferent de sursă.
+    """
+    parts = (
+        str(id_cont),
+        _normalize_date(data),
+        _normalize_amount(suma),
+        (tip or "").lower(),
+        descriere or "",
+        rrn or "",
+        tid or "",
+    )
+    return hashlib.sha256("|".join(parts).encode('utf-8')).hexdigest()
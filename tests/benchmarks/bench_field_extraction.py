@@ -0,0 +1,122 @@
+# tests/benchmarks/bench_field_extraction.py
+"""
+Micro-benchmark pentru extragerea câmpurilor din descrierea :86:.
+
+Rulare:  python tests/benchmarks/bench_field_extraction.py [număr_înregistrări]
+
+Afișează costul pe înregistrare (µs) pentru:
+  - cele șapte căutări regex independente (varianta inițială);
+  - o singură alternanță compilată cu toate etichetele (o trecere prin text);
+  - extractorul ghidat de etichete din mt940_parser (varianta folosită la import);
+  - parse_tx_record complet, cu strptime față de parse_yymmdd.
+
+extract_description_fields păstrează căutările separate (ghidate de etichete) în locul unei singure
+treceri cu alternanța combinată doar cât timp sunt mai rapide; compare_extractors măsoară ambele variante
+(și la rularea din tests/benchmarks/test_import_benchmarks.py, unde timpii apar în extra_info).
+"""
+import os
+import re
+import sys
+import timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from BTExtrasViewer import mt940_parser
+
+DESCRIERI = [
+    "PLATA FACT. {n} C.I.F.: 998877 FURNIZOR EXEMPLU SRL",
+    "POS TID: T{n} RRN: 000{n} PAN: 4111XXXX1111 MID 778899 MAGAZIN ALIMENTAR SRL",
+    "INCASARE CLIENT MARE SRL REF {n}",
+    "comision administrare cont {n}",
+    "TRANSFER INTRE CONTURI PROPRII {n}",
+]
+
+LEGACY_FIELDS = (
+    ("cif", mt940_parser.RE_CIF), ("beneficiar", mt940_parser.RE_BENEFICIAR),
+    ("factura", mt940_parser.RE_FACTURA), ("tid", mt940_parser.RE_TID),
+    ("rrn", mt940_parser.RE_RRN), ("pan", mt940_parser.RE_PAN), ("mid", mt940_parser.RE_MID),
+)
+
+# O singură trecere: alternanță cu grupuri numite, prima potrivire a fiecărei etichete câștigă
+RE_COMBINED = re.compile(
+    r"(?P<cif>C\.I\.F\.?:\s?\d+)|(?P<factura>(?:FACT(?:URA)?(?: NR)?(?:\.|:)?\s*|F\.\s*)\w+)"
+    r"|(?P<tid>TID:?\s?\S+)|(?P<rrn>RRN:?\s?\S+)|(?P<pan>PAN:?\s?\S+)|(?P<mid>MID\s*\d+)"
+)
+COMBINED_VALUE_RES = {
+    "cif": mt940_parser.RE_CIF, "factura": mt940_parser.RE_FACTURA, "tid": mt940_parser.RE_TID,
+    "rrn": mt940_parser.RE_RRN, "pan": mt940_parser.RE_PAN, "mid": mt940_parser.RE_MID,
+}
+
+
+def legacy_extract(descr):
+    result = {}
+    for name, regex in LEGACY_FIELDS:
+        match = regex.search(descr)
+        result[name] = match.group(1).strip() if match else None
+    return result
+
+
+def combined_extract(descr):
+    result = dict.fromkeys(COMBINED_VALUE_RES)
+    for match in RE_COMBINED.finditer(descr):
+        name = match.lastgroup
+        if result[name] is None:
+            result[name] = COMBINED_VALUE_RES[name].match(match.group(name)).group(1)
+    beneficiar = mt940_parser.RE_BENEFICIAR.search(descr)
+    result["beneficiar"] = beneficiar.group(1).strip() if beneficiar else None
+    return result
+
+
+def legacy_parse_tx_record(record):
+    match61 = mt940_parser.RE_61_HEADER.match(record["tag61"])
+    date_str, type_char, amount_str, tx_code_full = match61.groups()
+    descr = record["tag86"]
+    tx = {
+        "data": datetime.strptime(date_str, '%y%m%d').date(),
+        "suma": float(amount_str.replace(',', '.')),
+        "tip": "credit" if type_char == 'C' else "debit",
+        "cod_tranzactie": tx_code_full,
+        "descriere": descr,
+    }
+    tx.update(legacy_extract(descr))
+    return tx
+
+
+def _per_record_us(func, items, repeat=5):
+    best = min(timeit.repeat(lambda: [func(item) for item in items], number=1, repeat=repeat))
+    return best / len(items) * 1e6
+
+
+def compare_extractors(descrieri):
+    """
+    Costul pe înregistrare (µs) al extractorului folosit la import și al alternanței combinate (o trecere
+    prin text), după ce verifică faptul că ambele extrag aceleași câmpuri. Returnează (ghidat, combinat);
+    comparația timpilor este doar raportată, nu verificată (depinde de încărcarea mașinii).
+    """
+    for descr in descrieri:
+        assert combined_extract(descr) == mt940_parser.extract_description_fields(descr), descr
+    return _per_record_us(mt940_parser.extract_description_fields, descrieri), _per_record_us(combined_extract, descrieri)
+
+
+def main(count=20000):
+    descrieri = [DESCRIERI[n % len(DESCRIERI)].format(n=n) for n in range(count)]
+    records = [
+        {"tag61": f"2501{(n % 28) + 1:02d}C{n + 1},00NTRFNONREF", "tag86": descr, "context": {}}
+        for n, descr in enumerate(descrieri)
+    ]
+
+    for descr in descrieri[:len(DESCRIERI)]:
+        assert legacy_extract(descr) == combined_extract(descr) == mt940_parser.extract_description_fields(descr)
+
+    print(f"{count} înregistrări, cost pe înregistrare (µs):")
+    print(f"  căutări separate (inițial)   {_per_record_us(legacy_extract, descrieri):7.2f}")
+    tag_driven, combined = compare_extractors(descrieri)
+    print(f"  alternanță combinată         {combined:7.2f}")
+    print(f"  ghidat de etichete (import)  {tag_driven:7.2f}")
+    print(f"  parse_tx_record inițial      {_per_record_us(legacy_parse_tx_record, records):7.2f}")
+    print(f"  parse_tx_record actual       {_per_record_us(mt940_parser.parse_tx_record, records):7.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
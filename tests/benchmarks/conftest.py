@@ -0,0 +1,25 @@
+# tests/benchmarks/conftest.py
+"""
+Benchmark-urile generează extrase sintetice mari, deci nu rulează odată cu suita obișnuită (`pytest tests/`).
+Sunt pornite doar la cerere: `pytest -m benchmark`, `--benchmark-only` sau BTEXTRAS_BENCH=1.
+"""
+import os
+
+import pytest
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def benchmarks_requested(config):
+    return ("benchmark" in (config.getoption("markexpr", "") or "")
+            or config.getoption("benchmark_only", False)
+            or os.environ.get("BTEXTRAS_BENCH") == "1")
+
+
+def pytest_collection_modifyitems(config, items):
+    if benchmarks_requested(config):
+        return
+    skip = pytest.mark.skip(reason="benchmark-urile rulează doar la cerere (pytest -m benchmark sau BTEXTRAS_BENCH=1)")
+    for item in items:
+        if str(item.fspath).startswith(BENCH_DIR):
+            item.add_marker(skip)
@@ -0,0 +1,166 @@
+# tests/benchmarks/test_import_benchmarks.py
+"""
+Benchmark-uri pentru calea de import (necesită pytest-benchmark).
+
+Rulare (benchmark-urile nu fac parte din suita obișnuită, vezi conftest.py):
+    pytest tests/benchmarks -m benchmark
+    BTEXTRAS_BENCH_ROWS=100000 pytest tests/benchmarks --benchmark-only --benchmark-autosave
+
+Mărimea extrasului generat este controlată de BTEXTRAS_BENCH_ROWS (implicit 5000 de tranzacții).
+Comparația extragerii pe înregistrări cu cea vectorizată (pandas) folosește un singur extras de
+BTEXTRAS_BENCH_STATEMENT_ROWS tranzacții (implicit 20000; 100000 pentru măsurătorile din README).
+Comparați rezultatele salvate între versiuni cu `pytest-benchmark compare` pentru a prinde regresiile
+de viteză înainte de release.
+"""
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from BTExtrasViewer import import_engine, mt940_parser
+from tests.benchmarks import bench_field_extraction
+from tests.db_standin import StandInConnection
+from tests.mt940_generator import DEFAULT_IBANS, write_statement_file, write_statement_set
+
+BENCH_ROWS = int(os.environ.get("BTEXTRAS_BENCH_ROWS", "5000"))
+STATEMENT_ROWS = int(os.environ.get("BTEXTRAS_BENCH_STATEMENT_ROWS", "20000"))
+ACCOUNT_ID = 1
+
+
+@pytest.fixture(scope="module")
+def statement_file(tmp_path_factory):
+    path = tmp_path_factory.mktemp("bench") / "extras.sta"
+    return write_statement_file(str(path), DEFAULT_IBANS[0], BENCH_ROWS, seed=1)
+
+
+@pytest.fixture(scope="module")
+def records(statement_file):
+    return list(mt940_parser.iter_mt940_records(statement_file))
+
+
+@pytest.fixture(scope="module")
+def transactions(statement_file):
+    return list(mt940_parser.iter_parsed_transactions(statement_file))
+
+
+@pytest.mark.benchmark(group="parsare")
+def test_bench_tokenizare(benchmark, statement_file):
+    result = benchmark(lambda: sum(1 for _ in mt940_parser.iter_mt940_records(statement_file)))
+    assert result == BENCH_ROWS
+
+
+@pytest.mark.benchmark(group="parsare")
+def test_bench_parse_tx_record(benchmark, records):
+    result = benchmark(lambda: [mt940_parser.parse_tx_record(record) for record in records])
+    assert len(result) == BENCH_ROWS
+
+
+@pytest.mark.benchmark(group="parsare")
+def test_bench_extragere_campuri_86(benchmark, records):
+    descriptions = [record["tag86"] for record in records]
+    result = benchmark(lambda: [mt940_parser.extract_description_fields(text) for text in descriptions])
+    assert any(fields["mid"] for fields in result)
+
+
+@pytest.mark.benchmark(group="parsare")
+def test_bench_extragere_ghidata_fata_de_alternanta(benchmark, records):
+    """
+    Extractorul ghidat de etichete față de alternanța combinată (vezi docstring-ul extract_description_fields):
+    timpii sunt raportați în extra_info; se verifică doar că ambele extrag aceleași câmpuri.
+    """
+    descriptions = [record["tag86"] for record in records]
+    tag_driven, combined = benchmark.pedantic(bench_field_extraction.compare_extractors, args=(descriptions,),
+                                              rounds=1, iterations=1)
+    benchmark.extra_info.update(ghidat_us=round(tag_driven, 3), alternanta_us=round(combined, 3))
+
+
+@pytest.mark.benchmark(group="parsare")
+def test_bench_parsare_fisier_complet(benchmark, statement_file):
+    result = benchmark(mt940_parser.parse_statement_file, statement_file)
+    assert len(result) == BENCH_ROWS
+
+
+@pytest.fixture(scope="module")
+def large_statement_records(tmp_path_factory):
+    """Înregistrările unui singur extras mare (extrasele consolidate anuale)."""
+    path = tmp_path_factory.mktemp("bench_extras_mare") / "extras_mare.sta"
+    write_statement_file(str(path), DEFAULT_IBANS[0], STATEMENT_ROWS, seed=4, per_statement=STATEMENT_ROWS)
+    return list(mt940_parser.iter_mt940_records(str(path)))
+
+
+@pytest.mark.benchmark(group="extragere")
+def test_bench_extragere_pe_inregistrari(benchmark, large_statement_records):
+    result = benchmark.pedantic(lambda: [mt940_parser.parse_tx_record(record) for record in large_statement_records],
+                                rounds=3, iterations=1)
+    assert len(result) == STATEMENT_ROWS
+
+
+@pytest.mark.benchmark(group="extragere")
+def test_bench_extragere_vectorizata_pandas(benchmark, large_statement_records):
+    """
+    Varianta pandas nu este folosită la import (este mai lentă, vezi README); rulează doar cu benchmark-urile
+    cerute explicit (conftest.py) și doar dacă pandas este instalat.
+    """
+    pytest.importorskip("pandas")
+    from BTExtrasViewer import mt940_vectorized
+    result = benchmark.pedantic(mt940_vectorized.parse_tx_records, args=(large_statement_records,), rounds=3, iterations=1)
+    assert len(result) == STATEMENT_ROWS
+    assert result[-1] == mt940_parser.parse_tx_record(large_statement_records[-1])
+
+
+@pytest.mark.benchmark(group="import")
+def test_bench_amprente(benchmark, transactions):
+    writer = import_engine.TransactionBulkWriter(None, ACCOUNT_ID)
+    result = benchmark(lambda: {writer.fingerprint(tx) for tx in transactions})
+    assert len(result) == BENCH_ROWS
+
+
+@pytest.mark.benchmark(group="import")
+def test_bench_inserare_pe_loturi(benchmark, transactions):
+    def insert_all():
+        connection = StandInConnection()
+        writer = import_engine.TransactionBulkWriter(connection, ACCOUNT_ID)
+        for tx in transactions:
+            writer.add(tx)
+        writer.flush()
+        return connection, writer
+
+    connection, writer = benchmark(insert_all)
+    assert writer.inserted == connection.count("tranzactii") == BENCH_ROWS
+
+
+@pytest.mark.benchmark(group="import")
+def test_bench_import_lot_complet(benchmark, tmp_path_factory):
+    """Lot cu mai multe conturi: hash, parsare, deduplicare, inserare și istoric, cap-coadă."""
+    paths = write_statement_set(str(tmp_path_factory.mktemp("lot")), BENCH_ROWS, accounts=2, files_per_account=2, seed=2)
+
+    def import_batch():
+        connection = StandInConnection()
+        stats = import_engine.run_import_batch(connection, paths, ACCOUNT_ID, max_parse_workers=1)
+        return connection, stats
+
+    connection, stats = benchmark.pedantic(import_batch, rounds=3, iterations=1)
+    assert stats["inserted"] == connection.count("tranzactii") == BENCH_ROWS
+    assert connection.count("istoric_importuri") == len(paths)
+
+
+@pytest.mark.benchmark(group="import")
+def test_bench_import_lot_prin_staging(benchmark, tmp_path_factory):
+    """
+    Același lot, scris prin TSV + LOAD DATA în tabela de staging și mutat cu INSERT ... SELECT.
+    Baza locală emulează LOAD DATA prin executemany, deci aici se măsoară doar partea din Python
+    (scrierea TSV-ului); câștigul real apare doar pe MariaDB.
+    """
+    paths = write_statement_set(str(tmp_path_factory.mktemp("lot_staging")), BENCH_ROWS, accounts=2, files_per_account=2, seed=2)
+
+    def import_batch():
+        connection = StandInConnection()
+        stats = import_engine.run_import_batch(connection, paths, ACCOUNT_ID, max_parse_workers=1, staging=True)
+        return connection, stats
+
+    connection, stats = benchmark.pedantic(import_batch, rounds=3, iterations=1)
+    assert stats["inserted"] == connection.count("tranzactii") == BENCH_ROWS
@@ -0,0 +1,131 @@
+# tests/db_standin.py
+"""
+Bază de date locală (SQLite în memorie) care înlocuiește MariaDB în benchmark-urile importului.
+
+Conexiunea expune interfața PyMySQL folosită de import_engine (cursor ca context manager,
+`executemany` care returnează numărul de rânduri afectate, `commit`, `rollback`, `open`) și
+traduce puținele construcții specifice MySQL din interogările importului (inclusiv LOAD DATA LOCAL
+INFILE din formatul TSV implicit, pentru importul prin staging). Tabelele au doar
+coloanele și indexurile folosite la import, inclusiv indexul unic pe tx_fingerprint, astfel încât
+costul inserării și al respingerii duplicatelor să fie măsurat pe un B-tree real.
+"""
+import re
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE tipuri_tranzactii (cod TEXT PRIMARY KEY, descriere_tip TEXT NOT NULL);
+CREATE TABLE swift_code_descriptions (cod_swift TEXT PRIMARY KEY, descriere_standard TEXT);
+CREATE TABLE tranzactii (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, id_cont_fk INTEGER, data TEXT, descriere TEXT, suma REAL, tip TEXT,
+    cod_tranzactie_fk TEXT, cif TEXT, beneficiar TEXT, factura TEXT, tid TEXT, rrn TEXT, pan TEXT, mid TEXT,
+    sold_initial REAL, sold_final REAL, sold_dupa_tranzactie REAL, tx_fingerprint TEXT UNIQUE
+);
+CREATE INDEX idx_tranzactii_cont_data ON tranzactii (id_cont_fk, data);
+CREATE TABLE istoric_importuri (
+    id_import INTEGER PRIMARY KEY AUTOINCREMENT, nume_fisier TEXT, tranzactii_procesate INTEGER,
+    tranzactii_ignorate INTEGER, id_cont_fk INTEGER, id_utilizator_fk INTEGER, hash_fisier TEXT,
+    dimensiune_fisier INTEGER, referinta_extras TEXT, durata_ms INTEGER, durata_citire_ms INTEGER,
+    durata_tokenizare_ms INTEGER, durata_extragere_ms INTEGER, durata_deduplicare_ms INTEGER,
+    durata_inserare_ms INTEGER, durata_commit_ms INTEGER, randuri_pe_secunda REAL
+);
+CREATE TABLE extrase_solduri (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, id_cont_fk INTEGER, referinta TEXT, numar_extras TEXT,
+    data_sold_initial TEXT, sold_initial REAL, data_sold_final TEXT, sold_final REAL, valuta TEXT,
+    numar_tranzactii INTEGER, sold_verificat INTEGER,
+    UNIQUE (id_cont_fk, referinta, numar_extras, data_sold_final)
+);
+CREATE TABLE importuri_in_curs (
+    id_cont_fk INTEGER, hash_fisier TEXT, cale_fisier TEXT, nume_fisier TEXT, inregistrari INTEGER, octet_extras INTEGER,
+    inregistrari_extras INTEGER, tranzactii_inserate INTEGER, tranzactii_ignorate INTEGER, id_utilizator_fk INTEGER,
+    PRIMARY KEY (id_cont_fk, hash_fisier)
+);
+CREATE TABLE conturi_bancare (id_cont INTEGER PRIMARY KEY, iban TEXT UNIQUE);
+CREATE TABLE versiuni_date (tabela TEXT PRIMARY KEY, versiune INTEGER NOT NULL DEFAULT 0);
+"""
+
+RE_ON_DUPLICATE_KEY = re.compile(r"ON DUPLICATE KEY UPDATE .*$", re.IGNORECASE | re.DOTALL)
+RE_LOAD_DATA = re.compile(r"^LOAD DATA LOCAL INFILE %s INTO TABLE (\w+) .*\(([^)]*)\)\s*$", re.IGNORECASE | re.DOTALL)
+RE_TSV_ESCAPE = re.compile(r"\\(.)")
+TSV_ESCAPES = {"t": "\t", "n": "\n", "r": "\r", "0": "\0"}
+
+
+def translate_query(query):
+    """Adaptează o interogare MySQL la dialectul SQLite (parametri, ON DUPLICATE KEY)."""
+    return RE_ON_DUPLICATE_KEY.sub("ON CONFLICT DO NOTHING", query).replace("%s", "?")
+
+
+def _adapt_params(params):
+    # SQLite nu cunoaște tipul date; MariaDB primește oricum date ca text ISO
+    return tuple(value.isoformat() if hasattr(value, "isoformat") else value for value in params)
+
+
+def _tsv_field(text):
+    if text == "\\N":
+        return None
+    return RE_TSV_ESCAPE.sub(lambda m: TSV_ESCAPES.get(m.group(1), m.group(1)), text)
+
+
+def _load_data_local_infile(cursor, query, params):
+    """Emulează LOAD DATA LOCAL INFILE (tab / newline / escape cu backslash) prin executemany."""
+    match = RE_LOAD_DATA.match(query)
+    table, columns = match.group(1), [column.strip() for column in match.group(2).split(",")]
+    with open(params[0], encoding="utf-8", newline="") as f:
+        rows = [tuple(_tsv_field(field) for field in line.split("\t")) for line in f.read().split("\n") if line]
+    cursor.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", rows)
+    return len(rows)
+
+
+class StandInCursor:
+    def __init__(self, connection):
+        self._cursor = connection.cursor()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def execute(self, query, params=None):
+        if RE_LOAD_DATA.match(query):
+            return _load_data_local_infile(self._cursor, query, params)
+        self._cursor.execute(translate_query(query), _adapt_params(params or ()))
+        return self._cursor.rowcount
+
+    def executemany(self, query, seq_params):
+        self._cursor.executemany(translate_query(query), (_adapt_params(params) for params in seq_params))
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def close(self):
+        self._cursor.close()
+
+
+class StandInConnection:
+    """Conexiune compatibilă (pentru import) cu pymysql.Connection, peste SQLite."""
+
+    def __init__(self, path=":memory:"):
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript(SCHEMA)
+        self.open = True
+
+    def cursor(self):
+        return StandInCursor(self._connection)
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def close(self):
+        self._connection.close()
+        self.open = False
+
+    def count(self, table):
+        return self._connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
@@ -0,0 +1,201 @@
+# tests/mt940_generator.py
+"""
+Generator determinist de extrase MT940 în stilul Banca Transilvania, pentru teste și benchmark-uri.
+
+Extrasele conțin câte un mesaj (:20: ... :62F:/:64:) pe zi, descrieri :86: realiste pe mai
+multe linii (plăți cu factură și CIF, încasări, comisioane, tranzacții POS cu TID/RRN/PAN/MID,
+inclusiv loturi POS grupate pe același MID) și solduri coerente între :60F:, :61: și :62F:.
+Aceeași combinație (cont, număr de tranzacții, seed) produce întotdeauna același fișier.
+
+Rulare (din rădăcina proiectului):
+    python -m tests.mt940_generator --transactions 100000 --accounts 3 --out /tmp/extrase
+"""
+import os
+import random
+import argparse
+import textwrap
+from datetime import date, timedelta
+
+DEFAULT_IBANS = (
+    "RO49BTRL01301202N12345XX",
+    "RO66BTRL01304202Q98765XX",
+    "RO12BTRL06701205A11223XX",
+    "RO90BTRL01301205E55555XX",
+)
+
+FURNIZORI = (
+    ("ELECTRICA FURNIZARE SA", "28909028"), ("DIGI ROMANIA SA", "5888716"),
+    ("ORANGE ROMANIA SA", "9010105"), ("ROMPETROL DOWNSTREAM SRL", "1777257"),
+    ("DEDEMAN SRL", "2816464"), ("EXPERT CONTABIL CONSULT SRL", "31456721"),
+    ("TRANSPORT RAPID LOGISTIC SRL", "40123987"), ("BIROTICA OFFICE DIRECT SRL", "17654320"),
+)
+CLIENTI = (
+    "CLIENT MARE DISTRIBUTIE SRL", "CONSTRUCT INVEST GRUP SRL", "AGRO VEST COMPANY SRL",
+    "MEDICAL CARE CENTER SRL", "PRIMARIA MUNICIPIULUI CLUJ NAPOCA",
+)
+COMERCIANTI_POS = (
+    ("KAUFLAND ROMANIA", "MID 110023"), ("LIDL DISCOUNT SRL", "MID 110087"),
+    ("OMV PETROM MARKETING", "MID 220145"), ("EMAG.RO", "MID 330512"), ("MEGA IMAGE", "MID 110311"),
+)
+COMISIOANE = (
+    "COMISION ADMINISTRARE CONT", "COMISION PLATA INSTANT", "COMISION RETRAGERE NUMERAR",
+)
+
+# Lățimea maximă a liniilor :86: (descrierea lungă este continuată pe liniile următoare)
+DESCRIPTION_LINE_WIDTH = 65
+
+
+def _amount(value):
+    """Suma în formatul SWIFT: virgulă zecimală, fără separator de mii (ex. 1234,50)."""
+    return f"{value:.2f}".replace(".", ",")
+
+
+def _wrap(text, width=DESCRIPTION_LINE_WIDTH):
+    # Liniile sunt rupte între cuvinte: parserul le reunește cu un spațiu
+    return textwrap.wrap(text, width) or [""]
+
+
+class Mt940Generator:
+    """Produce tranzacții și mesaje MT940 deterministe pentru un cont."""
+
+    def __init__(self, iban, seed=0, start_date=date(2024, 1, 2), opening_balance=100000.0):
+        self.iban = iban
+        self.rng = random.Random(f"{iban}:{seed}")
+        self.current_date = start_date
+        self.balance = round(opening_balance, 2)
+        self.statement_no = 0
+        self.counter = 0
+
+    def _reference(self):
+        self.counter += 1
+        return f"BT{self.current_date:%y%m%d}{self.counter:08d}"
+
+    def _payment(self):
+        name, cif = self.rng.choice(FURNIZORI)
+        invoice = self.rng.randint(1000, 999999)
+        amount = round(self.rng.uniform(50, 25000), 2)
+        style = self.rng.random()
+        if style < 0.5:
+            text = f"PLATA FACT. {invoice} C.I.F.: {cif} {name} REF. {self._reference()}"
+        elif style < 0.8:
+            text = f"OP PLATA FACTURA NR: {invoice} CATRE {name} CIF {cif}"
+        else:
+            text = f"TRANSFER F. {invoice} {name} C.I.F: {cif} SERVICII CONFORM CONTRACT"
+        return "D", amount, "NTRF", text
+
+    def _receipt(self):
+        name = self.rng.choice(CLIENTI)
+        amount = round(self.rng.uniform(100, 80000), 2)
+        text = f"INCASARE {name} CONTRAVALOARE FACTURA {self.rng.randint(1, 9999)} REF. {self._reference()}"
+        return "C", amount, "NTRF", text
+
+    def _fee(self):
+        return "D", round(self.rng.uniform(0.5, 45), 2), "NCOM", self.rng.choice(COMISIOANE)
+
+    def _pos(self, merchant=None):
+        name, mid = merchant or self.rng.choice(COMERCIANTI_POS)
+        amount = round(self.rng.uniform(5, 1500), 2)
+        tid = f"T{self.rng.randint(100000, 999999)}"
+        rrn = f"{self.rng.randint(10 ** 11, 10 ** 12 - 1)}"
+        pan = f"4{self.rng.randint(100, 999)}XXXXXX{self.rng.randint(1000, 9999)}"
+        text = f"POS {name} TID: {tid} RRN: {rrn} PAN: {pan} {mid} DATA {self.current_date:%d.%m.%Y}"
+        return "D", amount, "NCAR", text
+
+    def iter_day_transactions(self, count):
+        """Returnează `count` tranzacții (tip C/D, sumă, cod, descriere) pentru ziua curentă."""
+        produced = 0
+        while produced < count:
+            kind = self.rng.random()
+            if kind < 0.15 and count - produced >= 3:
+                # Lot POS: mai multe tranzacții consecutive la același comerciant (același MID)
+                merchant = self.rng.choice(COMERCIANTI_POS)
+                for _ in range(min(self.rng.randint(3, 8), count - produced)):
+                    yield self._pos(merchant)
+                    produced += 1
+                continue
+            if kind < 0.45:
+                yield self._pos()
+            elif kind < 0.75:
+                yield self._payment()
+            elif kind < 0.95:
+                yield self._receipt()
+            else:
+                yield self._fee()
+            produced += 1
+
+    def statement_lines(self, transaction_count):
+        """Liniile unui mesaj MT940 (un extras zilnic) cu `transaction_count` tranzacții."""
+        self.statement_no += 1
+        day = self.current_date
+        lines = [
+            "{1:F01BTRLRO22AXXX0000000000}{2:I940BTRLRO22XXXXN}{4:",
+            f":20:{day:%y%m%d}{self.statement_no:06d}",
+            f":25:{self.iban}",
+            f":28C:{self.statement_no:05d}/001",
+            f":60F:{'C' if self.balance >= 0 else 'D'}{day:%y%m%d}RON{_amount(abs(self.balance))}",
+        ]
+        for type_char, amount, code, text in self.iter_day_transactions(transaction_count):
+            self.balance = round(self.balance + (amount if type_char == "C" else -amount), 2)
+            lines.append(f":61:{day:%y%m%d}{day:%m%d}{type_char}{_amount(amount)}{code}NONREF//{self._reference()}")
+            description = _wrap(text)
+            lines.append(f":86:{description[0]}")
+            lines.extend(description[1:])
+        closing = f"{'C' if self.balance >= 0 else 'D'}{day:%y%m%d}RON{_amount(abs(self.balance))}"
+        lines += [f":62F:{closing}", f":64:{closing}", "-}"]
+
+        self.current_date += timedelta(days=1)
+        if self.current_date.weekday() == 5:  # extrasele nu se emit în weekend
+            self.current_date += timedelta(days=2)
+        return lines
+
+
+def write_statement_file(file_path, iban, transaction_count, seed=0, per_statement=250):
+    """
+    Scrie un fișier MT940 cu `transaction_count` tranzacții, împărțite în extrase zilnice
+    de câte `per_statement` tranzacții. Scrierea este în flux, deci funcționează și pentru 1M rânduri.
+    Returnează calea fișierului.
+    """
+    generator = Mt940Generator(iban, seed)
+    remaining = transaction_count
+    with open(file_path, "w", encoding="utf-8", newline="\r\n") as f:
+        while remaining > 0:
+            count = min(per_statement, remaining)
+            f.write("\n".join(generator.statement_lines(count)) + "\n")
+            remaining -= count
+    return file_path
+
+
+def write_statement_set(directory, transaction_count, accounts=1, files_per_account=1, seed=0, per_statement=250):
+    """
+    Generează extrase pentru mai multe conturi (câte `files_per_account` fișiere fiecare), cu
+    `transaction_count` tranzacții în total, împărțite egal. Returnează lista căilor, ordonată.
+    """
+    os.makedirs(directory, exist_ok=True)
+    ibans = [DEFAULT_IBANS[i] if i < len(DEFAULT_IBANS) else f"RO{i % 100:02d}BTRL0130120{i:06d}XXX"
+             for i in range(accounts)]
+    total_files = accounts * files_per_account
+    paths = []
+    for index in range(total_files):
+        iban = ibans[index % accounts]
+        count = transaction_count // total_files + (1 if index < transaction_count % total_files else 0)
+        path = os.path.join(directory, f"extras_{iban[-8:]}_{index // accounts + 1:03d}.sta")
+        paths.append(write_statement_file(path, iban, count, seed=seed * 1000 + index, per_statement=per_statement))
+    return sorted(paths)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generează extrase MT940 sintetice (deterministe).")
+    parser.add_argument("--transactions", type=int, default=1000, help="Numărul total de tranzacții (1k - 1M).")
+    parser.add_argument("--accounts", type=int, default=1, help="Numărul de conturi (IBAN-uri distincte).")
+    parser.add_argument("--files-per-account", type=int, default=1)
+    parser.add_argument("--per-statement", type=int, default=250, help="Tranzacții per extras zilnic.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True, help="Directorul în care se scriu fișierele.")
+    args = parser.parse_args(argv)
+    for path in write_statement_set(args.out, args.transactions, args.accounts, args.files_per_account,
+                                    args.seed, args.per_statement):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
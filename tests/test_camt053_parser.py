@@ -0,0 +1,132 @@
+# tests/test_camt053_parser.py
+
+import sys
+import os
+import tracemalloc
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from BTExtrasViewer import camt053_parser, import_engine
+from tests.db_standin import StandInConnection
+
+IBAN = "RO49BTRL01301202N12345XX"
+
+ANTET = """<?xml version="1.0" encoding="UTF-8"?>
+<Document xmlns="urn:iso:std:iso:20022:tech:xsd:camt.053.001.02">
+<BkToCstmrStmt><GrpHdr><MsgId>MSG1</MsgId><CreDtTm>2025-01-03T18:00:00</CreDtTm></GrpHdr>
+"""
+
+INTRARE_PLATA = """<Ntry><Amt Ccy="RON">150.50</Amt><CdtDbtInd>DBIT</CdtDbtInd><Sts>BOOK</Sts>
+<BookgDt><Dt>2025-01-02</Dt></BookgDt><ValDt><Dt>2025-01-02</Dt></ValDt>
+<BkTxCd><Domn><Cd>PMNT</Cd><Fmly><Cd>ICDT</Cd><SubFmlyCd>ESCT</SubFmlyCd></Fmly></Domn></BkTxCd>
+<NtryDtls><TxDtls><RltdPties><Cdtr><Nm>ELECTRICA FURNIZARE SA</Nm></Cdtr></RltdPties>
+<RmtInf><Ustrd>PLATA FACT. 12345 C.I.F.: 28909028</Ustrd></RmtInf></TxDtls></NtryDtls></Ntry>
+"""
+
+INTRARE_POS = """<Ntry><Amt Ccy="RON">45.10</Amt><CdtDbtInd>DBIT</CdtDbtInd><Sts><Cd>BOOK</Cd></Sts>
+<BookgDt><DtTm>2025-01-03T10:15:00+02:00</DtTm></BookgDt>
+<BkTxCd><Prtry><Cd>NCAR</Cd><Issr>BT</Issr></Prtry></BkTxCd>
+<AddtlNtryInf>POS KAUFLAND TID: T123456 RRN: 501234567890 PAN: 4123XXXXXX1234 MID 110023</AddtlNtryInf></Ntry>
+"""
+
+INTRARE_INCASARE = """<Ntry><Amt Ccy="RON">2000.00</Amt><CdtDbtInd>CRDT</CdtDbtInd><Sts>BOOK</Sts>
+<BookgDt><Dt>2025-01-02</Dt></BookgDt>
+<BkTxCd><Domn><Cd>PMNT</Cd><Fmly><Cd>RCDT</Cd><SubFmlyCd>ESCT</SubFmlyCd></Fmly></Domn></BkTxCd>
+<NtryDtls><TxDtls><RltdPties><Dbtr><Nm>CLIENT MARE DISTRIBUTIE SRL</Nm></Dbtr></RltdPties>
+<RmtInf><Ustrd>INCASARE FACTURA 77</Ustrd></RmtInf></TxDtls></NtryDtls></Ntry>
+"""
+
+INTRARE_IN_ASTEPTARE = """<Ntry><Amt Ccy="RON">10.00</Amt><CdtDbtInd>DBIT</CdtDbtInd><Sts>PDNG</Sts>
+<BookgDt><Dt>2025-01-03</Dt></BookgDt></Ntry>
+"""
+
+
+def _sold(cod, suma, zi, indicator="CRDT"):
+    return (f'<Bal><Tp><CdOrPrtry><Cd>{cod}</Cd></CdOrPrtry></Tp><Amt Ccy="RON">{suma}</Amt>'
+            f'<CdtDbtInd>{indicator}</CdtDbtInd><Dt><Dt>{zi}</Dt></Dt></Bal>\n')
+
+
+def _extras(id_extras, numar, deschidere, inchidere, intrari):
+    return (f"<Stmt><Id>{id_extras}</Id><ElctrncSeqNb>{numar}</ElctrncSeqNb>"
+            f"<Acct><Id><IBAN>{IBAN}</IBAN></Id><Ccy>RON</Ccy></Acct>\n"
+            + _sold("OPBD", deschidere, "2025-01-01") + _sold("CLBD", inchidere, "2025-01-03")
+            + "".join(intrari) + "</Stmt>\n")
+
+
+def _scrie(tmp_path, nume, extrase):
+    cale = tmp_path / nume
+    cale.write_text(ANTET + "".join(extrase) + "</BkToCstmrStmt></Document>\n", encoding="utf-8")
+    return str(cale)
+
+
+def test_intrarile_au_aceeasi_structura_ca_la_mt940(tmp_path):
+    """Fiecare <Ntry> înregistrată devine o tranzacție cu câmpurile MT940, inclusiv soldurile calculate pe loc."""
+    fisier = _scrie(tmp_path, "extras.xml", [
+        _extras("STMT-001", "12", "1000.00", "2804.40", [INTRARE_PLATA, INTRARE_INCASARE, INTRARE_IN_ASTEPTARE, INTRARE_POS]),
+    ])
+    extrase, timpi = [], {}
+    tranzactii = list(camt053_parser.iter_parsed_transactions(fisier, timpi, extrase))
+
+    assert [(tx["data"], tx["suma"], tx["tip"], tx["cod_tranzactie"]) for tx in tranzactii] == [
+        (date(2025, 1, 2), 150.5, "debit", "NTRF"),
+        (date(2025, 1, 2), 2000.0, "credit", "NTRF"),
+        (date(2025, 1, 3), 45.1, "debit", "NCAR"),
+    ]
+    plata, incasare, pos = tranzactii
+    assert (plata["cif"], plata["factura"], plata["beneficiar"]) == ("28909028", "12345", "ELECTRICA FURNIZARE SA")
+    assert incasare["beneficiar"] == "CLIENT MARE DISTRIBUTIE SRL"
+    assert (pos["tid"], pos["rrn"], pos["pan"], pos["mid"]) == ("T123456", "501234567890", "4123XXXXXX1234", "110023")
+    assert [tx["sold_dupa_tranzactie"] for tx in tranzactii] == [849.5, 2849.5, 2804.4]
+    assert extrase[0]["reference"] == "STMT-001" and extrase[0]["statement_no"] == "12"
+    assert extrase[0]["account"] == IBAN and extrase[0]["consistent"] and extrase[0]["transactions"] == 3
+    assert set(timpi) == {"read", "tokenize", "extract"}
+
+
+def test_detectarea_formatului_si_antetul(tmp_path):
+    """Fișierul XML este recunoscut după conținut; IBAN-ul și referința sunt citite doar din antet."""
+    fisier = _scrie(tmp_path, "extras.sta", [_extras("STMT-002", "3", "0.00", "0.00", [])])
+    assert camt053_parser.is_camt053_file(fisier)
+    assert import_engine.statement_parser_for(fisier) is camt053_parser
+    assert import_engine.extract_iban_from_mt940(fisier) == IBAN
+    assert import_engine.read_statement_reference(fisier) == "STMT-002/3"
+
+
+def test_documentul_trunchiat_ridica_valueerror_cu_numele_fisierului(tmp_path):
+    """Un XML malformat (ex. copiat incomplet) este un extras invalid: ValueError, nu ParseError."""
+    fisier = tmp_path / "trunchiat.xml"
+    continut = ANTET + _extras("STMT-004", "1", "0.00", "0.00", [INTRARE_PLATA, INTRARE_POS])
+    fisier.write_text(continut[:continut.rindex("<Ntry>") + 20], encoding="utf-8")
+
+    assert import_engine.extract_iban_from_mt940(str(fisier)) == IBAN
+    with pytest.raises(ValueError, match="trunchiat.xml"):
+        list(camt053_parser.iter_parsed_transactions(str(fisier)))
+
+
+def test_importul_camt_trece_prin_aceleasi_etape(tmp_path):
+    """Extrasul CAMT.053 este importat și deduplicat la fel ca unul MT940."""
+    fisier = _scrie(tmp_path, "extras.xml", [_extras("STMT-003", "1", "1000.00", "2804.40",
+                                                      [INTRARE_PLATA, INTRARE_INCASARE, INTRARE_POS])])
+    conexiune = StandInConnection()
+    statistici = import_engine.run_import_batch(conexiune, [fisier], 1, max_parse_workers=1)
+    assert statistici["inserted"] == conexiune.count("tranzactii") == 3
+    assert conexiune.count("extrase_solduri") == 1
+
+
+def test_memoria_ramane_constanta_pentru_fisiere_mari(tmp_path):
+    """Intrările procesate sunt eliberate: memoria maximă nu crește cu numărul de intrări."""
+    def varf_memorie(numar_intrari):
+        fisier = _scrie(tmp_path, f"mare_{numar_intrari}.xml",
+                        [_extras("STMT-MARE", "1", "0.00", "0.00", [INTRARE_POS] * numar_intrari)])
+        tracemalloc.start()
+        try:
+            for _ in camt053_parser.iter_parsed_transactions(fisier):
+                pass
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    mic, mare = varf_memorie(1000), varf_memorie(8000)
+    assert mare < mic * 2
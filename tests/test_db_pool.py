@@ -0,0 +1,409 @@
+# tests/test_db_pool.py
+import sys
+import os
+import socket
+import threading
+
+import pymysql
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from common import db_handler, db_pool
+from common.db_handler import DatabaseHandler, QueryCache
+from common.db_pool import (
+    ConnectionPool, ConnectionPoolTimeout, QueryStats, TimedCursor, get_connection_pool, normalize_query
+)
+
+
+class ConexiuneFalsa:
+    """Conexiune cu interfața PyMySQL folosită de pool; reține interogările și apelurile."""
+
+    def __init__(self, **params):
+        self.params = params
+        self.open = True
+        self.viu = True
+        self.rollbackuri = 0
+        self.interogari = []
+        self.pinguri = 0
+        self.erori = []  # erorile ridicate, în ordine, de următoarele execute() / commit()
+        self.erori_commit = []
+        self.versiuni = {}  # conținutul tabelei versiuni_date
+        self.randuri = []  # rezultatul citit în flux (fetchmany)
+        self.loturi = []
+
+    def ping(self, reconnect=False):
+        self.pinguri += 1
+        if not self.viu:
+            if not reconnect:
+                raise pymysql.err.OperationalError(2006, "MySQL server has gone away")
+            self.viu = True
+
+    def rollback(self):
+        if not self.viu:
+            raise pymysql.err.OperationalError(2013, "Lost connection")
+        self.rollbackuri += 1
+
+    def commit(self):
+        if self.erori_commit:
+            raise self.erori_commit.pop(0)
+
+    def close(self):
+        self.open = False
+
+    def cursor(self, cursorclass=None):
+        return CursorFals(self)
+
+
+class CursorFals:
+    def __init__(self, conexiune):
+        self.conexiune = conexiune
+        self.ultima = None
+        self.rowcount = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, query, params=None):
+        if self.conexiune.erori:
+            raise self.conexiune.erori.pop(0)
+        self.conexiune.interogari.append((threading.get_ident(), query))
+        self.ultima = query
+        self.rowcount = 1
+
+    def executemany(self, query, seq_params):
+        for params in seq_params:
+            self.execute(query, params)
+            if "versiuni_date" in query:
+                self.conexiune.versiuni[params[0]] = self.conexiune.versiuni.get(params[0], 0) + 1
+
+    def fetchall(self):
+        if "FROM versiuni_date" in self.ultima:
+            return [{'tabela': tabela, 'versiune': versiune} for tabela, versiune in self.conexiune.versiuni.items()]
+        return [{'nume_rol': 'Administrator'}]
+
+    def fetchone(self):
+        return {'nume_rol': 'Administrator'}
+
+    def fetchmany(self, size):
+        lot, self.conexiune.randuri = self.conexiune.randuri[:size], self.conexiune.randuri[size:]
+        self.conexiune.loturi.append(len(lot))
+        return lot
+
+    def close(self):
+        pass
+
+
+def pool_fals(**optiuni):
+    create = []
+    def conectare(**params):
+        create.append(ConexiuneFalsa(**params))
+        return create[-1]
+    return ConnectionPool({'host': 'nas'}, connect=conectare, **optiuni), create
+
+
+def test_conexiunea_returnata_este_refolosita_dupa_rollback():
+    pool, create = pool_fals()
+    prima = pool.acquire()
+    prima.close()
+    with pool.connection() as a_doua:
+        assert a_doua._raw is create[0]
+    assert len(create) == 1 and create[0].open
+    assert create[0].rollbackuri == 2
+    prima.close()  # o a doua returnare nu are efect
+    assert pool.size == 1
+
+
+def test_pool_ul_este_limitat_si_asteapta_o_conexiune_libera():
+    pool, create = pool_fals(max_size=1, timeout=0.05)
+    conexiune = pool.acquire()
+    with pytest.raises(ConnectionPoolTimeout):
+        pool.acquire()
+
+    pool.timeout = 5
+    obtinute = []
+    thread = threading.Thread(target=lambda: obtinute.append(pool.acquire()))
+    thread.start()
+    conexiune.close()
+    thread.join(5)
+    assert obtinute and obtinute[0]._raw is create[0] and len(create) == 1
+
+
+def test_conexiunile_cazute_sunt_inlocuite():
+    pool, create = pool_fals(health_check_interval=0)
+    with pool.connection():
+        pass
+    create[0].viu = False
+    with pool.connection() as conexiune:
+        assert conexiune._raw is create[1]
+        # Conexiunea care cade cât este împrumutată nu mai revine în pool
+        create[1].viu = False
+    assert not create[0].open and not create[1].open
+    assert pool.size == 0
+
+
+def test_acelasi_pool_pentru_aceleasi_credentiale_si_optiuni(monkeypatch):
+    monkeypatch.setattr(db_pool, "_connection_pools", {})
+    credentiale = {'host': 'nas', 'port': '3306', 'database': 'bt', 'user': 'u', 'password': 'p'}
+    pool = get_connection_pool(credentiale)
+    assert get_connection_pool(dict(credentiale, port=3306)) is pool
+    assert get_connection_pool(credentiale, local_infile=True) is not pool
+    assert pool.params['db'] == 'bt' and pool.params['passwd'] == 'p' and pool.params['charset'] == 'utf8mb4'
+
+
+def test_thread_urile_de_fundal_nu_folosesc_conexiunea_ui():
+    """fetch_all_dict dintr-un thread de fundal rulează pe o conexiune din pool, nu pe self.conn."""
+    pool, create = pool_fals()
+    handler = DatabaseHandler({'host': 'nas'})
+    handler.pool = pool
+    handler.conn = pool.acquire()
+    handler._owner_thread = threading.get_ident()
+
+    rezultate = []
+    thread = threading.Thread(target=lambda: rezultate.append(handler.fetch_all_dict("SELECT nume_rol FROM roluri")))
+    thread.start()
+    thread.join(5)
+
+    assert rezultate == [[{'nume_rol': 'Administrator'}]]
+    assert create[0].interogari == [] and len(create[1].interogari) == 1
+    assert pool.size == 2 and handler.conn.open
+    handler.fetch_all_dict("SELECT 1")
+    assert len(create[0].interogari) == 1
+
+
+def handler_fals():
+    pool, create = pool_fals()
+    handler = DatabaseHandler({'host': 'nas'})
+    handler.pool = pool
+    handler.conn = pool.acquire()
+    handler._owner_thread = threading.get_ident()
+    return handler, create[0]
+
+
+def test_ping_doar_dupa_inactivitate(monkeypatch):
+    handler, conexiune = handler_fals()
+    handler.fetch_all_dict("SELECT 1")
+    assert handler.is_connected() and conexiune.pinguri == 1  # prima verificare (încă nefolosită)
+    handler.fetch_all_dict("SELECT 2")
+    handler.fetch_one_dict("SELECT 3")
+    assert conexiune.pinguri == 1 and len(conexiune.interogari) == 3
+
+    monkeypatch.setattr(db_handler, "DB_IDLE_PING_INTERVAL", 0)
+    handler.fetch_all_dict("SELECT 4")
+    assert conexiune.pinguri == 2
+
+
+def test_interogarea_este_reluata_o_data_dupa_pierderea_conexiunii():
+    handler, conexiune = handler_fals()
+    handler.fetch_all_dict("SELECT 1")
+    conexiune.viu = False
+    conexiune.erori = [pymysql.err.OperationalError(2013, "Lost connection to MySQL server during query")]
+    assert handler.fetch_all_dict("SELECT nume_rol FROM roluri") == [{'nume_rol': 'Administrator'}]
+    assert conexiune.viu and conexiune.pinguri == 2
+
+    # A doua pierdere consecutivă nu mai este reluată, iar alte erori nu sunt reluate deloc
+    conexiune.erori = [pymysql.err.OperationalError(2006, "gone away"), pymysql.err.OperationalError(2006, "gone away")]
+    assert handler.fetch_all_dict("SELECT 1") == []
+    conexiune.erori = [pymysql.err.ProgrammingError(1064, "syntax")]
+    assert handler.fetch_one_dict("SELECT") is None
+
+
+def test_operatia_cu_cursor_este_reluata_si_propaga_erorile():
+    handler, conexiune = handler_fals()
+    handler.fetch_all_dict("SELECT 1")
+    def citire(cursor):
+        cursor.execute("SELECT hash_fisier FROM importuri_in_curs")
+        return cursor.fetchall()
+    conexiune.viu = False
+    conexiune.erori = [pymysql.err.OperationalError(2013, "Lost connection to MySQL server during query")]
+    assert handler.run_with_cursor(citire) == [{'nume_rol': 'Administrator'}]
+    assert _interogari(conexiune, "FROM importuri_in_curs") == 1 and conexiune.pinguri == 2
+
+    conexiune.erori = [pymysql.err.ProgrammingError(1146, "Table doesn't exist")]
+    with pytest.raises(pymysql.err.ProgrammingError):
+        handler.run_with_cursor(citire)
+
+
+def _eroare_timeout_citire():
+    """Eroarea ridicată de PyMySQL când read_timeout expiră: 2013, cu socket.timeout drept context."""
+    try:
+        try:
+            raise socket.timeout("timed out")
+        except OSError as e:
+            raise pymysql.err.OperationalError(2013, f"Lost connection to MySQL server during query ({e})")
+    except pymysql.err.OperationalError as eroare:
+        return eroare
+
+
+def test_interogarea_care_depaseste_timpul_de_citire_nu_este_reluata():
+    handler, conexiune = handler_fals()
+    conexiune.erori = [_eroare_timeout_citire()]
+    assert handler.fetch_all_dict("SELECT lent FROM tranzactii") == []
+    assert _interogari(conexiune, "SELECT lent") == 0
+    assert db_pool.is_read_timeout_error(_eroare_timeout_citire())
+    assert not db_pool.is_read_timeout_error(pymysql.err.OperationalError(2013, "Lost connection"))
+
+
+def test_commit_intrerupt_nu_este_repetat():
+    handler, conexiune = handler_fals()
+    conexiune.erori = [pymysql.err.OperationalError(2013, "Lost connection")]
+    assert handler.execute_commit("UPDATE t SET x = 1") is True
+    assert [q for _, q in conexiune.interogari] == ["UPDATE t SET x = 1"]
+
+    conexiune.erori_commit = [pymysql.err.OperationalError(2013, "Lost connection")]
+    assert handler.execute_commit("UPDATE t SET x = 2") is False
+    assert [q for _, q in conexiune.interogari].count("UPDATE t SET x = 2") == 1
+
+
+def _interogari(conexiune, text):
+    return sum(text in interogare for _, interogare in conexiune.interogari)
+
+
+def test_cache_ul_este_invalidat_de_versiunea_tabelei():
+    handler, conexiune = handler_fals()
+    sql = "SELECT id_cont, nume_cont FROM conturi_bancare   ORDER BY nume_cont"
+    rezultat = handler.fetch_all_dict(sql, cached=True)
+    rezultat[0]['nume_rol'] = 'modificat'  # apelantul primește o copie
+    assert handler.fetch_all_dict(" ".join(sql.split()), cached=True) == [{'nume_rol': 'Administrator'}]
+    assert _interogari(conexiune, "conturi_bancare") == 1 and handler.query_cache.hits == 1
+
+    # Scrierea altui utilizator: versiunea din baza de date crește, intrarea nu mai este folosită
+    conexiune.versiuni['conturi_bancare'] = 7
+    handler.query_cache.version_check_interval = 0
+    handler.fetch_all_dict(sql, cached=True)
+    handler.fetch_all_dict(sql, cached=True)
+    assert _interogari(conexiune, "FROM conturi_bancare") == 2
+
+    # Scrierea proprie incrementează contorul în aceeași tranzacție și invalidează imediat
+    handler.query_cache.version_check_interval = 60
+    assert handler.execute_commit("UPDATE conturi_bancare SET nume_cont = %s WHERE id_cont = %s", ("X", 1))
+    assert conexiune.versiuni['conturi_bancare'] == 8
+    handler.fetch_all_dict(sql, cached=True)
+    assert _interogari(conexiune, "FROM conturi_bancare") == 3
+
+
+def test_popularea_implicita_incrementeaza_versiunea_tabelelor(monkeypatch):
+    """Valutele și codurile SWIFT inserate la crearea schemei invalidează cache-ul celorlalți clienți."""
+    handler, conexiune = handler_fals()
+    monkeypatch.setattr(handler, "fetch_scalar", lambda query, params=None: 0)  # tabele goale
+    handler._seed_valute_table()
+    handler._seed_swift_codes_table()
+    assert conexiune.versiuni == {'valute': 1, 'swift_code_descriptions': 1}
+
+
+def test_interogarile_pe_tabele_fara_versiune_nu_sunt_pastrate():
+    handler, conexiune = handler_fals()
+    for _ in range(2):
+        handler.fetch_all_dict("SELECT r.nume_rol FROM roluri r JOIN conturi_bancare c ON 1 = 1", cached=True)
+    assert _interogari(conexiune, "FROM roluri") == 2 and _interogari(conexiune, "versiuni_date") == 0
+    assert handler.execute_commit("UPDATE utilizatori SET last_seen = NOW()")
+    assert conexiune.versiuni == {}
+
+
+def test_cache_lru_cu_expirare(monkeypatch):
+    cache = QueryCache(max_entries=2, ttl=10)
+    cache.set_versions({})
+    for cheie in ("a", "b"):
+        cache.put(cheie, [cheie], {})
+    assert cache.get("a") == (True, ["a"])
+    cache.put("c", ["c"], {})
+    assert cache.get("b") == (False, None) and cache.get("a")[0] and cache.get("c")[0]
+
+    ceas = [db_handler.time.monotonic() + 11]
+    monkeypatch.setattr(db_handler.time, "monotonic", lambda: ceas[0])
+    assert cache.get("a") == (False, None)
+
+
+def test_iter_rows_citeste_in_flux_pe_o_conexiune_din_pool():
+    handler, conexiune_ui = handler_fals()
+    handler.pool.acquire().close()  # conexiunea liberă din pool, folosită de iter_rows
+    conexiune_flux = handler.pool._idle[-1][0]
+    conexiune_flux.randuri = [{'id': i} for i in range(5)]
+
+    randuri = handler.iter_rows("SELECT id FROM tranzactii", batch_size=2)
+    assert next(randuri) == {'id': 0} and conexiune_flux.loturi == [2]  # doar primul lot a fost citit
+    assert [rand['id'] for rand in randuri] == [1, 2, 3, 4]
+    assert conexiune_flux.loturi == [2, 2, 1, 0] and conexiune_ui.interogari == []
+    assert handler.pool._idle[-1][0] is conexiune_flux
+
+
+def test_iter_rows_oprit_inainte_de_final_elimina_conexiunea():
+    handler, _ = handler_fals()
+    handler.pool.acquire().close()
+    conexiune_flux = handler.pool._idle[-1][0]
+    conexiune_flux.randuri = [{'id': i} for i in range(10)]
+
+    randuri = handler.iter_rows("SELECT id FROM tranzactii", batch_size=3)
+    next(randuri)
+    randuri.close()
+    # Restul rezultatului nu este citit: conexiunea este închisă și scoasă din pool
+    assert not conexiune_flux.open and conexiune_flux.loturi == [3]
+    assert handler.pool.size == 1
+
+
+def test_interogarile_care_difera_doar_prin_valori_sunt_grupate():
+    assert normalize_query("SELECT *  FROM tranzactii\n WHERE id_cont_fk = 3 AND tip = 'credit';") == \
+        normalize_query("SELECT * FROM tranzactii WHERE id_cont_fk = %s AND tip = %s") == \
+        "SELECT * FROM tranzactii WHERE id_cont_fk = ? AND tip = ?"
+    assert normalize_query("SELECT nume FROM conturi_bancare WHERE id_cont IN (1, 2, 3)") == \
+        normalize_query("SELECT nume FROM conturi_bancare WHERE id_cont IN (%s, %s)") == \
+        "SELECT nume FROM conturi_bancare WHERE id_cont IN (...)"
+
+
+def test_fiecare_instructiune_este_cronometrata_cu_locul_apelului(monkeypatch, tmp_path):
+    statistici = QueryStats(slow_query_log=str(tmp_path / "lente.log"))
+    monkeypatch.setattr(db_pool, "query_stats", statistici)
+    handler, conexiune = handler_fals()
+    handler.fetch_all_dict("SELECT nume_rol FROM roluri WHERE id = %s", (1,))
+    handler.fetch_one_dict("SELECT nume_rol FROM roluri WHERE id = 2")
+    conexiune.erori = [pymysql.err.ProgrammingError(1064, "syntax")]
+    handler.fetch_one_dict("SELECT nume_rol FROM roluri WHERE id = 3")
+
+    randuri = statistici.snapshot()
+    assert len(randuri) == 1
+    interogare = randuri[0]
+    assert interogare['query'] == "SELECT nume_rol FROM roluri WHERE id = ?"
+    assert interogare['calls'] == 3 and interogare['rows'] == 2 and interogare['errors'] == 1
+    assert interogare['total_ms'] >= interogare['max_ms'] > 0
+    # Locul apelului este codul care a apelat DatabaseHandler, nu db_handler, db_pool sau PyMySQL
+    locuri = [loc for loc, apeluri in interogare['call_sites']]
+    assert len(locuri) == 3 and all(
+        loc.startswith("test_db_pool.py:") and loc.endswith("(test_fiecare_instructiune_este_cronometrata_cu_locul_apelului)")
+        for loc in locuri)
+    assert not (tmp_path / "lente.log").exists()
+
+
+def test_interogarile_lente_sunt_scrise_in_jurnalul_dedicat(tmp_path):
+    jurnal = tmp_path / "lente.log"
+    statistici = QueryStats(slow_query_ms=500, slow_query_log=str(jurnal))
+    statistici.record("SELECT * FROM tranzactii WHERE id_cont_fk = %s", 0.75, 1200, "main.py:10 (refresh_table)")
+    statistici.record("SELECT 1", 0.002, 1, "main.py:20 (is_connected)")
+    continut = jurnal.read_text(encoding="utf-8")
+    assert "750 ms | rânduri: 1200 | main.py:10 (refresh_table) | SELECT * FROM tranzactii WHERE id_cont_fk = %s" in continut
+    assert "SELECT 1" not in continut
+
+    statistici.configure(slow_query_ms=0)
+    statistici.record("SELECT * FROM tranzactii", 5.0, None, "main.py:30 (export)")
+    assert [rand['query'] for rand in statistici.snapshot()] == [
+        "SELECT * FROM tranzactii", "SELECT * FROM tranzactii WHERE id_cont_fk = ?", "SELECT ?"]
+    assert "main.py:30" not in jurnal.read_text(encoding="utf-8")
+    statistici.reset()
+    assert statistici.snapshot() == []
+
+
+def test_cursorul_nebufferizat_este_inregistrat_la_inchidere_cu_randurile_citite():
+    statistici = QueryStats()
+    conexiune = ConexiuneFalsa()
+    conexiune.randuri = [{'id': i} for i in range(5)]
+    cursor = TimedCursor(CursorFals(conexiune), statistici)
+    cursor._unbuffered = True
+    cursor.execute("SELECT id FROM tranzactii")
+    assert statistici.snapshot() == []  # rândurile nu au fost încă transferate
+    while cursor.fetchmany(2):
+        pass
+    cursor.close()
+    [interogare] = statistici.snapshot()
+    assert interogare['calls'] == 1 and interogare['rows'] == 5
@@ -0,0 +1,94 @@
+# tests/test_import_cli.py
+
+import sys
+import os
+import json
+import subprocess
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from BTExtrasViewer import import_cli
+from tests.db_standin import StandInConnection
+
+IBAN = "RO49BTRL01301202N12345XX"
+
+
+def _scrie_extras(tmp_path, nume, iban):
+    cale = tmp_path / nume
+    cale.write_text(f":20:REF\n:25:{iban}\n:61:250102C1,00NTRFNONREF\n:86:TEST\n-}}", encoding="utf-8")
+    return str(cale)
+
+
+def test_importul_din_linia_de_comanda_nu_incarca_tkinter():
+    """import_cli și import_watcher rulează pe servere fără Tk: pool-ul de conexiuni vine din db_pool, nu din db_handler."""
+    src = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+    cod = ("import sys; sys.modules['tkinter'] = None\n"
+           "import BTExtrasViewer.import_cli, BTExtrasViewer.import_watcher\n"
+           "assert 'common.db_handler' not in sys.modules")
+    rezultat = subprocess.run([sys.executable, "-c", cod], cwd=src, capture_output=True, text=True)
+    assert rezultat.returncode == 0, rezultat.stderr
+
+
+def test_split_files_by_iban_respinge_fisierele_altui_cont(tmp_path):
+    """Fișierele cu alt IBAN decât al contului sunt respinse; IBAN-ul este comparat fără spații."""
+    bun = _scrie_extras(tmp_path, "bun.sta", "RO49BTRL01301202N12345XX")
+    strain = _scrie_extras(tmp_path, "strain.sta", "RO11BTRL01301202N99999XX")
+
+    acceptate, respinse = import_cli.split_files_by_iban([bun, strain], "RO49 BTRL 0130 1202 N123 45XX")
+
+    assert acceptate == [bun]
+    assert respinse == [{"file": strain, "iban": "RO11BTRL01301202N99999XX"}]
+
+
+def test_main_fara_credentiale_iese_cu_cod_de_eroare(tmp_path, capsys):
+    """Fără secțiunea [Database] importul nu pornește, iar rezultatul JSON descrie eroarea."""
+    fisier = _scrie_extras(tmp_path, "extras.sta", "RO49BTRL01301202N12345XX")
+    config = tmp_path / "config.ini"
+    config.write_text("[General]\n", encoding="utf-8")
+
+    cod = import_cli.main(["--account-id", "1", "--config", str(config), fisier])
+
+    rezultat = json.loads(capsys.readouterr().out)
+    assert cod == import_cli.EXIT_USAGE_ERROR
+    assert rezultat["status"] == "error"
+    assert rezultat["exit_code"] == import_cli.EXIT_USAGE_ERROR
+
+
+def test_main_xml_malformat_iese_cu_eroare_de_import(tmp_path, monkeypatch, capsys):
+    """Un CAMT.053 trunchiat produce rezultatul JSON documentat și codul 1, nu o excepție netratată."""
+    fisier = tmp_path / "extras.xml"
+    fisier.write_text('<?xml version="1.0" encoding="UTF-8"?>\n'
+                      '<Document xmlns="urn:iso:std:iso:20022:tech:xsd:camt.053.001.02"><BkToCstmrStmt>'
+                      f'<Stmt><Id>STMT-1</Id><Acct><Id><IBAN>{IBAN}</IBAN></Id></Acct>'
+                      '<Ntry><Amt Ccy="RON">1.00</Amt><CdtDbtInd>CRDT</CdtDbtInd><BookgDt><Dt>2025-01-02</Dt></BookgDt></Ntry>'
+                      '<Ntry><Amt Ccy="RON">2',
+                      encoding="utf-8")
+    config = tmp_path / "config.ini"
+    config.write_text("[Database]\ndb_host = localhost\ndb_port = 3306\ndb_name = bt\ndb_user = import\n",
+                      encoding="utf-8")
+    conexiune = StandInConnection()
+    conexiune._connection.execute("INSERT INTO conturi_bancare (id_cont, iban) VALUES (1, ?)", (IBAN,))
+    monkeypatch.setattr(import_cli, "connect_import_database", lambda db_credentials, local_infile=False: conexiune)
+
+    cod = import_cli.main(["--account-iban", IBAN, "--config", str(config), "--workers", "1", "--no-cache", str(fisier)])
+
+    rezultat = json.loads(capsys.readouterr().out)
+    assert cod == import_cli.EXIT_IMPORT_ERROR
+    assert rezultat["status"] == "error" and rezultat["exit_code"] == import_cli.EXIT_IMPORT_ERROR
+    assert rezultat["error"].startswith("ValueError:") and "extras.xml" in rezultat["error"]
+
+
+def test_main_fisier_inexistent(tmp_path, capsys):
+    """Un fișier inexistent este raportat înainte de conectarea la baza de date."""
+    cod = import_cli.main(["--account-iban", "RO49BTRL01301202N12345XX", str(tmp_path / "lipsa.sta")])
+
+    assert cod == import_cli.EXIT_USAGE_ERROR
+    assert "lipsa.sta" in json.loads(capsys.readouterr().out)["error"]
+
+
+def test_main_fara_fisiere_si_fara_reluare(capsys):
+    """Fără fișiere, importul pornește doar cu --resume (reluarea importurilor întrerupte ale contului)."""
+    cod = import_cli.main(["--account-id", "1"])
+
+    assert cod == import_cli.EXIT_USAGE_ERROR
+    assert "--resume" in json.loads(capsys.readouterr().out)["error"]
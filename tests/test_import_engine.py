@@ -0,0 +1,478 @@
+# tests/test_import_engine.py
+
+import sys
+import os
+import re
+import hashlib
+import sqlite3
+import tempfile
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from BTExtrasViewer import import_engine
+from BTExtrasViewer.mt940_parser import RE_RRN, RE_TID
+from common.db_handler import DatabaseHandler
+from BTExtrasViewer.parse_cache import ParseCache
+from tests.db_standin import StandInConnection, _tsv_field
+from tests.mt940_generator import DEFAULT_IBANS, write_statement_file
+
+
+class CursorInregistrat:
+    """Cursor minimal care returnează rânduri prestabilite și reține interogările primite."""
+
+    def __init__(self, randuri):
+        self.randuri = randuri
+        self.interogari = []
+        self.amprente_existente = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, query, params=None):
+        self.interogari.append((query, params))
+
+    def executemany(self, query, seq_params):
+        seq_params = list(seq_params)
+        self.interogari.append((query, seq_params))
+        # Simulează indexul unic: rândurile cu amprentă deja văzută nu sunt inserate
+        inserate = 0
+        for params in seq_params:
+            if params[-1] not in self.amprente_existente:
+                self.amprente_existente.add(params[-1])
+                inserate += 1
+        return inserate
+
+    def fetchall(self):
+        return self.randuri
+
+    def close(self):
+        pass
+
+
+class ConexiuneInregistrata:
+    """Conexiune minimală care numără commit-urile și oferă un singur cursor înregistrat."""
+
+    def __init__(self, randuri=None):
+        self.cursor_inregistrat = CursorInregistrat(randuri or [])
+        self.commituri = 0
+
+    def cursor(self):
+        return self.cursor_inregistrat
+
+    def commit(self):
+        self.commituri += 1
+
+
+def _tranzactie(zi, suma=10.0):
+    return {
+        "data": date(2025, 1, zi), "suma": suma, "tip": "debit", "cod_tranzactie": "NTRF",
+        "descriere": f"PLATA {zi}", "cif": None, "beneficiar": None, "factura": None,
+        "tid": None, "rrn": None, "pan": None, "mid": None,
+    }
+
+
+def test_iter_chunks_imparte_in_loturi():
+    """Ultimul lot poate fi incomplet, iar un iterabil gol nu produce niciun lot."""
+    assert list(import_engine._iter_chunks(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(import_engine._iter_chunks([], 3)) == []
+
+
+def test_load_existing_fingerprints_foloseste_o_singura_interogare():
+    """Amprentele existente sunt aduse o singură dată pentru tot intervalul de date al lotului."""
+    cursor = CursorInregistrat([("a" * 64,), ("b" * 64,)])
+
+    amprente = import_engine.load_existing_fingerprints(cursor, 7, date(2025, 1, 1), date(2025, 1, 31))
+
+    assert len(cursor.interogari) == 1
+    assert cursor.interogari[0][1] == (7, date(2025, 1, 1), date(2025, 1, 31))
+    assert amprente == {"a" * 64, "b" * 64}
+
+
+def test_bulk_writer_scrie_si_confirma_pe_loturi():
+    """Cinci rânduri cu loturi de câte 2 -> trei apeluri executemany și trei commit-uri."""
+    conexiune = ConexiuneInregistrata()
+    writer = import_engine.TransactionBulkWriter(conexiune, account_id=3, chunk_size=2)
+
+    for zi in range(1, 6):
+        writer.add(_tranzactie(zi))
+    writer.flush()
+
+    loturi = [params for _, params in conexiune.cursor_inregistrat.interogari]
+    assert [len(lot) for lot in loturi] == [2, 2, 1]
+    assert loturi[0][0][:3] == (3, "2025-01-01", "PLATA 1")
+    assert loturi[0][0][-1] == writer.fingerprint(_tranzactie(1))
+    assert conexiune.commituri == 3
+    assert writer.inserted == 5
+
+
+def test_bulk_writer_numara_duplicatele_respinse_de_index():
+    """Rândurile respinse de indexul unic (ON DUPLICATE KEY) sunt numărate ca ignorate."""
+    conexiune = ConexiuneInregistrata()
+    writer = import_engine.TransactionBulkWriter(conexiune, account_id=3, chunk_size=10)
+
+    writer.add(_tranzactie(1))
+    writer.add(_tranzactie(1))
+    writer.add(_tranzactie(2))
+    writer.flush()
+
+    assert writer.inserted == 2
+    assert writer.ignored == 1
+
+
+def _scrie_extras(tmp_path, nume, numar_tranzactii):
+    linii = [":20:REF" + nume, ":25:RO49BTRL01301202N12345XX", ":60F:C250101RON0,00"]
+    for i in range(numar_tranzactii):
+        linii += [f":61:2501{(i % 28) + 1:02d}C{i + 1},00NTRFNONREF", f":86:INCASARE {nume} {i}"]
+    linii += [":62F:C250131RON0,00", "-}"]
+    cale = tmp_path / nume
+    cale.write_text("\n".join(linii), encoding="utf-8")
+    return str(cale)
+
+
+def test_iter_parsed_files_pastreaza_ordinea_cu_pool_de_procese(tmp_path):
+    """Parsarea în procese separate returnează aceleași tranzacții, în ordinea fișierelor."""
+    fisiere = [_scrie_extras(tmp_path, f"extras{n}.sta", 5 + n) for n in range(4)]
+
+    secvential = [(i, cale, list(txs)) for i, cale, txs, _ in import_engine.iter_parsed_files(fisiere, max_workers=1)]
+    paralel = [(i, cale, list(txs)) for i, cale, txs, _ in import_engine.iter_parsed_files(fisiere, max_workers=2)]
+
+    assert paralel == secvential
+    assert [len(txs) for _, _, txs in paralel] == [5, 6, 7, 8]
+
+
+def test_fisierele_mari_nu_trec_prin_pool(tmp_path, monkeypatch):
+    """Un fișier peste IMPORT_POOL_MAX_FILE_BYTES este parsat în flux, la rândul lui, între cele din pool."""
+    fisiere = [_scrie_extras(tmp_path, f"extras{n}.sta", n) for n in (5, 40, 6, 7)]
+    monkeypatch.setattr(import_engine, "IMPORT_POOL_MAX_FILE_BYTES", os.path.getsize(fisiere[0]) * 2)
+
+    rezultate = list(import_engine.iter_parsed_files(fisiere, max_workers=2))
+
+    assert [isinstance(txs, list) for _, _, txs, _ in rezultate] == [True, False, True, True]
+    assert [len(list(txs)) for _, _, txs, _ in rezultate] == [5, 40, 6, 7]
+
+
+def test_compute_file_hash_citeste_pe_blocuri(tmp_path):
+    """Hash-ul calculat pe blocuri mici este identic cu cel al întregului conținut."""
+    cale = tmp_path / "extras.sta"
+    continut = b":20:REF\n" * 1000
+    cale.write_bytes(continut)
+
+    file_hash, dimensiune = import_engine.compute_file_hash(str(cale), block_size=64)
+
+    assert file_hash == hashlib.sha256(continut).hexdigest()
+    assert dimensiune == len(continut)
+
+
+def test_load_imported_file_hashes_o_singura_interogare():
+    """Fișierele deja importate sunt identificate printr-o singură interogare pentru tot lotul."""
+    cursor = CursorInregistrat([("h1",)])
+
+    assert import_engine.load_imported_file_hashes(cursor, 4, ["h1", "h2"]) == {"h1"}
+    assert cursor.interogari[0][1] == (4, "h1", "h2")
+    assert import_engine.load_imported_file_hashes(cursor, 4, []) == set()
+    assert len(cursor.interogari) == 1
+
+
+def test_import_session_incarca_datele_de_referinta_o_singura_data():
+    """Codurile sunt citite o dată pe lot, iar codurile noi sunt inserate împreună și reținute în memorie."""
+    conexiune = ConexiuneInregistrata([("NTRF",)])
+    sesiune = import_engine.ImportSession(conexiune).load()
+    cursor = conexiune.cursor_inregistrat
+
+    assert sesiune.ensure_tx_types(["NTRF", "NTRF"]) == []
+    cursor.randuri = [("NCAR", "Plată cu cardul")]
+    assert sesiune.ensure_tx_types(["NCAR", "NXYZ", "NTRF"]) == ["NCAR", "NXYZ"]
+    assert sesiune.ensure_tx_types(["NCAR", "NXYZ"]) == []
+
+    interogari = [interogare for interogare, _ in cursor.interogari]
+    assert interogari.count("SELECT cod FROM tipuri_tranzactii") == 1
+    assert sum("swift_code_descriptions" in interogare for interogare in interogari) == 1
+    assert cursor.interogari[-2][1] == [("NCAR", "Plată cu cardul"), ("NXYZ", "Tip nou, cod: NXYZ")]
+    # Versiunea tabelei este incrementată în aceeași tranzacție (invalidează cache-ul clienților)
+    assert "versiuni_date" in cursor.interogari[-1][0] and cursor.interogari[-1][1] == [("tipuri_tranzactii",)]
+    assert conexiune.commituri == 1
+
+
+def test_run_import_batch_returneaza_statisticile_lotului(tmp_path):
+    """Importul comun (interfață și linie de comandă) raportează progresul și statisticile pe fișier."""
+    conexiune = ConexiuneInregistrata()
+    fisiere = [_scrie_extras(tmp_path, "a.sta", 3), _scrie_extras(tmp_path, "b.sta", 2)]
+    progres = []
+
+    statistici = import_engine.run_import_batch(conexiune, fisiere, 5, max_parse_workers=1,
+                                                progress=lambda i, text: progres.append((i, text)))
+
+    assert statistici["inserted"] == 5
+    assert statistici["ignored"] == 0
+    assert statistici["skipped_files"] == []
+    assert [(f["file"], f["inserted"]) for f in statistici["files"]] == [(fisiere[0], 3), (fisiere[1], 2)]
+    assert progres == [(0, "Procesare: a.sta"), (1, "Procesare: b.sta")]
+
+
+def test_run_import_batch_masoara_etapele_si_le_salveaza_in_istoric(tmp_path):
+    """Fiecare fișier trimite statistici pe etape, iar rândul din istoric primește duratele."""
+    conexiune = ConexiuneInregistrata()
+    fisier = _scrie_extras(tmp_path, "a.sta", 4)
+    statistici_primite = []
+
+    statistici = import_engine.run_import_batch(conexiune, [fisier], 5, max_parse_workers=1,
+                                                on_stats=statistici_primite.append)
+
+    assert set(statistici["timings"]["stages_s"]) == set(import_engine.IMPORT_STAGES)
+    assert statistici["timings"]["rows"] == 4
+    assert statistici_primite[-1]["file"] == fisier
+    assert statistici_primite[-1]["rows"] == 4
+    assert statistici["files"][0]["timings"]["rows_per_second"] > 0
+
+    interogare, parametri = next((q, p) for q, p in conexiune.cursor_inregistrat.interogari
+                                 if q.startswith("INSERT INTO istoric_importuri"))
+    assert "durata_citire_ms" in interogare
+    assert len(parametri) == interogare.count("%s")
+    assert all(isinstance(valoare, int) and valoare >= 0 for valoare in parametri[8:15])
+
+
+def test_format_import_stats():
+    """Textul din fereastra de progres folosește separatorul de mii românesc și etichetele etapelor."""
+    text = import_engine.format_import_stats({
+        "rows": 12000, "elapsed_s": 1.5, "rows_per_second": 8000.0,
+        "stages_s": dict.fromkeys(import_engine.IMPORT_STAGES, 0.25),
+    })
+    assert text.startswith("12.000 rânduri în 1.5s (8.000 rânduri/s)")
+    assert "citire 0.2s" in text or "citire 0.3s" in text
+
+
+def test_soldurile_extraselor_sunt_salvate_la_import(tmp_path):
+    """Importul salvează soldurile :60F:/:62F: ale fiecărui extras într-un singur executemany."""
+    conexiune = ConexiuneInregistrata()
+    fisier = _scrie_extras(tmp_path, "a.sta", 3)
+
+    import_engine.run_import_batch(conexiune, [fisier], 5, max_parse_workers=1)
+
+    interogare, randuri = next((q, p) for q, p in conexiune.cursor_inregistrat.interogari
+                               if q.startswith("INSERT INTO extrase_solduri"))
+    assert randuri == [(5, "REFa.sta", "", date(2025, 1, 1), 0.0, date(2025, 1, 31), 0.0, "RON", 3, False)]
+
+
+def test_valorile_tsv_pastreaza_caracterele_speciale():
+    """Tab-urile, liniile noi și backslash-urile din descrieri nu strică formatul LOAD DATA."""
+    assert import_engine._tsv_value(None) == "\\N"
+    assert import_engine._tsv_value("A\tB\nC\\D") == "A\\tB\\nC\\\\D"
+    assert _tsv_field(import_engine._tsv_value("A\tB\nC\\D\\N")) == "A\tB\nC\\D\\N"
+
+
+def test_importul_prin_staging_respinge_duplicatele_la_mutare(tmp_path, monkeypatch):
+    """Modul staging dă același rezultat ca inserarea pe loturi și nu lasă fișiere TSV în urmă."""
+    iban = DEFAULT_IBANS[0]
+    complet = write_statement_file(str(tmp_path / "complet.sta"), iban, 600, seed=3)
+    partial = write_statement_file(str(tmp_path / "partial.sta"), iban, 300, seed=3)
+    temporare = tmp_path / "tmp"
+    temporare.mkdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(temporare))
+    conexiune = StandInConnection()
+
+    statistici = import_engine.run_import_batch(conexiune, [complet, partial], 1, max_parse_workers=1, staging=True)
+
+    assert (statistici["inserted"], statistici["ignored"]) == (600, 300)
+    assert conexiune.count("tranzactii") == 600 and conexiune.count("istoric_importuri") == 2
+    assert [f["timings"]["stages_s"]["insert"] > 0 for f in statistici["files"]] == [True, True]
+    assert list(temporare.iterdir()) == []
+
+    referinta = StandInConnection()
+    import_engine.run_import_batch(referinta, [complet], 1, max_parse_workers=1)
+    coloane = "data, descriere, suma, tip, cif, factura, tid, rrn, pan, mid, sold_dupa_tranzactie, tx_fingerprint"
+    interogare = f"SELECT {coloane} FROM tranzactii ORDER BY id"
+    assert conexiune._connection.execute(interogare).fetchall() == referinta._connection.execute(interogare).fetchall()
+
+
+def test_loturile_pe_conturi_ruleaza_in_paralel(tmp_path, monkeypatch):
+    """Fiecare lot are conexiunea sa; loturile mari pornesc primele, iar eroarea unui lot nu le oprește pe celelalte."""
+    conexiuni = []
+    def conectare(db_credentials):
+        conexiuni.append(StandInConnection())
+        return conexiuni[-1]
+    monkeypatch.setattr(import_engine, "connect_import_database", conectare)
+
+    loturi = [
+        {'target_id': 1, 'files': [write_statement_file(str(tmp_path / "mic.sta"), DEFAULT_IBANS[0], 50, seed=1)]},
+        {'target_id': 2, 'files': [write_statement_file(str(tmp_path / "mare.sta"), DEFAULT_IBANS[1], 400, seed=2)]},
+        {'target_id': 3, 'files': [str(tmp_path / "lipsa.sta")]},
+    ]
+    evenimente = []
+    rezultate = import_engine.run_parallel_import_batches(
+        {'host': 'x'}, loturi, max_parallel=2, on_event=lambda tip, index, date: evenimente.append((tip, index))
+    )
+
+    assert [r['target_id'] for r in rezultate] == [1, 2, 3]
+    assert [r['stats']['inserted'] if r['stats'] else None for r in rezultate] == [50, 400, None]
+    assert "FileNotFoundError" in rezultate[2]['error']
+    assert len(conexiuni) == 3 and not any(c.open for c in conexiuni)
+    assert sorted((tip, index) for tip, index in evenimente if tip in ('done', 'error')) == [('done', 0), ('done', 1), ('error', 2)]
+
+    pornite = []
+    import_engine.run_parallel_import_batches({'host': 'x'}, loturi, max_parallel=1,
+                                              on_event=lambda tip, index, date: tip == 'start' and pornite.append(index))
+    assert pornite == [1, 0, 2]
+
+
+def test_lotul_este_reluat_dupa_deadlock(monkeypatch):
+    """Un deadlock (1213) la scrierea lotului duce la rollback și reluarea lotului, nu la eșecul importului."""
+    monkeypatch.setattr(import_engine.time, "sleep", lambda secunde: None)
+    conexiune = ConexiuneInregistrata()
+    cursor = conexiune.cursor_inregistrat
+    executemany_original, apeluri = cursor.executemany, []
+    def executemany_cu_deadlock(query, seq_params):
+        apeluri.append(query)
+        if len(apeluri) == 1:
+            raise import_engine.pymysql.err.OperationalError(1213, "Deadlock found when trying to get lock")
+        return executemany_original(query, seq_params)
+    cursor.executemany = executemany_cu_deadlock
+    rollbacks = []
+    conexiune.rollback = lambda: rollbacks.append(True)
+
+    writer = import_engine.TransactionBulkWriter(conexiune, 1)
+    writer.add({'data': date(2025, 1, 2), 'descriere': 'X', 'suma': 1.0, 'tip': 'credit', 'cod_tranzactie': 'NTRF',
+                'cif': None, 'beneficiar': None, 'factura': None, 'tid': None, 'rrn': None, 'pan': None, 'mid': None})
+    writer.flush()
+
+    assert (len(apeluri), len(rollbacks), writer.inserted) == (2, 1, 1)
+
+
+def test_previzualizarea_numara_tranzactiile_noi_si_duplicatele(tmp_path):
+    """Previzualizarea nu scrie nimic, marchează fișierele deja importate și completează cache-ul de parsare."""
+    iban = DEFAULT_IBANS[0]
+    complet = write_statement_file(str(tmp_path / "complet.sta"), iban, 600, seed=3)
+    partial = write_statement_file(str(tmp_path / "partial.sta"), iban, 300, seed=3)
+    conexiune = StandInConnection()
+    cache = ParseCache(str(tmp_path / "cache"))
+
+    inainte = import_engine.preview_import_batch(conexiune, [partial], 1, max_parse_workers=1)
+    assert (inainte["new"], inainte["duplicates"]) == (300, 0)
+    assert inainte["files"][0]["unknown"] == 300 and inainte["unknown_codes"]
+    assert conexiune.count("tranzactii") == 0 and conexiune.count("istoric_importuri") == 0
+
+    import_engine.run_import_batch(conexiune, [partial], 1, max_parse_workers=1)
+    progres = []
+    rezultat = import_engine.preview_import_batch(conexiune, [complet, partial], 1, max_parse_workers=1,
+                                                  parse_cache=cache, progress=lambda i, text: progres.append(i))
+
+    assert (rezultat["new"], rezultat["duplicates"]) == (300, 300)
+    assert [(f["transactions"], f["already_imported"]) for f in rezultat["files"]] == [(600, False), (0, True)]
+    assert rezultat["files"][0]["iban"] == iban and rezultat["files"][0]["unknown"] == 0
+    assert progres == [0]
+    assert conexiune.count("tranzactii") == 300 and conexiune.count("istoric_importuri") == 1
+    assert cache.read_meta(complet)["transactions"] == 600
+    assert len(rezultat["files"][0]["sample"]) == import_engine.IMPORT_PREVIEW_SAMPLE_ROWS
+    assert rezultat["files"][1]["sample"] == []
+
+
+def test_previzualizarea_verifica_amprentele_pe_loturi(tmp_path, monkeypatch):
+    """Amprentele existente sunt aduse pentru fiecare lot de tranzacții, nu pentru tot fișierul odată."""
+    iban = DEFAULT_IBANS[0]
+    complet = write_statement_file(str(tmp_path / "complet.sta"), iban, 600, seed=3)
+    partial = write_statement_file(str(tmp_path / "partial.sta"), iban, 300, seed=3)
+    conexiune = StandInConnection()
+    import_engine.run_import_batch(conexiune, [partial], 1, max_parse_workers=1)
+
+    monkeypatch.setattr(import_engine, "IMPORT_CHUNK_SIZE", 100)
+    incarcare_originala, intervale = import_engine.load_existing_fingerprints, []
+    def incarcare_inregistrata(cursor, account_id, date_from, date_to):
+        intervale.append((date_from, date_to))
+        return incarcare_originala(cursor, account_id, date_from, date_to)
+    monkeypatch.setattr(import_engine, "load_existing_fingerprints", incarcare_inregistrata)
+
+    rezultat = import_engine.preview_import_batch(conexiune, [complet], 1, max_parse_workers=1)
+
+    assert len(intervale) == 6
+    assert (rezultat["new"], rezultat["duplicates"]) == (300, 300)
+    assert rezultat["files"][0]["transactions"] == 600
+
+
+def test_importul_intrerupt_este_reluat_dupa_ultimul_lot_confirmat(tmp_path, monkeypatch):
+    """După pierderea conexiunii, reluarea continuă de la punctul salvat, fără a reverifica loturile confirmate."""
+    fisier = write_statement_file(str(tmp_path / "istoric.sta"), DEFAULT_IBANS[0], 1000, seed=5, per_statement=150)
+    conexiune = StandInConnection()
+    scriere_originala, scrieri = import_engine.TransactionBulkWriter._execute_with_retry, []
+    def conexiune_pierduta(writer, randuri):
+        scrieri.append(len(randuri))
+        if len(scrieri) == 4:
+            raise import_engine.pymysql.err.OperationalError(2013, "Lost connection to MySQL server during query")
+        return scriere_originala(writer, randuri)
+    monkeypatch.setattr(import_engine.TransactionBulkWriter, "_execute_with_retry", conexiune_pierduta)
+
+    with pytest.raises(import_engine.pymysql.err.OperationalError):
+        import_engine.run_import_batch(conexiune, [fisier], 1, chunk_size=100, max_parse_workers=1)
+    conexiune.rollback()
+
+    punct, = import_engine.load_import_checkpoints(conexiune.cursor(), 1)
+    assert (punct["path"], punct["records"], punct["inserted"]) == (fisier, 300, 300)
+    assert punct["statement_records"] == 150 and punct["offset"] > 0
+    assert conexiune.count("tranzactii") == 300
+
+    monkeypatch.setattr(import_engine.TransactionBulkWriter, "_execute_with_retry", scriere_originala)
+    verificari_original, verificari = import_engine.load_existing_fingerprints, []
+    monkeypatch.setattr(import_engine, "load_existing_fingerprints",
+                        lambda *args: verificari.append(args) or verificari_original(*args))
+    statistici = import_engine.run_import_batch(conexiune, [fisier], 1, chunk_size=100, max_parse_workers=1)
+
+    assert statistici["resumed_files"] == [fisier] and statistici["inserted"] == 700
+    assert len(verificari) == 7
+    assert conexiune._connection.execute("SELECT tranzactii_procesate FROM istoric_importuri").fetchall() == [(1000,)]
+    assert conexiune.count("importuri_in_curs") == 0
+
+    referinta = StandInConnection()
+    import_engine.run_import_batch(referinta, [fisier], 1, chunk_size=100, max_parse_workers=1)
+    for interogare in ("SELECT data, descriere, suma, sold_dupa_tranzactie, tx_fingerprint FROM tranzactii ORDER BY id",
+                       "SELECT referinta, numar_extras, sold_final, numar_tranzactii FROM extrase_solduri ORDER BY id"):
+        assert conexiune._connection.execute(interogare).fetchall() == referinta._connection.execute(interogare).fetchall()
+
+
+def _importa_cu_parserul_initial(conexiune, cale, id_cont):
+    """Rândurile scrise de importul inițial (regex pe tot fișierul), fără amprentă."""
+    with open(cale, "r", encoding="utf-8") as f:
+        continut = f.read()
+    randuri = []
+    for bloc, _ in re.findall(r"(:61:.*?)(?=(:61:|$))", continut, re.DOTALL):
+        antet = re.search(r":61:(\d{6})(?:\d{4})?([CD])([\d,]+)([A-Z]{4})", bloc)
+        descriere = re.search(r":86:(.*?)$", bloc, re.DOTALL)
+        descriere = descriere.group(1).strip().replace('\n', ' ') if descriere else ""
+        tid, rrn = RE_TID.search(descriere), RE_RRN.search(descriere)
+        zi = antet.group(1)
+        randuri.append((id_cont, f"20{zi[0:2]}-{zi[2:4]}-{zi[4:6]}", descriere, float(antet.group(3).replace(',', '.')),
+                        "credit" if antet.group(2) == "C" else "debit", antet.group(4),
+                        tid.group(1).strip() if tid else None, rrn.group(1).strip() if rrn else None))
+    conexiune._connection.executemany(
+        "INSERT INTO tranzactii (id_cont_fk, data, descriere, suma, tip, cod_tranzactie_fk, tid, rrn) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", randuri)
+    conexiune.commit()
+    return [rand[2] for rand in randuri]
+
+
+def test_reimportul_dupa_migrarea_amprentelor_nu_dubleaza_ultima_tranzactie_a_extraselor(tmp_path):
+    """Amprenta descrierilor vechi (cu soldurile extrasului lipite) ignoră resturile extrasului; descrierea rămâne."""
+    fisier = write_statement_file(str(tmp_path / "vechi.sta"), DEFAULT_IBANS[0], 30, seed=4, per_statement=10)
+    conexiune = StandInConnection()
+    descrieri_vechi = _importa_cu_parserul_initial(conexiune, fisier, 1)
+    assert sum(":62F:" in descriere for descriere in descrieri_vechi) == 3
+
+    handler = DatabaseHandler({'host': 'nas'})
+    handler.conn = conexiune
+    conexiune._connection.row_factory = sqlite3.Row  # rânduri accesibile după coloană, ca DictCursor
+    handler._backfill_tx_fingerprints(conexiune.cursor(), chunk_size=7)
+    conexiune._connection.row_factory = None
+
+    statistici = import_engine.run_import_batch(conexiune, [fisier], 1, max_parse_workers=1)
+    assert (statistici["inserted"], statistici["ignored"]) == (0, 30)
+    assert conexiune.count("tranzactii") == 30
+
+    assert [r[0] for r in conexiune._connection.execute("SELECT descriere FROM tranzactii ORDER BY id")] == descrieri_vechi
+
+    referinta = StandInConnection()
+    import_engine.run_import_batch(referinta, [fisier], 1, max_parse_workers=1)
+    interogare = "SELECT tx_fingerprint FROM tranzactii ORDER BY id"
+    assert conexiune._connection.execute(interogare).fetchall() == referinta._connection.execute(interogare).fetchall()
@@ -0,0 +1,142 @@
+# tests/test_import_watcher.py
+
+import sys
+import os
+import configparser
+from datetime import datetime
+
+import pymysql
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from BTExtrasViewer import import_watcher
+from common.config_management import read_watch_config_from_parser
+from tests.db_standin import StandInConnection
+from tests.mt940_generator import DEFAULT_IBANS, write_statement_file
+
+
+def test_fisierul_este_gata_doar_dupa_ce_ramane_neschimbat(tmp_path):
+    """Un fișier aflat încă în scriere (dimensiune în schimbare) nu este importat."""
+    cale = tmp_path / "extras.sta"
+    cale.write_text(":20:REF\n", encoding="utf-8")
+    tracker = import_watcher.FileStabilityTracker(settle_seconds=10)
+
+    assert tracker.ready_files([str(cale)], now=0) == []
+    assert tracker.ready_files([str(cale)], now=5) == []
+    with open(cale, "a", encoding="utf-8") as f:
+        f.write(":25:RO49BTRL01301202N12345XX\n")
+    assert tracker.ready_files([str(cale)], now=12) == []
+    assert tracker.ready_files([str(cale)], now=22) == [str(cale)]
+
+
+def test_move_to_directory_nu_suprascrie(tmp_path):
+    """Fișierele cu același nume sunt arhivate cu sufix numeric, în subdirectorul lunii."""
+    arhiva = tmp_path / "arhiva"
+    moment = datetime(2025, 3, 4)
+    for _ in range(2):
+        (tmp_path / "extras.sta").write_text("x", encoding="utf-8")
+        import_watcher.move_to_directory(str(tmp_path / "extras.sta"), str(arhiva), now=moment)
+
+    assert sorted(os.listdir(arhiva / "2025-03")) == ["extras.sta", "extras_1.sta"]
+
+
+def test_route_files_grupeaza_pe_cont_dupa_iban(tmp_path):
+    """Fișierele sunt direcționate după IBAN-ul din :25:, iar cele necunoscute sunt separate."""
+    cai = []
+    for nume, iban in (("a.sta", "RO49BTRL01301202N12345XX"), ("b.sta", "RO11BTRL01301202N99999XX")):
+        (tmp_path / nume).write_text(f":20:REF\n:25:{iban}\n", encoding="utf-8")
+        cai.append(str(tmp_path / nume))
+    watcher = import_watcher.ImportWatcher({}, {"settle_seconds": 0})
+
+    rutate, necunoscute = watcher.route_files(cai, {"RO49BTRL01301202N12345XX": 7})
+
+    assert rutate == {7: [cai[0]]}
+    assert necunoscute == [cai[1]]
+
+
+def test_read_watch_config_valori_implicite():
+    """Secțiunea [ImportWatcher] are nevoie doar de watch_dir; restul are valori implicite."""
+    config = configparser.ConfigParser()
+    assert read_watch_config_from_parser(config) is None
+    config.read_string("[ImportWatcher]\nwatch_dir = /date/extrase\nextensions = .sta, .TXT\n")
+
+    setari = read_watch_config_from_parser(config)
+
+    assert setari["archive_dir"] == os.path.join("/date/extrase", "arhiva")
+    assert setari["poll_interval"] == 30.0
+    assert setari["extensions"] == (".sta", ".txt")
+
+
+def _watcher_cu_director(tmp_path, monkeypatch):
+    """Watcher pe un director temporar, cu o bază locală (SQLite) nouă la fiecare conectare."""
+    intrare = tmp_path / "intrare"
+    intrare.mkdir()
+    conexiuni = []
+    def conectare(db_credentials):
+        conexiune = StandInConnection()
+        conexiune._connection.executemany("INSERT INTO conturi_bancare (id_cont, iban) VALUES (?, ?)",
+                                          list(enumerate(DEFAULT_IBANS, start=1)))
+        conexiuni.append(conexiune)
+        return conexiune
+    monkeypatch.setattr(import_watcher, "connect_import_database", conectare)
+    setari = {"watch_dir": str(intrare), "archive_dir": str(tmp_path / "arhiva"), "rejected_dir": str(tmp_path / "respinse"),
+              "settle_seconds": 0, "extensions": (".sta", ".xml")}
+    return import_watcher.ImportWatcher({}, setari), intrare, conexiuni
+
+
+def test_fisierele_sunt_reincercate_dupa_o_eroare_de_conexiune(tmp_path, monkeypatch):
+    """Pierderea conexiunii nu marchează fișierele ca eșuate: scanarea următoare le importă."""
+    watcher, intrare, conexiuni = _watcher_cu_director(tmp_path, monkeypatch)
+    write_statement_file(str(intrare / "extras.sta"), DEFAULT_IBANS[0], 20, seed=2)
+    import_original, apeluri = import_watcher.run_import_batch, []
+    def import_cu_conexiune_pierduta(connection, paths, account_id):
+        apeluri.append(paths)
+        if len(apeluri) == 1:
+            raise pymysql.err.OperationalError(2013, "Lost connection to MySQL server during query")
+        return import_original(connection, paths, account_id, max_parse_workers=1)
+    monkeypatch.setattr(import_watcher, "run_import_batch", import_cu_conexiune_pierduta)
+
+    with pytest.raises(pymysql.err.OperationalError):
+        watcher.scan_once()
+    assert (intrare / "extras.sta").exists()
+
+    rezultate = watcher.scan_once()
+    assert len(apeluri) == 2 and [r["inserted"] for r in rezultate] == [20]
+    assert len(conexiuni) == 2 and not any(conexiune.open for conexiune in conexiuni)
+    assert not (intrare / "extras.sta").exists() and list((tmp_path / "arhiva").rglob("extras.sta"))
+
+
+def test_fisierul_invalid_nu_este_reincercat_cat_timp_nu_se_schimba(tmp_path, monkeypatch):
+    watcher, intrare, _ = _watcher_cu_director(tmp_path, monkeypatch)
+    write_statement_file(str(intrare / "extras.sta"), DEFAULT_IBANS[0], 5, seed=2)
+    apeluri = []
+    def import_invalid(connection, paths, account_id):
+        apeluri.append(paths)
+        raise ValueError("dată invalidă")
+    monkeypatch.setattr(import_watcher, "run_import_batch", import_invalid)
+
+    assert watcher.scan_once() == [] and watcher.scan_once() == []
+    assert len(apeluri) == 1 and (intrare / "extras.sta").exists()
+
+
+def test_xml_malformat_este_marcat_esuat_iar_celelalte_conturi_se_importa(tmp_path, monkeypatch):
+    """Un CAMT.053 trunchiat nu oprește scanarea: fișierul rămâne marcat ca eșuat, contul următor este importat."""
+    watcher, intrare, _ = _watcher_cu_director(tmp_path, monkeypatch)
+    (intrare / "a_trunchiat.xml").write_text(
+        '<?xml version="1.0" encoding="UTF-8"?>\n<Document xmlns="urn:iso:std:iso:20022:tech:xsd:camt.053.001.02">'
+        f'<BkToCstmrStmt><Stmt><Id>STMT-1</Id><Acct><Id><IBAN>{DEFAULT_IBANS[0]}</IBAN></Id></Acct>'
+        '<Ntry><Amt Ccy="RON">1.00</Amt><CdtDbtInd>CRDT</CdtDbtInd><BookgDt><Dt>2025-01-02</Dt></BookgDt></Ntry><Ntry><Amt',
+        encoding="utf-8")
+    write_statement_file(str(intrare / "b_extras.sta"), DEFAULT_IBANS[1], 10, seed=3)
+    import_original, apeluri = import_watcher.run_import_batch, []
+    def import_intr_un_proces(connection, paths, account_id):
+        apeluri.append(account_id)
+        return import_original(connection, paths, account_id, max_parse_workers=1)
+    monkeypatch.setattr(import_watcher, "run_import_batch", import_intr_un_proces)
+
+    rezultate = watcher.scan_once()
+
+    assert apeluri == [1, 2] and [(r["account_id"], r["inserted"]) for r in rezultate] == [(2, 10)]
+    assert (intrare / "a_trunchiat.xml").exists() and not (intrare / "b_extras.sta").exists()
+    assert watcher.scan_once() == [] and apeluri == [1, 2]
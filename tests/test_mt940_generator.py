@@ -0,0 +1,60 @@
+# tests/test_mt940_generator.py
+
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from BTExtrasViewer import mt940_parser, import_engine
+from tests.db_standin import StandInConnection
+from tests.mt940_generator import DEFAULT_IBANS, write_statement_file, write_statement_set
+
+
+def _sold(valoare):
+    semn = -1 if valoare[0] == "D" else 1
+    return semn * float(valoare[10:].replace(",", "."))
+
+
+def test_generatorul_este_determinist(tmp_path):
+    """Același cont, număr de tranzacții și seed produc fișiere identice."""
+    a = write_statement_file(str(tmp_path / "a.sta"), DEFAULT_IBANS[0], 600, seed=3)
+    b = write_statement_file(str(tmp_path / "b.sta"), DEFAULT_IBANS[0], 600, seed=3)
+    c = write_statement_file(str(tmp_path / "c.sta"), DEFAULT_IBANS[0], 600, seed=4)
+
+    with open(a, "rb") as fa, open(b, "rb") as fb, open(c, "rb") as fc:
+        continut_a = fa.read()
+        assert continut_a == fb.read()
+        assert continut_a != fc.read()
+
+
+def test_extrasele_generate_sunt_parsabile_si_au_solduri_coerente(tmp_path):
+    """Toate tranzacțiile sunt parsate, câmpurile POS/plată sunt prezente, iar soldurile se închid."""
+    cale = write_statement_file(str(tmp_path / "extras.sta"), DEFAULT_IBANS[0], 1000, seed=1, per_statement=200)
+
+    inregistrari = list(mt940_parser.iter_mt940_records(cale))
+    tranzactii = [mt940_parser.parse_tx_record(inregistrare) for inregistrare in inregistrari]
+
+    assert len(tranzactii) == 1000
+    for camp in ("cif", "factura", "tid", "rrn", "pan", "mid"):
+        assert any(tx[camp] for tx in tranzactii), camp
+    assert import_engine.extract_iban_from_mt940(cale) == DEFAULT_IBANS[0]
+
+    contexte = {id(inreg["context"]): inreg["context"] for inreg in inregistrari}
+    assert len(contexte) == 5
+    for context in contexte.values():
+        miscari = sum(tx["suma"] if tx["tip"] == "credit" else -tx["suma"]
+                      for inreg, tx in zip(inregistrari, tranzactii) if inreg["context"] is context)
+        assert round(_sold(context["opening_balance"]) + miscari, 2) == _sold(context["closing_balance"])
+
+
+def test_lotul_generat_se_importa_in_baza_locala(tmp_path):
+    """Un lot pe mai multe conturi trece prin importul complet; reimportul nu mai adaugă nimic."""
+    cai = write_statement_set(str(tmp_path), 900, accounts=3, seed=5)
+    conexiune = StandInConnection()
+
+    statistici = import_engine.run_import_batch(conexiune, cai, 1, max_parse_workers=1)
+    assert statistici["inserted"] == conexiune.count("tranzactii") == 900
+
+    statistici = import_engine.run_import_batch(conexiune, cai, 1, max_parse_workers=1)
+    assert statistici["inserted"] == 0
+    assert len(statistici["skipped_files"]) == 3
@@ -0,0 +1,229 @@
+# tests/test_mt940_parser.py
+
+import sys
+import os
+import tracemalloc
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from BTExtrasViewer import mt940_parser
+from tests.mt940_generator import DEFAULT_IBANS, write_statement_file
+
+EXTRAS_MT940 = """{1:F01BTRLRO22AXXX0000000000}{2:I940BTRLRO22XXXXN}{4:
+:20:EXTRAS0001
+:25:RO49BTRL01301202N12345XX
+:28C:00012/001
+:60F:C250101RON1000,00
+:61:2501020102D150,50NTRFNONREF//BT123
+:86:PLATA FACT. 12345 C.I.F.: 998877
+FURNIZOR EXEMPLU SRL
+:61:2501030103C2000,00NTRFNONREF
+:86:INCASARE CLIENT MARE SRL
+:61:2501030103D45,10NCARNONREF
+:86:POS TID: T1234 RRN: 000111222 PAN: 4111XXXX1111 MID 778899
+:62F:C250103RON2804,40
+:64:C250103RON2804,40
+-}
+"""
+
+
+def _scrie_extras(tmp_path, continut=EXTRAS_MT940, nume="extras.sta"):
+    cale = tmp_path / nume
+    cale.write_bytes(continut.encode("utf-8"))
+    return str(cale)
+
+
+def test_tokenizer_returneaza_cate_o_inregistrare_pe_tranzactie(tmp_path):
+    """
+    Fiecare :61: produce exact o înregistrare, iar descrierea :86: se oprește
+    la următorul tag (nu mai "înghite" :62F:/:64: ca la vechiul regex).
+    """
+    inregistrari = list(mt940_parser.iter_mt940_records(_scrie_extras(tmp_path)))
+
+    assert len(inregistrari) == 3
+    assert inregistrari[0]["tag86"] == "PLATA FACT. 12345 C.I.F.: 998877 FURNIZOR EXEMPLU SRL"
+    assert inregistrari[2]["tag86"] == "POS TID: T1234 RRN: 000111222 PAN: 4111XXXX1111 MID 778899"
+
+
+def test_contextul_extrasului_este_completat(tmp_path):
+    """
+    Contextul (:20:, :25:, :28C:, :60F:, :62F:) este comun tranzacțiilor extrasului,
+    iar soldul final devine disponibil după parcurgerea completă.
+    """
+    inregistrari = list(mt940_parser.iter_mt940_records(_scrie_extras(tmp_path)))
+    context = inregistrari[0]["context"]
+
+    assert all(inreg["context"] is context for inreg in inregistrari)
+    assert context["reference"] == "EXTRAS0001"
+    assert context["account"] == "RO49BTRL01301202N12345XX"
+    assert context["statement_no"] == "00012/001"
+    assert context["opening_balance"] == "C250101RON1000,00"
+    assert context["closing_balance"] == "C250103RON2804,40"
+
+
+def test_extrase_multiple_in_acelasi_fisier(tmp_path):
+    """Un nou tag :20: deschide un context nou pentru extrasul următor."""
+    continut = EXTRAS_MT940 + EXTRAS_MT940.replace("EXTRAS0001", "EXTRAS0002")
+    inregistrari = list(mt940_parser.iter_mt940_records(_scrie_extras(tmp_path, continut)))
+
+    assert len(inregistrari) == 6
+    assert inregistrari[2]["context"]["reference"] == "EXTRAS0001"
+    assert inregistrari[3]["context"]["reference"] == "EXTRAS0002"
+
+
+def test_parse_tx_record_extrage_campurile(tmp_path):
+    """Verifică valorile coloanelor extrase dintr-o înregistrare POS și dintr-o plată."""
+    inregistrari = list(mt940_parser.iter_mt940_records(_scrie_extras(tmp_path)))
+
+    plata = mt940_parser.parse_tx_record(inregistrari[0])
+    assert plata["data"] == date(2025, 1, 2)
+    assert plata["suma"] == 150.50
+    assert plata["tip"] == "debit"
+    assert plata["cod_tranzactie"] == "NTRF"
+    assert plata["factura"] == "12345"
+    assert plata["cif"] == "998877"
+
+    pos = mt940_parser.parse_tx_record(inregistrari[2])
+    assert pos["tid"] == "T1234"
+    assert pos["rrn"] == "000111222"
+    assert pos["pan"] == "4111XXXX1111"
+    assert pos["mid"] == "778899"
+
+
+def test_parse_tx_record_ignora_antet_invalid():
+    """O linie :61: fără formatul așteptat nu produce o tranzacție."""
+    inregistrare = {"tag61": "LINIE INVALIDA", "tag86": "", "context": {}}
+    assert mt940_parser.parse_tx_record(inregistrare) is None
+
+
+def test_read_statement_reference_citeste_doar_antetul(tmp_path):
+    """Referința extrasului combină :20: și :28C:."""
+    assert mt940_parser.read_statement_reference(_scrie_extras(tmp_path)) == "EXTRAS0001/00012/001"
+
+
+DESCRIERI_VARIATE = [
+    "",
+    "PLATA FACT. 12345 C.I.F.: 998877 FURNIZOR EXEMPLU SRL",
+    "PLATA FACTURA NR: AB77 CIF 123",
+    "F. 0099 C.I.F:11223344 SERVICII IT SRL",
+    "POS TID: T1234 RRN: 000111222 PAN: 4111XXXX1111 MID 778899",
+    "POS TID T9 RRN 55 PAN 5222XXXX0000 MERCHANT",
+    "comision administrare cont",
+    "INCASARE CLIENT MARE SRL TIDAL RRNX PANOU MIDAS 12",
+    "TRANSFER CATRE   BENEFICIAR CU SPATII   ",
+]
+
+
+def _extragere_cu_cautari_separate(descriere):
+    """Varianta inițială: câte o căutare regex independentă pentru fiecare câmp."""
+    rezultat = {}
+    for nume, regex in (("cif", mt940_parser.RE_CIF), ("beneficiar", mt940_parser.RE_BENEFICIAR),
+                        ("factura", mt940_parser.RE_FACTURA), ("tid", mt940_parser.RE_TID),
+                        ("rrn", mt940_parser.RE_RRN), ("pan", mt940_parser.RE_PAN),
+                        ("mid", mt940_parser.RE_MID)):
+        potrivire = regex.search(descriere)
+        rezultat[nume] = potrivire.group(1).strip() if potrivire else None
+    return rezultat
+
+
+def test_extract_description_fields_identic_cu_cautarile_separate():
+    """Extractorul ghidat de etichete dă exact aceleași valori ca cele șapte căutări separate."""
+    for descriere in DESCRIERI_VARIATE:
+        assert mt940_parser.extract_description_fields(descriere) == _extragere_cu_cautari_separate(descriere)
+
+
+def test_parse_yymmdd_respecta_regula_de_secol_strptime():
+    """Anii 00-68 sunt în secolul 21, iar 69-99 în secolul 20, ca la strptime('%y')."""
+    from datetime import datetime
+    for valoare in ("250102", "000229", "680101", "691231", "991231"):
+        assert mt940_parser.parse_yymmdd(valoare) == datetime.strptime(valoare, "%y%m%d").date()
+    try:
+        mt940_parser.parse_yymmdd("251332")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("O dată invalidă trebuie să ridice ValueError")
+
+
+def test_iter_parsed_transactions_cumuleaza_timpii_pe_etape(tmp_path):
+    """Cu un dicționar de timpi, parsarea raportează separat citirea, tokenizarea și extragerea."""
+    timpi = {}
+    tranzactii = list(mt940_parser.iter_parsed_transactions(_scrie_extras(tmp_path), timpi))
+
+    assert len(tranzactii) == 3
+    assert set(timpi) == {"read", "tokenize", "extract"}
+    assert all(valoare >= 0 for valoare in timpi.values())
+
+
+def test_citirea_pe_blocuri_pastreaza_liniile(tmp_path):
+    """Liniile tăiate între două blocuri de citire sunt reconstituite corect."""
+    cale = _scrie_extras(tmp_path)
+    with open(cale, "rb") as f:
+        linii = list(mt940_parser._iter_raw_lines(f, block_size=7))
+
+    with open(cale, "rb") as f:
+        assert linii == f.read().split(b"\n")[:-1]
+
+
+def test_soldurile_sunt_calculate_pe_extras(tmp_path):
+    """Fiecare tranzacție primește soldul de după ea; extrasul este verificat față de :62F:."""
+    extrase = []
+    tranzactii = list(mt940_parser.iter_parsed_transactions(_scrie_extras(tmp_path), statements=extrase))
+
+    assert [tx["sold_dupa_tranzactie"] for tx in tranzactii] == [849.50, 2849.50, 2804.40]
+    assert all(tx["sold_initial"] == 1000.0 and tx["sold_final"] == 2804.40 for tx in tranzactii)
+    assert extrase == [{
+        "reference": "EXTRAS0001", "statement_no": "00012/001", "account": "RO49BTRL01301202N12345XX",
+        "opening_date": date(2025, 1, 1), "opening_balance": 1000.0,
+        "closing_date": date(2025, 1, 3), "closing_balance": 2804.40,
+        "currency": "RON", "transactions": 3, "consistent": True,
+        "offset": EXTRAS_MT940.index(":20:"),
+    }]
+
+
+def test_parsarea_poate_incepe_de_la_un_extras(tmp_path):
+    """De la poziția (în octeți) a unui extras, parsarea dă exact tranzacțiile de acolo încolo."""
+    continut = EXTRAS_MT940 + EXTRAS_MT940.replace("EXTRAS0001", "EXTRAS0002")
+    cale = _scrie_extras(tmp_path, continut)
+    extrase = []
+    toate = list(mt940_parser.iter_parsed_transactions(cale, statements=extrase))
+
+    assert extrase[1]["offset"] == continut.encode("utf-8").rindex(b":20:")
+    extrase_reluate = []
+    reluate = list(mt940_parser.iter_parsed_transactions(cale, statements=extrase_reluate,
+                                                         start_offset=extrase[1]["offset"]))
+    assert reluate == toate[3:]
+    assert extrase_reluate == extrase[1:]
+
+
+def test_parse_balance_sold_debitor():
+    """Un sold D este negativ, iar sumele sunt păstrate exact, în bani."""
+    sold = mt940_parser.parse_balance("D250131RON1234,5")
+    assert sold == {"date": date(2025, 1, 31), "currency": "RON", "cents": -123450}
+    assert mt940_parser.parse_balance(None) is None
+
+
+@pytest.mark.parametrize("pe_extras", [250, None], ids=["extrase_zilnice", "un_singur_extras"])
+def test_memoria_ramane_constanta_pentru_fisiere_mari(tmp_path, monkeypatch, pe_extras):
+    """
+    Memoria maximă nu crește cu numărul de tranzacții, nici când tot fișierul este un singur extras
+    (extrasele consolidate anuale): tranzacțiile sunt returnate fără a aștepta :62F:.
+    """
+    monkeypatch.setattr(mt940_parser, "READ_BLOCK_SIZE", 16 * 1024)  # blocul citit nu domină măsurătoarea
+    def varf_memorie(numar_tranzactii):
+        cale = write_statement_file(str(tmp_path / f"extras_{numar_tranzactii}.sta"), DEFAULT_IBANS[0],
+                                    numar_tranzactii, seed=1, per_statement=pe_extras or numar_tranzactii)
+        extrase = []
+        tracemalloc.start()
+        try:
+            for _ in mt940_parser.iter_parsed_transactions(cale, statements=extrase):
+                pass
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    mic, mare = varf_memorie(1000), varf_memorie(8000)
+    assert mare < mic * 2
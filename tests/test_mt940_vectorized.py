@@ -0,0 +1,50 @@
+# tests/test_mt940_vectorized.py
+
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from BTExtrasViewer import mt940_parser, mt940_vectorized
+from tests.mt940_generator import DEFAULT_IBANS, write_statement_file
+from tests.test_mt940_parser import EXTRAS_MT940, _scrie_extras
+
+
+def test_extragerea_vectorizata_este_identica_cu_cea_pe_inregistrari(tmp_path):
+    """Aceleași valori (și tipuri: date, float, None) ca parse_tx_record, pentru fiecare tranzacție."""
+    cale = write_statement_file(str(tmp_path / "extras.sta"), DEFAULT_IBANS[0], 2000, seed=7, per_statement=2000)
+    inregistrari = list(mt940_parser.iter_mt940_records(cale)) + list(mt940_parser.iter_mt940_records(_scrie_extras(tmp_path)))
+
+    assert mt940_vectorized.parse_tx_records(inregistrari) == [mt940_parser.parse_tx_record(r) for r in inregistrari]
+
+
+def test_antetele_invalide_sunt_omise():
+    """Ca la parse_tx_record, o linie :61: fără formatul așteptat nu produce tranzacție."""
+    inregistrari = [
+        {"tag61": "LINIE INVALIDA", "tag86": "X", "context": {}},
+        {"tag61": "2501020102D150,50NTRFNONREF", "tag86": "POS TID: T1 RRN: 22", "context": {}},
+    ]
+    tranzactii = mt940_vectorized.parse_tx_records(inregistrari)
+
+    assert tranzactii == [mt940_parser.parse_tx_record(inregistrari[1])]
+    assert (tranzactii[0]["tid"], tranzactii[0]["rrn"], tranzactii[0]["cif"]) == ("T1", "22", None)
+    assert mt940_vectorized.parse_tx_records(inregistrari[:1]) == []
+
+
+def test_data_invalida_ridica_valueerror():
+    with pytest.raises(ValueError):
+        mt940_vectorized.parse_tx_records([{"tag61": "2513400102D1,00NTRF", "tag86": "", "context": {}}])
+
+
+def test_parsarea_pe_extrase_cu_extractor_vectorizat(tmp_path):
+    """Cu batch_extractor, fișierul dă aceleași tranzacții și solduri ca parsarea obișnuită."""
+    cale = _scrie_extras(tmp_path, EXTRAS_MT940 + EXTRAS_MT940.replace("EXTRAS0001", "EXTRAS0002"))
+    extrase, extrase_vectorizate = [], []
+
+    obisnuite = list(mt940_parser.iter_parsed_transactions(cale, statements=extrase))
+    vectorizate = list(mt940_parser.iter_parsed_transactions(cale, statements=extrase_vectorizate,
+                                                             batch_extractor=mt940_vectorized.parse_tx_records))
+    assert vectorizate == obisnuite
+    assert extrase_vectorizate == extrase
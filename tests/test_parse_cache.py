@@ -0,0 +1,73 @@
+# tests/test_parse_cache.py
+
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from BTExtrasViewer import mt940_parser, import_engine
+from BTExtrasViewer.parse_cache import ParseCache
+from tests.db_standin import StandInConnection
+from tests.mt940_generator import DEFAULT_IBANS, write_statement_file
+
+
+def _cache(tmp_path, **kwargs):
+    return ParseCache(str(tmp_path / "cache"), **kwargs)
+
+
+def test_intrarea_este_citita_identic(tmp_path):
+    """Tranzacțiile și rezumatele extraselor sunt refăcute exact din formatul pe coloane."""
+    fisier = write_statement_file(str(tmp_path / "a.sta"), DEFAULT_IBANS[0], 300, seed=1)
+    tranzactii, info = mt940_parser.parse_statement_file_with_info(fisier)
+    cache = _cache(tmp_path)
+
+    assert cache.load(fisier) is None
+    assert cache.store(fisier, cache.file_key(fisier), tranzactii, info["statements"], iban=DEFAULT_IBANS[0], hash="h")
+
+    meta, din_cache, extrase = cache.load(fisier)
+    assert din_cache == tranzactii and extrase == info["statements"]
+    assert meta == {"iban": DEFAULT_IBANS[0], "hash": "h", "transactions": 300}
+    assert cache.read_meta(fisier) == meta
+
+
+def test_fisierul_modificat_nu_mai_foloseste_intrarea(tmp_path):
+    """O altă mărime sau mtime schimbă cheia; nici cheia veche (citită înainte de modificare) nu se salvează."""
+    fisier = write_statement_file(str(tmp_path / "a.sta"), DEFAULT_IBANS[0], 10, seed=1)
+    cache = _cache(tmp_path)
+    cheie = cache.file_key(fisier)
+    cache.store(fisier, cheie, [{"suma": 1.0}], [])
+
+    with open(fisier, "a", encoding="utf-8") as f:
+        f.write("\n")
+    assert cache.read_meta(fisier) is None
+    assert not cache.store(fisier, cheie, [{"suma": 2.0}], [])
+
+
+def test_prune_pastreaza_intrarile_recente(tmp_path):
+    """Când directorul depășește max_bytes, sunt șterse întâi intrările folosite cel mai demult."""
+    cache = _cache(tmp_path, max_bytes=0)
+    fisier = write_statement_file(str(tmp_path / "a.sta"), DEFAULT_IBANS[0], 10, seed=1)
+    cache.store(fisier, cache.file_key(fisier), [{"suma": 1.0}], [])
+    assert os.listdir(cache.directory) == []
+
+
+def test_reimportul_din_cache_nu_mai_tokenizeaza(tmp_path):
+    """Al doilea import al aceluiași fișier (altă bază) ia tranzacțiile, hash-ul și IBAN-ul din cache."""
+    fisier = write_statement_file(str(tmp_path / "a.sta"), DEFAULT_IBANS[0], 600, seed=2)
+    cache = _cache(tmp_path)
+
+    prima = StandInConnection()
+    import_engine.run_import_batch(prima, [fisier], 1, max_parse_workers=1, parse_cache=cache)
+    assert cache.read_meta(fisier)["hash"] == import_engine.compute_file_hash(fisier)[0]
+    assert import_engine.extract_iban_from_mt940(fisier, cache) == DEFAULT_IBANS[0]
+
+    fisiere = list(import_engine.iter_parsed_files([fisier], 1, cache))
+    assert fisiere[0][3]["cached"] and "tokenize" not in fisiere[0][3]["timings"]
+
+    a_doua = StandInConnection()
+    statistici = import_engine.run_import_batch(a_doua, [fisier], 1, max_parse_workers=1, parse_cache=cache)
+    assert statistici["inserted"] == 600
+    interogare = "SELECT data, descriere, suma, sold_dupa_tranzactie, tx_fingerprint FROM tranzactii ORDER BY id"
+    assert a_doua._connection.execute(interogare).fetchall() == prima._connection.execute(interogare).fetchall()
+    interogare = "SELECT hash_fisier, referinta_extras FROM istoric_importuri"
+    assert a_doua._connection.execute(interogare).fetchall() == prima._connection.execute(interogare).fetchall()
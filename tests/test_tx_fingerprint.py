@@ -0,0 +1,41 @@
+# tests/test_tx_fingerprint.py
+
+import sys
+import os
+from datetime import date, datetime
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from common.tx_fingerprint import compute_tx_fingerprint, normalize_legacy_description, TX_FINGERPRINT_LENGTH
+
+
+def test_amprenta_identica_pentru_valori_din_import_si_din_db():
+    """
+    Valorile parsate la import (float, date) și cele citite din DB (Decimal, datetime)
+    trebuie să producă aceeași amprentă, altfel completarea rândurilor existente
+    nu ar recunoaște duplicatele.
+    """
+    din_import = compute_tx_fingerprint(5, date(2025, 1, 2), 150.5, "debit", "PLATA", "000111", None)
+    din_db = compute_tx_fingerprint(5, datetime(2025, 1, 2), Decimal("150.50"), "debit", "PLATA", "000111", "")
+
+    assert din_import == din_db
+    assert len(din_import) == TX_FINGERPRINT_LENGTH
+
+
+def test_amprenta_depinde_de_cont_si_de_rrn():
+    """Aceeași tranzacție în alt cont sau cu alt RRN are altă amprentă."""
+    baza = compute_tx_fingerprint(5, date(2025, 1, 2), 10, "debit", "POS", "RRN1", "TID1")
+
+    assert baza != compute_tx_fingerprint(6, date(2025, 1, 2), 10, "debit", "POS", "RRN1", "TID1")
+    assert baza != compute_tx_fingerprint(5, date(2025, 1, 2), 10, "debit", "POS", "RRN2", "TID1")
+
+
+def test_descrierea_veche_este_taiata_la_soldurile_extrasului():
+    """Ultima tranzacție a unui extras importat cu parserul inițial conținea și restul mesajului SWIFT."""
+    veche = ("PLATA FACT. 12 C.I.F.: 123 :62F:C250131RON10,00 :64:C250131RON10,00 -} "
+             "{1:F01BTRLRO22AXXX0000000000}{2:I940BTRLRO22XXXXN}{4: :20:250201000002 :25:RO49BTRL :60F:C250201RON10,00")
+    assert normalize_legacy_description(veche) == "PLATA FACT. 12 C.I.F.: 123"
+    assert normalize_legacy_description("INCASARE -}") == "INCASARE"
+    assert normalize_legacy_description("POS TID: T1 RRN: 2 DATA 01.02.2025") == "POS TID: T1 RRN: 2 DATA 01.02.2025"
+    assert normalize_legacy_description("") == "" and normalize_legacy_description(None) is None